@@ -619,6 +619,14 @@ export const adminApi = {
     return handleResponse(response);
   },
 
+  /**
+   * Get an ingestion job's state and progress
+   */
+  getJob: async (jobId: string): Promise<ApiResponse<any>> => {
+    const response = await fetch(`${API_BASE_URL}/admin/jobs/${jobId}`);
+    return handleResponse(response);
+  },
+
   /**
    * Delete a document
    */
@@ -46,6 +46,25 @@ const AdminDashboard = () => {
     loadStats();
   }, [navigate]);
 
+  // Indexing runs in a background job queue; refresh while any upload is still pending
+  useEffect(() => {
+    if (!documents.some((doc) => doc.status === 'pending')) return;
+
+    const timer = setInterval(async () => {
+      try {
+        const result = await api.admin.getDocuments();
+        if (result.success && result.data) {
+          setDocuments(result.data.documents || []);
+          loadStats();
+        }
+      } catch (error: any) {
+        console.error("Failed to refresh documents:", error);
+      }
+    }, 3000);
+
+    return () => clearInterval(timer);
+  }, [documents]);
+
   const loadDocuments = async () => {
     try {
       setIsLoading(true);
@@ -6,6 +6,7 @@ Runs locally on device (no external dependencies)
 
 from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List
 from datetime import datetime, date, timedelta
@@ -16,6 +17,9 @@ import sys
 import os
 import uuid
 import shutil
+import time
+import asyncio
+import threading
 from pathlib import Path
 
 # Set Pakistan/Asia timezone
@@ -24,10 +28,17 @@ PAKISTAN_TZ = pytz.timezone('Asia/Karachi')
 # Add parent directory to path to import modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# The RAG engine (Chroma, Gemini) and calendar integration (Pipedream, MCP)
+# are imported where they are first built, so importing this module stays fast
 from modules.scheduler import AppointmentScheduler
-from modules.rag_engine import RAGEngine
 from modules.memory_manager import MemoryManager
-from modules.calendar_integration import CalendarIntegration
+from modules.ingestion_queue import IngestionQueue
+from modules.intent_router import IntentRouter, booking_reply, load_intent_model, small_talk_reply
+from modules.emergency_detector import EmergencyDetector, emergency_response
+from utils.rate_limiter import gemini_rate_limiter
+from config import CONTEXT_WINDOW_MESSAGES, INTENT_ROUTER_ENABLED, INTENT_MODEL_PATH, INTENT_MODEL_THRESHOLD
+from config import EMERGENCY_FAST_PATH_ENABLED, EMERGENCY_CONTINUE_WITH_RAG, EMERGENCY_PHONE_NUMBER
+from config import RAG_WARMUP_ENABLED, RAG_WARMUP_ATTEMPTS, ensure_directories
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -61,20 +72,63 @@ app.add_middleware(
 DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'healthcare.db')
 
 scheduler = AppointmentScheduler()
-calendar_integration = CalendarIntegration(scheduler)
 memory_manager = MemoryManager(db_path=DB_PATH)
 
+# Calendar integration (built on first use: it creates a Pipedream client and fetches a token)
+calendar_integration = None
+calendar_integration_lock = threading.Lock()
+
+def get_calendar_integration():
+    global calendar_integration
+    with calendar_integration_lock:
+        if calendar_integration is None:
+            from modules.calendar_integration import CalendarIntegration
+            calendar_integration = CalendarIntegration(scheduler)
+    return calendar_integration
+
+def create_intent_router():
+    """Build the chat intent router (None when disabled), with the local model if configured"""
+    if not INTENT_ROUTER_ENABLED:
+        return None
+    classifier = None
+    if INTENT_MODEL_PATH:
+        try:
+            classifier = load_intent_model(INTENT_MODEL_PATH)
+            print(f"✓ Intent model loaded from {INTENT_MODEL_PATH}")
+        except Exception as e:
+            print(f"⚠️  Could not load intent model, using rules only: {e}")
+    return IntentRouter(classifier=classifier, model_threshold=INTENT_MODEL_THRESHOLD)
+
+# Routes small talk and booking requests around the RAG engine
+intent_router = create_intent_router()
+
+# Precompiled stroke-emergency matcher, checked before anything else in chat
+emergency_detector = EmergencyDetector() if EMERGENCY_FAST_PATH_ENABLED else None
+
 # RAG Engine (lazy loading to avoid startup delay)
 rag_engine = None
+rag_engine_lock = threading.Lock()
 
 def get_rag_engine():
     global rag_engine
-    if rag_engine is None:
+    if rag_engine is not None:
+        return rag_engine
+    # Ingestion workers and requests may ask at the same time; build only once
+    with rag_engine_lock:
+        if rag_engine is not None:
+            return rag_engine
         try:
+            from modules.rag_engine import RAGEngine
+            
             # Import config for API key and settings
-            import sys
-            sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
             from config import GOOGLE_API_KEY, LLM_MODEL, CHROMA_COLLECTION_NAME, VECTOR_DB_DIR, RAG_SYSTEM_PROMPT
+            from config import EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_ENTRIES, VECTOR_STORE_BACKEND
+            from config import SEARCH_MODE, LEXICAL_FALLBACK_TIMEOUT
+            from config import EMBEDDING_DIMENSIONS, VECTOR_PRECISION, VECTOR_TRUNCATE_DIMENSIONS, VECTOR_RESCORE
+            from config import ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_TTL_SECONDS, ANSWER_CACHE_SIMILARITY
+            from config import RETRIEVAL_CANDIDATES, MMR_LAMBDA, CONTEXT_TOKEN_BUDGET
+            from config import CHAT_STAGE_TIMEOUTS, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS
+            from config import NEAR_DUPLICATE_THRESHOLD, EMBEDDING_MODEL
             
             if not GOOGLE_API_KEY:
                 print("Warning: GOOGLE_API_KEY not set in environment")
@@ -86,7 +140,27 @@ def get_rag_engine():
                 persist_directory=str(VECTOR_DB_DIR),
                 api_key=GOOGLE_API_KEY,
                 model_name=LLM_MODEL,
-                system_prompt=RAG_SYSTEM_PROMPT
+                system_prompt=RAG_SYSTEM_PROMPT,
+                embedding_cache_path=str(EMBEDDING_CACHE_PATH),
+                embedding_cache_size=EMBEDDING_CACHE_MAX_ENTRIES,
+                answer_cache_size=ANSWER_CACHE_MAX_ENTRIES,
+                answer_cache_ttl=ANSWER_CACHE_TTL_SECONDS,
+                answer_cache_similarity=ANSWER_CACHE_SIMILARITY,
+                vector_backend=VECTOR_STORE_BACKEND,
+                search_mode=SEARCH_MODE,
+                lexical_fallback_timeout=LEXICAL_FALLBACK_TIMEOUT,
+                embedding_dimensions=EMBEDDING_DIMENSIONS,
+                vector_precision=VECTOR_PRECISION,
+                vector_dimensions=VECTOR_TRUNCATE_DIMENSIONS,
+                vector_rescore=VECTOR_RESCORE,
+                retrieval_candidates=RETRIEVAL_CANDIDATES,
+                mmr_lambda=MMR_LAMBDA,
+                context_token_budget=CONTEXT_TOKEN_BUDGET,
+                stage_timeouts=CHAT_STAGE_TIMEOUTS,
+                circuit_failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+                circuit_reset_seconds=CIRCUIT_RESET_SECONDS,
+                near_duplicate_threshold=NEAR_DUPLICATE_THRESHOLD,
+                embedding_model=EMBEDDING_MODEL
             )
             print(f"✓ RAG Engine initialized with {rag_engine.collection.count()} documents")
         except Exception as e:
@@ -97,6 +171,41 @@ def get_rag_engine():
     return rag_engine
 
 
+# Warm-up state per component ('cold', 'warming', 'warm' or 'failed'), for /health/ready
+WARMUP_COMPONENTS = ("rag_engine", "vector_store", "lexical_index", "embedding", "vector_search")
+warmup_status = {component: {"status": "cold"} for component in WARMUP_COMPONENTS}
+warmup_lock = threading.Lock()
+
+def set_warmup_status(component, status, **details):
+    with warmup_lock:
+        warmup_status[component] = {"status": status, **details}
+
+def warm_up_rag_engine(retry_delay=30.0):
+    """Build the RAG engine and load its indexes before the first chat request"""
+    for component in WARMUP_COMPONENTS:
+        set_warmup_status(component, "warming")
+    
+    for attempt in range(1, RAG_WARMUP_ATTEMPTS + 1):
+        started = time.perf_counter()
+        rag = get_rag_engine()
+        if rag is None:
+            for component in WARMUP_COMPONENTS:
+                set_warmup_status(component, "failed", error="RAG engine not available")
+        else:
+            set_warmup_status("rag_engine", "warm", ms=round((time.perf_counter() - started) * 1000, 1))
+            for component, state in rag.warm_up().items():
+                set_warmup_status(component, **state)
+        
+        failed = [component for component in WARMUP_COMPONENTS if warmup_status[component]["status"] != "warm"]
+        total_ms = (time.perf_counter() - started) * 1000
+        print(f"🔥 RAG engine warm-up attempt {attempt} took {total_ms:.0f}ms"
+              + (f" (failed: {', '.join(failed)})" if failed else ""))
+        if not failed:
+            return
+        if attempt < RAG_WARMUP_ATTEMPTS:
+            time.sleep(retry_delay)
+
+
 # ============================================
 # PYDANTIC MODELS (Request/Response schemas)
 # ============================================
@@ -159,6 +268,20 @@ def get_db_connection():
     return scheduler._get_connection()
 
 
+def answer_fast_path(decision: dict, user_id: int, message: str) -> dict:
+    """Answer a small-talk or booking message locally, without RAG"""
+    if decision['intent'] == 'booking':
+        return booking_reply(message, scheduler, datetime.now(PAKISTAN_TZ).date())
+    
+    greeting = None
+    if decision['intent'] == 'greeting':
+        try:
+            greeting = memory_manager.generate_personalized_greeting(user_id)
+        except Exception as e:
+            print(f"⚠️  Personalized greeting failed: {e}")
+    return {'answer': small_talk_reply(decision['intent'], greeting)}
+
+
 def format_datetime(date_str: str, time_str: str) -> str:
     """Combine date and time into readable format"""
     try:
@@ -646,7 +769,8 @@ async def approve_appointment(appointment_id: int):
         
         # Sync to Google Calendar
         try:
-            success, message, _ = await calendar_integration.book_appointment_with_calendar_async(
+            calendar = await asyncio.to_thread(get_calendar_integration)
+            success, message, _ = await calendar.book_appointment_with_calendar_async(
                 user_id=appointment['user_id'],
                 doctor_id=appointment['doctor_id'],
                 appointment_date=appointment['appointment_date'],
@@ -736,11 +860,27 @@ async def cancel_appointment(appointment_id: int):
 async def chat_with_ai(message: ChatMessage):
     """Chat with medical AI assistant (REST alternative to WebSocket)"""
     try:
-        rag = get_rag_engine()
+        started = time.perf_counter()
         
-        if not rag:
+        # Active stroke emergencies are answered before any network call. A
+        # REST reply can't be sent in parts, so the RAG answer that follows the
+        # emergency frame on the WebSocket is skipped here
+        emergency = emergency_detector.detect(message.message) if emergency_detector else None
+        
+        # Small talk and booking requests skip retrieval and generation
+        decision = intent_router.route(message.message) if intent_router and not emergency else None
+        fast_path = (decision is not None and decision['intent'] != 'medical') or emergency is not None
+        
+        # In a worker thread: the engine may still be being built by the warm-up
+        rag = None if fast_path else await asyncio.to_thread(get_rag_engine)
+        if not fast_path and not rag:
             raise HTTPException(status_code=503, detail="AI assistant not available. Please configure GOOGLE_API_KEY.")
         
+        result = {}
+        if fast_path and decision is not None:
+            # Before saving the message, so the greeting sees the previous visit
+            result = await asyncio.to_thread(answer_fast_path, decision, message.user_id, message.message)
+        
         # Save user message
         memory_manager.save_conversation(
             user_id=message.user_id,
@@ -748,9 +888,20 @@ async def chat_with_ai(message: ChatMessage):
             message=message.message
         )
         
-        # Get AI response using RAG query method
-        result = rag.query(message.message, n_results=5, verbose=False)
-        response_text = result.get('answer', 'I apologize, but I encountered an error.')
+        if not fast_path:
+            # Get AI response without blocking the event loop
+            result = await rag.aquery(
+                message.message,
+                n_results=5,
+                history_loader=lambda: memory_manager.get_conversation_history(
+                    message.user_id, limit=CONTEXT_WINDOW_MESSAGES
+                )
+            )
+        
+        if emergency:
+            response_text = emergency_response(EMERGENCY_PHONE_NUMBER)
+        else:
+            response_text = result.get('answer', 'I apologize, but I encountered an error.')
         
         # Save assistant response
         memory_manager.save_conversation(
@@ -759,13 +910,25 @@ async def chat_with_ai(message: ChatMessage):
             message=response_text
         )
         
+        if decision is not None:
+            intent_router.record(decision, (time.perf_counter() - started) * 1000)
+        
+        data = {
+            "answer": response_text,
+            "citations": result.get('citations', []),
+            "intent": "emergency" if emergency else (decision['intent'] if decision else "medical"),
+            "timestamp": datetime.now().isoformat()
+        }
+        if result.get('booking'):
+            data["booking"] = result['booking']
+        if result.get('degraded'):
+            data["degraded"] = True
+        if emergency:
+            data["emergency"] = {"phrases": emergency['phrases'], "match_us": round(emergency['match_us'], 1)}
+        
         return {
             "success": True,
-            "data": {
-                "answer": response_text,
-                "citations": result.get('citations', []),
-                "timestamp": datetime.now().isoformat()
-            }
+            "data": data
         }
     except HTTPException:
         raise
@@ -1588,7 +1751,7 @@ async def websocket_chat(websocket: WebSocket, user_id: int):
     await websocket.accept()
     
     try:
-        rag = get_rag_engine()
+        rag = await asyncio.to_thread(get_rag_engine)
         
         if not rag:
             await websocket.send_json({
@@ -1607,6 +1770,53 @@ async def websocket_chat(websocket: WebSocket, user_id: int):
             if not user_message:
                 continue
             
+            started = time.perf_counter()
+            
+            # Active stroke emergencies: the emergency reply goes out before any network call
+            emergency = emergency_detector.detect(user_message) if emergency_detector else None
+            emergency_text = emergency_response(EMERGENCY_PHONE_NUMBER) if emergency else None
+            if emergency:
+                await websocket.send_json({
+                    "type": "emergency",
+                    "content": emergency_text,
+                    "phrases": emergency['phrases'],
+                    "match_us": round(emergency['match_us'], 1),
+                    "timestamp": datetime.now().isoformat()
+                })
+                if not EMERGENCY_CONTINUE_WITH_RAG:
+                    for role, text in (("user", user_message), ("assistant", emergency_text)):
+                        memory_manager.save_conversation(user_id=user_id, role=role, message=text)
+                    await websocket.send_json({
+                        "type": "final",
+                        "content": emergency_text,
+                        "citations": [],
+                        "intent": "emergency",
+                        "ttft_ms": round((time.perf_counter() - started) * 1000, 1),
+                        "timestamp": datetime.now().isoformat()
+                    })
+                    continue
+            
+            decision = intent_router.route(user_message) if intent_router and not emergency else None
+            if decision is not None and decision['intent'] != 'medical':
+                # Small talk and booking requests: one final frame, no retrieval
+                result = await asyncio.to_thread(answer_fast_path, decision, user_id, user_message)
+                for role, text in (("user", user_message), ("assistant", result['answer'])):
+                    memory_manager.save_conversation(user_id=user_id, role=role, message=text)
+                intent_router.record(decision, (time.perf_counter() - started) * 1000)
+                
+                frame = {
+                    "type": "final",
+                    "content": result['answer'],
+                    "citations": [],
+                    "intent": decision['intent'],
+                    "ttft_ms": round((time.perf_counter() - started) * 1000, 1),
+                    "timestamp": datetime.now().isoformat()
+                }
+                if result.get('booking'):
+                    frame["booking"] = result['booking']
+                await websocket.send_json(frame)
+                continue
+            
             # Save user message
             memory_manager.save_conversation(
                 user_id=user_id,
@@ -1614,21 +1824,50 @@ async def websocket_chat(websocket: WebSocket, user_id: int):
                 message=user_message
             )
             
-            # Get AI response using RAG query method
-            result = rag.query(user_message, n_results=5, verbose=False)
+            # Stream the AI response: incremental delta frames, then one final frame
+            ttft_ms = None
+            result = {}
+            
+            async for event in rag.astream_query(
+                user_message,
+                n_results=5,
+                history_loader=lambda: memory_manager.get_conversation_history(
+                    user_id, limit=CONTEXT_WINDOW_MESSAGES
+                )
+            ):
+                if ttft_ms is None:
+                    ttft_ms = (time.perf_counter() - started) * 1000
+                
+                if event['type'] == 'delta':
+                    await websocket.send_json({
+                        "type": "delta",
+                        "content": event['content']
+                    })
+                else:
+                    result = event
+            
             response_text = result.get('answer', 'I apologize, but I encountered an error.')
+            total_ms = (time.perf_counter() - started) * 1000
+            print(f"💬 ws chat user={user_id} ttft={ttft_ms:.0f}ms total={total_ms:.0f}ms"
+                  f"{' (cached)' if result.get('cached') else ''}")
+            if decision is not None:
+                intent_router.record(decision, total_ms)
             
-            # Save assistant response
+            # Save assistant response (after the emergency reply it followed, if any)
             memory_manager.save_conversation(
                 user_id=user_id,
                 role="assistant",
-                message=response_text
+                message=f"{emergency_text}\n\n{response_text}" if emergency else response_text
             )
             
-            # Send response back to client
+            # Final frame with the assembled answer and citations
             await websocket.send_json({
+                "type": "final",
                 "content": response_text,
                 "citations": result.get('citations', []),
+                "intent": "emergency" if emergency else "medical",
+                "degraded": bool(result.get('degraded')),
+                "ttft_ms": round(ttft_ms, 1),
                 "timestamp": datetime.now().isoformat()
             })
             
@@ -1680,9 +1919,8 @@ async def admin_login(credentials: AdminLogin):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-# Create uploads directory if it doesn't exist
+# Uploaded documents (the directory is created by the first upload)
 UPLOAD_DIR = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) / "data" / "uploaded_docs"
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 # Metadata storage for uploaded documents
 DOCS_METADATA_FILE = UPLOAD_DIR / "metadata.json"
@@ -1699,6 +1937,20 @@ def save_docs_metadata(metadata):
     with open(DOCS_METADATA_FILE, 'w') as f:
         json.dump(metadata, f, indent=2)
 
+# Ingestion workers and request handlers both rewrite metadata.json
+docs_metadata_lock = threading.Lock()
+
+def update_doc_metadata(doc_id, **fields):
+    """Update one document's metadata entry in place; returns False if it no longer exists"""
+    with docs_metadata_lock:
+        metadata = load_docs_metadata()
+        for m in metadata:
+            if m['id'] == doc_id:
+                m.update(fields)
+                save_docs_metadata(metadata)
+                return True
+        return False
+
 @app.get("/api/v1/admin/documents")
 async def get_uploaded_documents():
     """Get list of all uploaded documents"""
@@ -1722,7 +1974,7 @@ async def upload_documents(files: List[UploadFile] = File(...)):
             raise HTTPException(status_code=400, detail="No files provided")
         
         uploaded_docs = []
-        metadata = load_docs_metadata()
+        UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
         
         for file in files:
             # Validate file type
@@ -1754,25 +2006,33 @@ async def upload_documents(files: List[UploadFile] = File(...)):
                 "file_path": str(file_path)
             }
             
-            metadata.append(doc_metadata)
             uploaded_docs.append(doc_metadata)
         
-        # Save metadata
-        save_docs_metadata(metadata)
+        # Save metadata before queueing, so a job that finishes right away
+        # finds its entry (otherwise it takes the document for deleted)
+        with docs_metadata_lock:
+            metadata = load_docs_metadata()
+            metadata.extend(uploaded_docs)
+            save_docs_metadata(metadata)
         
-        # Process documents in background (simplified - in production use celery/background tasks)
-        try:
-            await process_documents_for_rag(uploaded_docs)
-        except Exception as e:
-            print(f"Background processing error: {e}")
+        # Queue indexing jobs; workers extract, chunk and embed in the background
+        queue = get_ingestion_queue()
+        for doc in uploaded_docs:
+            try:
+                doc['job_id'] = queue.enqueue(doc['id'], doc)
+            except Exception:
+                update_doc_metadata(doc['id'], status='error')
+                raise
+            update_doc_metadata(doc['id'], job_id=doc['job_id'])
         
         return {
             "success": True,
             "data": {
                 "uploaded": len(uploaded_docs),
-                "documents": uploaded_docs
+                "documents": uploaded_docs,
+                "jobs": [doc['job_id'] for doc in uploaded_docs]
             },
-            "message": f"Successfully uploaded {len(uploaded_docs)} document(s)"
+            "message": f"Successfully uploaded {len(uploaded_docs)} document(s); indexing queued"
         }
     except HTTPException:
         raise
@@ -1780,115 +2040,239 @@ async def upload_documents(files: List[UploadFile] = File(...)):
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 
-async def process_documents_for_rag(docs):
-    """Process uploaded documents and add to RAG vector database"""
+def ingest_document_job(job, progress):
+    """Ingestion queue handler: index one uploaded document into the RAG vector database"""
+    from utils.document_processor import DocumentProcessor
+    
+    doc = job['payload']
+    print(f"\n📄 Processing document: {doc['filename']} (job {job['job_id'][:8]})")
+    
     try:
-        from utils.document_processor import DocumentProcessor
-        import traceback
-        import time
-        
         rag = get_rag_engine()
         if not rag:
-            print("⚠️  Warning: RAG engine not available")
-            return
-        
-        processor = DocumentProcessor(chunk_size=500, chunk_overlap=50)
-        metadata = load_docs_metadata()
-        
-        for doc in docs:
-            try:
-                file_path = doc['file_path']
-                print(f"\n📄 Processing document: {doc['filename']}")
-                
-                # Process document (works for PDF, TXT, MD)
-                chunks = processor.process_document(
-                    filepath=file_path,
-                    doc_type=doc['doc_type'],
-                    author="Admin Upload",
-                    url=""
-                )
-                
-                if chunks:
-                    print(f"  ✓ Created {len(chunks)} chunks")
-                    
-                    # Update chunk IDs to include timestamp to avoid conflicts
-                    timestamp = str(int(time.time()))
-                    for i, chunk in enumerate(chunks):
-                        chunk['metadata']['chunk_id'] = f"{doc['id']}_{timestamp}_{i}"
-                        chunk['id'] = f"{doc['id']}_{timestamp}_{i}"
-                    
-                    # Add to RAG engine
-                    rag.add_documents(chunks)
-                    print(f"  ✓ Added to RAG vector database")
-                    
-                    # Verify it was added
-                    rag_stats = rag.get_stats()
-                    print(f"  ℹ️  Total chunks in database: {rag_stats['total_documents']}")
-                    
-                    # Update status in metadata
-                    for m in metadata:
-                        if m['id'] == doc['id']:
-                            m['status'] = 'indexed'
-                            m['chunks_count'] = len(chunks)
-                            print(f"  ✓ Status updated to 'indexed'")
-                            break
-                else:
-                    print(f"  ✗ No chunks created")
-                    # Mark as error
-                    for m in metadata:
-                        if m['id'] == doc['id']:
-                            m['status'] = 'error'
-                            break
-                            
-            except Exception as e:
-                print(f"❌ Error processing {doc['filename']}: {e}")
-                traceback.print_exc()
-                # Mark as error
-                for m in metadata:
-                    if m['id'] == doc['id']:
-                        m['status'] = 'error'
-                        break
-        
-        # Save updated metadata
-        save_docs_metadata(metadata)
-        print("✅ Metadata saved")
-        
+            raise RuntimeError("RAG engine not available")
+        
+        from config import CHUNK_SIZE, CHUNK_OVERLAP, DOCUMENT_WORKERS
+        processor = DocumentProcessor(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP, workers=DOCUMENT_WORKERS)
+        
+        # Process and upsert the document (works for PDF, TXT, MD);
+        # chunk ids are derived from its content, so re-processing is idempotent
+        result = rag.index_document(
+            doc['id'],
+            doc['file_path'],
+            processor,
+            progress=progress,
+            doc_type=doc['doc_type'],
+            author="Admin Upload",
+            url=""
+        )
+        if not result['chunks']:
+            raise ValueError("No chunks created")
+        
+        print(f"  ✓ {result['chunks']} chunks ({result['written']} written, "
+              f"{result.get('deduplicated', 0)} near-duplicates, {result['status']})")
+        print(f"  ℹ️  Total chunks in database: {rag.get_stats()['total_documents']}")
+    except Exception:
+        update_doc_metadata(doc['id'], status='error')
+        raise
+    
+    if not update_doc_metadata(doc['id'], status='indexed', chunks_count=result['chunks']):
+        # Deleted while it was being indexed
+        rag.remove_document(doc['id'])
+        print(f"  🗑️  {doc['filename']} was deleted during indexing; chunks removed")
+    return result
+
+
+# Ingestion queue (started on app startup; persistent across restarts)
+ingestion_queue = None
+ingestion_queue_lock = threading.Lock()
+
+def get_ingestion_queue():
+    global ingestion_queue
+    with ingestion_queue_lock:
+        if ingestion_queue is None:
+            from config import INGESTION_DB_PATH, INGESTION_WORKERS
+            ensure_directories()
+            ingestion_queue = IngestionQueue(INGESTION_DB_PATH, ingest_document_job, workers=INGESTION_WORKERS)
+            ingestion_queue.start()
+    return ingestion_queue
+
+
+@app.on_event("startup")
+async def create_data_directories():
+    """Create the data directories before anything writes to them"""
+    ensure_directories()
+
+
+@app.on_event("startup")
+async def start_ingestion_queue():
+    """Resume ingestion jobs left queued or interrupted by the last shutdown"""
+    get_ingestion_queue()
+
+
+@app.on_event("startup")
+async def start_rag_warmup():
+    """Warm the RAG engine in the background so startup isn't held up"""
+    if RAG_WARMUP_ENABLED:
+        threading.Thread(target=warm_up_rag_engine, name="rag-warmup", daemon=True).start()
+
+
+@app.on_event("shutdown")
+async def stop_ingestion_queue():
+    if ingestion_queue is not None:
+        ingestion_queue.stop()
+
+
+@app.get("/api/v1/admin/jobs/{job_id}")
+async def get_ingestion_job(job_id: str):
+    """Get an ingestion job's state and progress"""
+    job = get_ingestion_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {
+        "success": True,
+        "data": job
+    }
+
+
+@app.get("/api/v1/admin/jobs")
+async def list_ingestion_jobs(limit: int = 50):
+    """List recent ingestion jobs"""
+    return {
+        "success": True,
+        "data": {
+            "jobs": get_ingestion_queue().list_jobs(limit)
+        }
+    }
+
+
+# Blue/green index rebuild (one at a time; chat keeps using the serving version)
+index_rebuild = {"status": "idle"}
+index_rebuild_lock = threading.Lock()
+
+class IndexRebuild(BaseModel):
+    shadow: bool = False  # Compare the new version on live chat queries instead of switching to it
+    drop_previous: bool = False  # Delete the replaced version after switching
+
+def index_processor():
+    from utils.document_processor import DocumentProcessor
+    from config import CHUNK_SIZE, CHUNK_OVERLAP, DOCUMENT_WORKERS
+    return DocumentProcessor(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP, workers=DOCUMENT_WORKERS)
+
+def rebuild_index_job(rag, options: IndexRebuild):
+    """Re-embed every document into a new index version with the configured settings"""
+    from config import REINDEX_REQUESTS_PER_MINUTE
+    
+    started = time.perf_counter()
+    try:
+        result = rag.rebuild_index(index_processor(), shadow=options.shadow,
+                                   requests_per_minute=REINDEX_REQUESTS_PER_MINUTE,
+                                   drop_previous=options.drop_previous)
+        state = {"status": result.pop("status"), **result}
     except Exception as e:
-        print(f"❌ RAG processing error: {e}")
-        import traceback
-        traceback.print_exc()
+        print(f"❌ Index rebuild failed: {e}")
+        state = {"status": "failed", "error": str(e)}
+    with index_rebuild_lock:
+        index_rebuild.clear()
+        index_rebuild.update(state, seconds=round(time.perf_counter() - started, 1))
+
+
+@app.get("/api/v1/admin/index")
+async def get_index_status():
+    """Serving index version, configured settings, rebuild progress and shadow comparison"""
+    rag = await asyncio.to_thread(get_rag_engine)
+    if not rag:
+        raise HTTPException(status_code=503, detail="RAG engine not available")
+    with index_rebuild_lock:
+        rebuild = dict(index_rebuild)
+    return {
+        "success": True,
+        "data": {
+            "active": await asyncio.to_thread(rag.active.describe),
+            "configured_settings": rag.configured_settings,
+            "rebuild": rebuild,
+            "shadow": rag.shadow_report or None
+        }
+    }
+
+
+@app.post("/api/v1/admin/index/rebuild")
+async def rebuild_index(options: IndexRebuild = IndexRebuild()):
+    """Start re-embedding every document into a new index version in the background"""
+    rag = await asyncio.to_thread(get_rag_engine)
+    if not rag:
+        raise HTTPException(status_code=503, detail="RAG engine not available")
+    with index_rebuild_lock:
+        if index_rebuild["status"] == "building":
+            raise HTTPException(status_code=409, detail="An index rebuild is already running")
+        index_rebuild.clear()
+        index_rebuild.update(status="building", shadow=options.shadow)
+    threading.Thread(target=rebuild_index_job, args=(rag, options), name="index-rebuild", daemon=True).start()
+    return {
+        "success": True,
+        "message": "Index rebuild started; chat keeps using the current index until it finishes"
+    }
+
+
+@app.post("/api/v1/admin/index/activate")
+async def activate_shadow_index():
+    """Switch chat to the index version being shadowed"""
+    rag = await asyncio.to_thread(get_rag_engine)
+    if not rag:
+        raise HTTPException(status_code=503, detail="RAG engine not available")
+    version = rag.shadow
+    if version is None:
+        raise HTTPException(status_code=409, detail="No index version is being shadowed")
+    try:
+        previous = await asyncio.to_thread(rag.activate_version, version, index_processor())
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    with index_rebuild_lock:
+        index_rebuild.update(status="active")
+    return {
+        "success": True,
+        "data": {
+            "active": version.name,
+            "previous": previous.name
+        }
+    }
 
 
 @app.delete("/api/v1/admin/documents/{doc_id}")
 async def delete_document(doc_id: str):
-    """Delete an uploaded document"""
+    """Delete an uploaded document and its chunks in the vector database"""
     try:
-        metadata = load_docs_metadata()
-        
-        # Find and remove document
-        doc_found = False
-        updated_metadata = []
-        
-        for doc in metadata:
-            if doc['id'] == doc_id:
-                doc_found = True
-                # Delete physical file
-                try:
-                    if os.path.exists(doc['file_path']):
-                        os.remove(doc['file_path'])
-                except Exception as e:
-                    print(f"Error deleting file: {e}")
-            else:
-                updated_metadata.append(doc)
+        with docs_metadata_lock:
+            metadata = load_docs_metadata()
+            doc = next((m for m in metadata if m['id'] == doc_id), None)
+            if doc is None:
+                raise HTTPException(status_code=404, detail="Document not found")
+            
+            # Drop the entry first: a job still indexing it then removes its own chunks
+            save_docs_metadata([m for m in metadata if m['id'] != doc_id])
         
-        if not doc_found:
-            raise HTTPException(status_code=404, detail="Document not found")
+        # Delete its chunks so deleted content stops being retrieved; this
+        # waits for any ingestion holding the index, so not on the event loop
+        chunks_deleted = 0
+        rag = await asyncio.to_thread(get_rag_engine)
+        if rag:
+            chunks_deleted = await asyncio.to_thread(
+                rag.remove_document, doc_id, source=Path(doc['file_path']).stem
+            )
+            print(f"🗑️  Deleted {chunks_deleted} chunks of {doc['filename']}")
         
-        # Save updated metadata
-        save_docs_metadata(updated_metadata)
+        # Delete physical file
+        try:
+            if os.path.exists(doc['file_path']):
+                os.remove(doc['file_path'])
+        except Exception as e:
+            print(f"Error deleting file: {e}")
         
         return {
             "success": True,
+            "data": {
+                "chunks_deleted": chunks_deleted
+            },
             "message": "Document deleted successfully"
         }
     except HTTPException:
@@ -1897,11 +2281,31 @@ async def delete_document(doc_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/v1/admin/index/compact")
+async def compact_index():
+    """Drop orphaned chunks and rebuild the vector and lexical indexes"""
+    try:
+        rag = await asyncio.to_thread(get_rag_engine)
+        if not rag:
+            raise HTTPException(status_code=503, detail="RAG engine not available")
+        
+        result = await asyncio.to_thread(rag.compact)
+        return {
+            "success": True,
+            "data": result,
+            "message": f"Reclaimed {result['bytes_reclaimed']} bytes"
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/api/v1/admin/stats")
 async def get_admin_stats():
     """Get RAG system statistics"""
     try:
-        rag = get_rag_engine()
+        rag = await asyncio.to_thread(get_rag_engine)
         metadata = load_docs_metadata()
         
         stats = {
@@ -1914,6 +2318,13 @@ async def get_admin_stats():
             rag_stats = rag.get_stats()
             stats["total_chunks"] = rag_stats.get('total_documents', 0)
             stats["collection_name"] = rag_stats.get('collection_name', '')
+            stats["chat_stages"] = rag_stats.get('stages', {})
+        
+        if intent_router:
+            stats["intent_router"] = intent_router.stats()
+        if emergency_detector:
+            stats["emergency_detector"] = emergency_detector.stats()
+        stats["rate_limiter"] = gemini_rate_limiter().stats()
         
         return {
             "success": True,
@@ -1960,6 +2371,24 @@ async def health_check():
         raise HTTPException(status_code=503, detail=f"Service unhealthy: {str(e)}")
 
 
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness probe: 200 once every chat component is warm, 503 until then"""
+    with warmup_lock:
+        components = {component: dict(state) for component, state in warmup_status.items()}
+    
+    # Without warm-up the engine is built by the first chat request, so never hold traffic back
+    ready = not RAG_WARMUP_ENABLED or all(state["status"] == "warm" for state in components.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "components": components,
+            "timestamp": datetime.now().isoformat()
+        }
+    )
+
+
 # ============================================
 # RUN SERVER
 # ============================================
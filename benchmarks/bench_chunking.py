@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Chunker microbenchmark: the boundary-aware chunker against the previous
+rfind-per-window implementation.
+
+Runs both on every document in data/medical_docs and on a ~10 MB synthetic
+document, and reports throughput, chunk counts and sizes, and how much of
+the text ends up in no chunk at all (the old chunker could skip text when
+it broke at a sentence end close to the start of its window).
+
+Usage:
+    python benchmarks/bench_chunking.py [--docs data/medical_docs] [--synthetic-mb 10]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import CHUNK_OVERLAP, CHUNK_SIZE, MEDICAL_DOCS_DIR
+from benchmarks.fixtures import sentences
+from utils.document_processor import DocumentProcessor
+
+
+def legacy_chunk_text(text: str, chunk_size: int, chunk_overlap: int) -> List[Dict]:
+    """The chunker as it was before the boundary-aware rewrite (for comparison)."""
+    chunks = []
+    start = 0
+    chunk_id = 0
+    text = text.replace('\n\n\n', '\n\n').strip()
+    while start < len(text):
+        end = start + chunk_size
+        if end < len(text):
+            for delimiter in ['. ', '.\n', '! ', '?\n', '? ']:
+                last_delimiter = text.rfind(delimiter, start, end)
+                if last_delimiter != -1:
+                    end = last_delimiter + 1
+                    break
+        chunk_text = text[start:end].strip()
+        if chunk_text:
+            chunks.append({'text': chunk_text, 'start_char': start, 'end_char': end, 'chunk_index': chunk_id})
+            chunk_id += 1
+        new_start = end - chunk_overlap
+        if new_start <= start:
+            new_start = start + max(1, chunk_size - chunk_overlap)
+        start = new_start
+    return chunks
+
+
+def uncovered_chars(text: str, chunks: List[Dict]) -> int:
+    """Non-whitespace characters of the cleaned text that are in no chunk."""
+    text = text.replace('\n\n\n', '\n\n').strip()
+    missed, covered = 0, 0
+    for chunk in chunks:
+        if chunk['start_char'] > covered:
+            missed += len(''.join(text[covered:chunk['start_char']].split()))
+        covered = max(covered, chunk['end_char'])
+    return missed + len(''.join(text[covered:].split()))
+
+
+def measure(name: str, chunker, text: str, repeats: int) -> Dict:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        chunks = chunker(text)
+        timings.append(time.perf_counter() - start)
+    sizes = [len(chunk['text']) for chunk in chunks]
+    best = min(timings)
+    return {
+        'chunker': name,
+        'seconds': round(best, 4),
+        'mb_per_second': round(len(text) / 1e6 / best, 1),
+        'chunks': len(chunks),
+        'mean_chunk_chars': round(statistics.mean(sizes), 1) if sizes else 0,
+        'min_chunk_chars': min(sizes, default=0),
+        'uncovered_chars': uncovered_chars(text, chunks)
+    }
+
+
+def synthetic_document(megabytes: int) -> str:
+    paragraphs = ["\n".join(" ".join(sentences(4, seed=i * 3 + line)) for line in range(3)) for i in range(300)]
+    block = "\n\n".join(paragraphs) + "\n\n"
+    return block * (megabytes * 1024 * 1024 // len(block) + 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=Path, default=MEDICAL_DOCS_DIR)
+    parser.add_argument("--synthetic-mb", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    processor = DocumentProcessor(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    chunkers = {
+        'legacy': lambda text: legacy_chunk_text(text, CHUNK_SIZE, CHUNK_OVERLAP),
+        'boundary': lambda text: list(processor.iter_chunks([text]))
+    }
+
+    documents = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        files = processor.find_documents(str(args.docs))
+        for filepath, text in zip(files, processor.load_documents(files)):
+            if isinstance(text, str):
+                documents[filepath.name] = text
+    documents[f"synthetic_{args.synthetic_mb}mb"] = synthetic_document(args.synthetic_mb)
+
+    report = []
+    for name, text in documents.items():
+        for chunker_name, chunker in chunkers.items():
+            row = {'document': name, 'chars': len(text), **measure(chunker_name, chunker, text, args.repeats)}
+            report.append(row)
+            print(f"  {name:>24} {chunker_name:>8}: {row['seconds'] * 1000:9.2f} ms "
+                  f"({row['mb_per_second']:6.1f} MB/s)  {row['chunks']:6} chunks, "
+                  f"mean {row['mean_chunk_chars']:6.1f} chars, {row['uncovered_chars']} chars uncovered")
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Context selection benchmark: prompt tokens and redundancy of the raw top-k
+against MMR + merging + token-budget packing, on our own collection.
+
+Works on a temporary copy of the vector database. Every stored chunk serves
+as a query: its stored embedding is the query embedding (so no API calls are
+made) and its first words are the lexical query. Redundancy is the mean
+share of a passage's word 3-grams repeated in another passage of the same
+context. Coverage counts how many of the raw top-k chunks are still in the
+context, either themselves or through a passage repeating most of their text.
+
+Usage:
+    python benchmarks/bench_context.py [--db data/vector_db] [--k 5] [--budget 700]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import shutil
+import statistics
+import sys
+import tempfile
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import CHROMA_COLLECTION_NAME, MMR_LAMBDA, RETRIEVAL_CANDIDATES, VECTOR_DB_DIR
+from modules.rag_engine import RAGEngine
+from utils.context_selection import estimate_tokens, shingle_containment
+
+# Share of a raw chunk's 3-grams a context passage must repeat to cover it
+COVERED_OVERLAP = 0.5
+
+
+def redundancy(texts) -> float:
+    """Mean overlap of each passage with its most overlapping other passage."""
+    if len(texts) < 2:
+        return 0.0
+    return float(shingle_containment(texts).max(axis=1).mean())
+
+
+def covered(raw, selected) -> float:
+    """Share of the raw passages present in the selected context."""
+    if not raw:
+        return 1.0
+    kept_ids = {chunk_id for passage in selected for chunk_id in passage.get('ids', [passage['id']])}
+    hits = 0
+    for passage in raw:
+        overlap = shingle_containment([passage['text']] + [p['text'] for p in selected])[0, 1:]
+        hits += passage['id'] in kept_ids or bool(len(overlap) and overlap.max() >= COVERED_OVERLAP)
+    return hits / len(raw)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", type=Path, default=VECTOR_DB_DIR)
+    parser.add_argument("--collection", default=CHROMA_COLLECTION_NAME)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--budget", type=int, default=700)
+    parser.add_argument("--lambda", dest="mmr_lambda", type=float, default=MMR_LAMBDA)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Path(tmp) / "vector_db"
+        shutil.copytree(args.db, db)
+        with contextlib.redirect_stdout(io.StringIO()):
+            rag = RAGEngine(args.collection, str(db), "offline", "gemini-2.5-flash",
+                            retrieval_candidates=RETRIEVAL_CANDIDATES, mmr_lambda=args.mmr_lambda,
+                            context_token_budget=args.budget)
+        stored = rag.collection.get()
+        vectors = rag.collection.embeddings(stored['ids'])
+        print(f"📊 {len(stored['ids'])} chunks from {args.db}")
+
+        rows = {'raw': [], 'selected': []}
+        coverage = []
+        for i, text in enumerate(stored['documents']):
+            query = " ".join(text.split()[:12])
+            embedding = vectors[i].tolist()
+            with contextlib.redirect_stdout(io.StringIO()):
+                raw = rag.search(query, args.k, query_embedding=embedding)
+                selected = rag.retrieve(query, args.k, query_embedding=embedding)
+
+            for name, passages in (('raw', raw), ('selected', selected)):
+                rows[name].append({
+                    'tokens': sum(estimate_tokens(p['text']) for p in passages),
+                    'passages': len(passages),
+                    'redundancy': redundancy([p['text'] for p in passages])
+                })
+            coverage.append(covered(raw, selected))
+
+    report = {'queries': len(coverage), 'k': args.k, 'budget': args.budget, 'lambda': args.mmr_lambda}
+    for name, results in rows.items():
+        report[name] = {
+            'mean_tokens': round(statistics.mean(r['tokens'] for r in results), 1),
+            'max_tokens': max(r['tokens'] for r in results),
+            'mean_passages': round(statistics.mean(r['passages'] for r in results), 2),
+            'mean_redundancy': round(statistics.mean(r['redundancy'] for r in results), 3)
+        }
+    report['raw_top_k_coverage'] = round(statistics.mean(coverage), 3)
+    report['token_reduction'] = round(1 - report['selected']['mean_tokens'] / report['raw']['mean_tokens'], 3)
+
+    print(f"  raw top-{args.k}: {report['raw']['mean_tokens']:.0f} tokens, "
+          f"redundancy {report['raw']['mean_redundancy']:.3f}")
+    print(f"  selected:   {report['selected']['mean_tokens']:.0f} tokens, "
+          f"redundancy {report['selected']['mean_redundancy']:.3f}, "
+          f"raw top-{args.k} coverage {report['raw_top_k_coverage']:.1%}")
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
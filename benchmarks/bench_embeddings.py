@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Embedding throughput benchmark.
+
+Compares the old one-request-per-text behaviour against batched, concurrent
+requests using a local stand-in provider (no network or API key required).
+
+Usage:
+    python benchmarks/bench_embeddings.py [--texts 53] [--latency 0.05]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.providers import LocalEmbeddingClient
+from utils.embeddings import EmbeddingGenerator
+
+
+def sequential_baseline(generator: EmbeddingGenerator, texts):
+    """One request per text with the old 0.1s pause between texts."""
+    start = time.perf_counter()
+    for i, text in enumerate(texts):
+        generator.generate_embedding(text)
+        if i < len(texts) - 1:
+            time.sleep(0.1)
+    elapsed = time.perf_counter() - start
+    return {'seconds': elapsed, 'texts_per_second': len(texts) / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--texts', type=int, default=53, help='Number of chunks to embed')
+    parser.add_argument('--latency', type=float, default=0.05, help='Simulated request latency (s)')
+    parser.add_argument('--failure-rate', type=float, default=0.05, help='Simulated request failure rate')
+    args = parser.parse_args()
+    
+    texts = [f"Stroke education chunk {i}: " + "risk factors and warning signs. " * 10
+             for i in range(args.texts)]
+    report = {'texts': args.texts, 'latency': args.latency}
+    
+    client = LocalEmbeddingClient(request_latency=args.latency)
+    generator = EmbeddingGenerator(api_key=None, client=client)
+    report['sequential'] = sequential_baseline(generator, texts)
+    
+    for batch_size, concurrency in [(100, 1), (20, 4), (10, 8)]:
+        client = LocalEmbeddingClient(request_latency=args.latency, failure_rate=args.failure_rate)
+        generator = EmbeddingGenerator(api_key=None, batch_size=batch_size,
+                                       max_concurrency=concurrency, client=client)
+        generator.generate_batch(texts)
+        stats = dict(generator.last_batch_stats)
+        stats['provider_requests'] = client.requests
+        report[f'batch{batch_size}_x{concurrency}'] = stats
+    
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Extraction scaling benchmark: wall time of DocumentProcessor.process_directory
+as the number of worker processes grows.
+
+Builds a synthetic corpus (several multi-page PDFs, one large enough to be
+split into page ranges, plus text files) and processes it with 1, 2, 4, ...
+workers up to the machine's core count. Every run must produce the same
+chunks as the single-process baseline.
+
+Usage:
+    python benchmarks/bench_extraction.py [--pdfs 6] [--pages 24] [--repeats 2] [--max-workers N]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.document_processor import DocumentProcessor, PDF_PAGES_PER_TASK
+from benchmarks.fixtures import sentences, write_guideline_pdf
+
+
+def build_corpus(directory: Path, pdfs: int, pages: int):
+    for i in range(pdfs):
+        write_guideline_pdf(directory / f"guideline_{i}.pdf", pages, seed=i)
+    # One long PDF that is split across workers by page range
+    write_guideline_pdf(directory / "long_guideline.pdf", 4 * PDF_PAGES_PER_TASK, seed=pdfs)
+    for i in range(pdfs):
+        (directory / f"notes_{i}.txt").write_text(" ".join(sentences(2000, seed=100 + i)))
+
+
+def worker_counts(limit: int) -> list:
+    counts, workers = [], 1
+    while workers < limit:
+        counts.append(workers)
+        workers *= 2
+    return counts + [limit]
+
+
+def run(directory: Path, workers: int) -> tuple:
+    processor = DocumentProcessor(chunk_size=500, chunk_overlap=50, workers=workers)
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        chunks = processor.process_directory(str(directory))
+        elapsed = time.perf_counter() - start
+    return elapsed, [chunk['id'] for chunk in chunks]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdfs", type=int, default=6)
+    parser.add_argument("--pages", type=int, default=24)
+    parser.add_argument("--repeats", type=int, default=2)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = Path(tmp)
+        build_corpus(corpus, args.pdfs, args.pages)
+        corpus_bytes = sum(path.stat().st_size for path in corpus.iterdir())
+        print(f"📚 Corpus: {len(list(corpus.iterdir()))} files, {corpus_bytes / 1e6:.1f} MB, "
+              f"{os.cpu_count()} core(s)")
+
+        report, baseline_ids = [], None
+        for workers in worker_counts(args.max_workers):
+            best, ids = min(run(corpus, workers) for _ in range(args.repeats))
+            if baseline_ids is None:
+                baseline_ids = ids
+            assert ids == baseline_ids, f"workers={workers} changed the output"
+            report.append({'workers': workers, 'seconds': round(best, 3), 'chunks': len(ids)})
+
+    for row in report:
+        row['speedup'] = round(report[0]['seconds'] / row['seconds'], 2)
+        print(f"  {row['workers']:>3} worker(s): {row['seconds']:7.2f}s  ({row['speedup']:.2f}x)")
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Quantization benchmark: memory footprint and recall@k of reduced-precision
+and truncated local indexes on our own corpus.
+
+Reads the real chunk embeddings out of the Chroma collection, builds a local
+index for each (precision, dimensions, rescore) combination, and uses every
+stored chunk as a query. Recall@k is measured against exact float32 top-k
+over the full 3072-dimensional vectors.
+
+Usage:
+    python benchmarks/bench_quantization.py [--db data/vector_db] [--k 5]
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import chromadb
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import CHROMA_COLLECTION_NAME, VECTOR_DB_DIR
+from modules.rag_engine import LocalVectorStore, normalize_rows
+
+PRECISIONS = ("float32", "float16", "int8")
+DIMENSIONS = (None, 768, 256)
+
+
+def load_corpus(db_path: Path, collection_name: str) -> np.ndarray:
+    collection = chromadb.PersistentClient(path=str(db_path)).get_collection(collection_name)
+    embeddings = collection.get(include=['embeddings'])['embeddings']
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+def exact_top_k(vectors: np.ndarray, k: int) -> np.ndarray:
+    unit = normalize_rows(vectors)
+    return np.argsort(-(unit @ unit.T), axis=1)[:, :k]
+
+
+def evaluate(directory: Path, vectors: np.ndarray, truth: np.ndarray, k: int,
+             precision: str, dimensions, rescore: bool) -> dict:
+    ids = [f"chunk_{i}" for i in range(len(vectors))]
+    store = LocalVectorStore(directory, "bench_collection", precision=precision,
+                             dimensions=dimensions, rescore=rescore)
+    store.add(ids=ids, embeddings=vectors.tolist(), documents=[""] * len(ids),
+              metadatas=[{}] * len(ids))
+
+    results = store.query(vectors.tolist(), k)['ids']
+    hits = sum(len({int(i.split('_')[1]) for i in found} & set(expected.tolist()))
+               for found, expected in zip(results, truth))
+    stats = store.stats()
+    return {
+        'precision': precision,
+        'dimensions': stats['dimensions'],
+        'rescore': rescore,
+        'search_bytes': stats['search_bytes'],
+        'rescore_bytes': stats['rescore_bytes'],
+        f'recall@{k}': hits / (len(vectors) * k)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", type=Path, default=VECTOR_DB_DIR)
+    parser.add_argument("--collection", default=CHROMA_COLLECTION_NAME)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    vectors = load_corpus(args.db, args.collection)
+    truth = exact_top_k(vectors, args.k)
+    print(f"📊 {len(vectors)} chunks x {vectors.shape[1]} dims from {args.db}")
+
+    report = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for precision in PRECISIONS:
+            for dimensions in DIMENSIONS:
+                for rescore in (False, True):
+                    if precision == "float32" and dimensions is None and rescore:
+                        continue  # identical to the baseline
+                    name = f"{precision}_{dimensions or 'full'}_{'rescore' if rescore else 'plain'}"
+                    report.append(evaluate(Path(tmp) / name, vectors, truth, args.k,
+                                           precision, dimensions, rescore))
+
+    baseline = report[0]
+    recall_key = f'recall@{args.k}'
+    for row in report:
+        row['memory_ratio'] = row['search_bytes'] / baseline['search_bytes']
+        row['recall_delta'] = row[recall_key] - baseline[recall_key]
+        print(f"  {row['precision']:>7} {row['dimensions']:>5}d {'rescore' if row['rescore'] else '       '}  "
+              f"{row['search_bytes'] / 1024:8.1f} KiB ({row['memory_ratio']:.3f}x)  "
+              f"{recall_key}={row[recall_key]:.3f} (Δ {row['recall_delta']:+.3f})")
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
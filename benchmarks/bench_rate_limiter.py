@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Rate limiter benchmark: throughput against a quota-enforcing provider.
+
+Concurrent workers embed texts one request at a time against a stand-in that
+answers 429 beyond a requests-per-second quota. Compares the previous fixed
+retry waits ((attempt + 1) * 2 s, no pacing) with the adaptive limiter set to
+the quota, and set to twice the quota (AIMD has to find the real ceiling).
+
+Usage:
+    python benchmarks/bench_rate_limiter.py [--requests 300] [--quota 20] [--workers 8]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.providers import QuotaEmbeddingClient
+from utils.embeddings import EmbeddingGenerator
+from utils.rate_limiter import AdaptiveRateLimiter
+
+
+def legacy_embedding(client, text: str, retry_count: int = 3):
+    """The previous generate_embedding retry loop: fixed waits, no pacing."""
+    for attempt in range(retry_count):
+        try:
+            return client.embed_content(model="bench", content=text, task_type="retrieval_document")['embedding']
+        except Exception:
+            if attempt < retry_count - 1:
+                time.sleep((attempt + 1) * 2)
+    return None
+
+
+def run(embed, texts, workers: int, client) -> dict:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(embed, texts))
+    elapsed = time.perf_counter() - start
+    return {
+        'seconds': round(elapsed, 2),
+        'requests_per_second': round(len(texts) / elapsed, 1),
+        'failed': sum(result is None for result in results),
+        'rejected_429': client.rejected
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=300, help='Embedding requests to send')
+    parser.add_argument('--quota', type=float, default=20, help='Provider quota (requests/second)')
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent callers')
+    parser.add_argument('--latency', type=float, default=0.02, help='Simulated request latency (s)')
+    args = parser.parse_args()
+
+    texts = [f"Query {i} about stroke risk factors" for i in range(args.requests)]
+    report = {'requests': args.requests, 'quota_per_second': args.quota, 'workers': args.workers}
+
+    client = QuotaEmbeddingClient(args.quota, dimension=8, request_latency=args.latency, per_text_latency=0)
+    report['fixed_retries'] = run(lambda text: legacy_embedding(client, text), texts, args.workers, client)
+
+    for name, configured in (('limiter_at_quota', args.quota), ('limiter_at_2x_quota', args.quota * 2)):
+        client = QuotaEmbeddingClient(args.quota, dimension=8, request_latency=args.latency, per_text_latency=0)
+        limiter = AdaptiveRateLimiter(requests_per_minute=configured * 60, burst=2, min_requests_per_minute=60)
+        generator = EmbeddingGenerator(api_key=None, client=client, rate_limiter=limiter)
+        with contextlib.redirect_stdout(io.StringIO()):
+            report[name] = run(lambda text: generator.generate_embedding(text, retry_count=5),
+                               texts, args.workers, client)
+        stats = limiter.stats()
+        report[name].update(
+            throttle_events=stats['throttle_events'],
+            final_requests_per_minute=round(stats['requests_per_minute']),
+            mean_queue_wait_ms=round(stats['mean_queue_wait_ms'], 1)
+        )
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
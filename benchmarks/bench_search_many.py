@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Batched search benchmark: RAGEngine.search called once per query against
+RAGEngine.search_many for the whole set.
+
+A temporary local-backend collection is filled with pseudo-clinical chunks,
+then the same queries are searched both ways with the embedding cache off.
+Embeddings come from the local stand-in provider with a simulated round
+trip per request, so the sequential path pays one round trip per query while
+search_many pays one per batch of up to 100 queries. The rankings of both
+paths are checked to be identical. In hybrid mode each query still runs its
+own BM25 search, which then dominates the batched time.
+
+Usage:
+    python benchmarks/bench_search_many.py [--chunks 5000] [--queries 1,10,100,500] [--latency 0.05] [--mode vector]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fixtures import sentences
+from benchmarks.providers import LocalEmbeddingClient
+from modules.rag_engine import RAGEngine
+from utils.rate_limiter import AdaptiveRateLimiter
+
+
+def build(directory: str, chunks: int, dim: int, mode: str) -> RAGEngine:
+    rag = RAGEngine("bench_collection", directory, "offline", "gemini-2.5-flash", vector_backend="local",
+                    search_mode=mode, embedding_dimensions=dim, near_duplicate_threshold=None,
+                    rate_limiter=AdaptiveRateLimiter())
+    rag.embedding_generator.embedding_model = LocalEmbeddingClient(dimension=dim, request_latency=0,
+                                                                   per_text_latency=0)
+    texts = [" ".join(sentences(4, seed=i)) for i in range(chunks)]
+    rag.add_documents([{'text': text, 'metadata': {'source': f"doc_{i % 50}"}} for i, text in enumerate(texts)])
+    return rag
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", default="1,10,100,500", help="Query set sizes")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--mode", choices=RAGEngine.SEARCH_MODES, default="vector")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated seconds per embedding request")
+    args = parser.parse_args()
+
+    report = []
+    with tempfile.TemporaryDirectory() as tmp:
+        with contextlib.redirect_stdout(io.StringIO()):
+            rag = build(tmp, args.chunks, args.dim, args.mode)
+        generator = rag.embedding_generator
+        generator.cache = None
+        client = LocalEmbeddingClient(dimension=args.dim, request_latency=args.latency, per_text_latency=0)
+        generator.embedding_model = client
+        print(f"📊 {rag.collection.count()} chunks, {args.dim} dims, {args.mode} search, "
+              f"{args.latency * 1000:.0f} ms per embedding request")
+
+        for count in (int(size) for size in args.queries.split(",")):
+            queries = [" ".join(sentences(1, seed=100_000 + i)) for i in range(count)]
+            with contextlib.redirect_stdout(io.StringIO()):
+                requests = client.requests
+                sequential, sequential_seconds = timed(lambda: [rag.search(query, args.k) for query in queries])
+                sequential_requests = client.requests - requests
+                requests = client.requests
+                batched, batched_seconds = timed(lambda: rag.search_many(queries, args.k))
+                batched_requests = client.requests - requests
+            assert [[c['id'] for c in r] for r in sequential] == [[c['id'] for c in r] for r in batched]
+
+            row = {
+                'queries': count,
+                'sequential': {'seconds': round(sequential_seconds, 3), 'requests': sequential_requests,
+                               'queries_per_second': round(count / sequential_seconds, 1)},
+                'search_many': {'seconds': round(batched_seconds, 3), 'requests': batched_requests,
+                                'queries_per_second': round(count / batched_seconds, 1)},
+                'speedup': round(sequential_seconds / batched_seconds, 1),
+            }
+            print(f"  {count:>5} queries: sequential {row['sequential']['queries_per_second']:8.1f} q/s, "
+                  f"search_many {row['search_many']['queries_per_second']:8.1f} q/s ({row['speedup']}x)")
+            report.append(row)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
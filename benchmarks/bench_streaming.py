@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Streaming ingestion benchmark: peak memory of the extract -> chunk -> embed
+pipeline as documents grow.
+
+Compares the materialized path (whole text, then every chunk, then every
+embedding) with the streaming path used by RAGEngine.index_document (pages ->
+chunks -> one embedding batch at a time). Peak memory is measured with
+tracemalloc; embeddings come from the local stand-in provider. The vector
+store and BM25 index are left out, since they keep their own state.
+
+Usage:
+    python benchmarks/bench_streaming.py [--sizes 1,4] [--pdf-pages 0]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fixtures import sentences, write_guideline_pdf
+from benchmarks.providers import LocalEmbeddingClient
+from modules.rag_engine import batched
+from utils.document_processor import DocumentProcessor
+from utils.embeddings import EmbeddingGenerator
+
+
+def write_text_document(path: Path, megabytes: int):
+    block = "\n\n".join(" ".join(sentences(12, seed=i)) for i in range(50)) + "\n\n"
+    with open(path, 'w', encoding='utf-8') as f:
+        for _ in range(megabytes * 1024 * 1024 // len(block) + 1):
+            f.write(block)
+
+
+def materialized(processor: DocumentProcessor, generator: EmbeddingGenerator, path: Path) -> int:
+    chunks = processor.process_document(str(path))
+    embeddings = generator.generate_batch([chunk['text'] for chunk in chunks])
+    return len(embeddings)
+
+
+def streaming(processor: DocumentProcessor, generator: EmbeddingGenerator, path: Path) -> int:
+    total = 0
+    batch_size = generator.batch_size * generator.max_concurrency
+    for batch in batched(processor.iter_document_chunks(str(path)), batch_size):
+        total += len(generator.generate_batch([chunk['text'] for chunk in batch]))
+    return total
+
+
+def measure(pipeline, path: Path) -> dict:
+    processor = DocumentProcessor(chunk_size=500, chunk_overlap=50)
+    client = LocalEmbeddingClient(dimension=768, request_latency=0, per_text_latency=0)
+    generator = EmbeddingGenerator(api_key=None, client=client, dimension=768)
+    with contextlib.redirect_stdout(io.StringIO()):
+        tracemalloc.start()
+        start = time.perf_counter()
+        chunks = pipeline(processor, generator, path)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {'chunks': chunks, 'seconds': round(elapsed, 2), 'peak_mb': round(peak / 1e6, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1,4", help="Text document sizes in MB")
+    parser.add_argument("--pdf-pages", type=int, default=0, help="Also measure a PDF of this many pages")
+    args = parser.parse_args()
+
+    report = []
+    with tempfile.TemporaryDirectory() as tmp:
+        documents = []
+        for megabytes in (int(size) for size in args.sizes.split(",")):
+            path = Path(tmp) / f"document_{megabytes}mb.txt"
+            write_text_document(path, megabytes)
+            documents.append(path)
+        if args.pdf_pages:
+            path = Path(tmp) / f"guideline_{args.pdf_pages}p.pdf"
+            write_guideline_pdf(path, args.pdf_pages)
+            documents.append(path)
+
+        for path in documents:
+            row = {'document': path.name, 'mb': round(path.stat().st_size / 1e6, 1)}
+            for name, pipeline in (('materialized', materialized), ('streaming', streaming)):
+                row[name] = measure(pipeline, path)
+            assert row['materialized']['chunks'] == row['streaming']['chunks']
+            print(f"  {row['document']:>24} ({row['mb']:6.1f} MB): "
+                  f"materialized {row['materialized']['peak_mb']:7.1f} MB peak, "
+                  f"streaming {row['streaming']['peak_mb']:6.1f} MB peak")
+            report.append(row)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
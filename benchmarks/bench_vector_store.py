@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Vector store benchmark: ChromaDB vs the in-process NumPy index.
+
+Builds both backends from the same random unit vectors, then reports p50/p99
+query latency and cold-start time (open the index and answer one query in a
+fresh process).
+
+Usage:
+    python benchmarks/bench_vector_store.py [--vectors 5000] [--dim 3072] [--queries 200]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.rag_engine import VECTOR_STORES
+
+COLLECTION = "bench_collection"
+
+
+def percentile(samples, q):
+    return float(np.percentile(np.asarray(samples) * 1000, q))
+
+
+def build(backend: str, directory: Path, vectors: np.ndarray, batch: int = 1000) -> float:
+    """Populate a store and return the build time in seconds."""
+    start = time.perf_counter()
+    store = VECTOR_STORES[backend](directory, COLLECTION)
+    for i in range(0, len(vectors), batch):
+        part = vectors[i:i + batch]
+        ids = [f"chunk_{j}" for j in range(i, i + len(part))]
+        store.add(ids=ids, embeddings=part.tolist(),
+                  documents=[f"document {j}" for j in range(i, i + len(part))],
+                  metadatas=[{'source': f"doc_{j % 10}"} for j in range(i, i + len(part))])
+    return time.perf_counter() - start
+
+
+def query_latency(backend: str, directory: Path, queries: np.ndarray, k: int):
+    store = VECTOR_STORES[backend](directory, COLLECTION)
+    store.query([queries[0].tolist()], k)  # warm-up
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        store.query([query.tolist()], k)
+        samples.append(time.perf_counter() - start)
+    return {'p50_ms': percentile(samples, 50), 'p99_ms': percentile(samples, 99)}
+
+
+def cold_start(backend: str, directory: Path, dim: int, runs: int = 3) -> float:
+    """Median time for a fresh process to open the store and answer one query (imports excluded)."""
+    code = (
+        "import sys, time; "
+        f"sys.path.insert(0, {str(Path(__file__).parent.parent)!r}); "
+        "from modules.rag_engine import VECTOR_STORES; "
+        "t = time.perf_counter(); "
+        f"s = VECTOR_STORES[{backend!r}]({str(directory)!r}, {COLLECTION!r}); "
+        f"s.query([[1.0] * {dim}], 5); "
+        "print(time.perf_counter() - t)"
+    )
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-W", "ignore", "-c", code],
+                                capture_output=True, text=True, check=True).stdout
+        timings.append(float(output.strip().splitlines()[-1]))
+    return float(np.median(timings)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--vectors', type=int, default=5000)
+    parser.add_argument('--dim', type=int, default=3072)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=5)
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.vectors, args.dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+    
+    report = {'vectors': args.vectors, 'dim': args.dim, 'queries': args.queries, 'k': args.k}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in VECTOR_STORES:
+            directory = Path(tmp) / backend
+            directory.mkdir()
+            result = {'build_s': build(backend, directory, vectors)}
+            result.update(query_latency(backend, directory, queries, args.k))
+            result['cold_start_ms'] = cold_start(backend, directory, args.dim)
+            report[backend] = result
+    
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
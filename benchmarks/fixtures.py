@@ -0,0 +1,72 @@
+"""
+Synthetic documents for the benchmarks.
+
+Generated locally and deterministically, so benchmark inputs don't depend on
+which documents happen to be in data/.
+"""
+
+import random
+from pathlib import Path
+from typing import List
+
+WORDS = (
+    "stroke patient blood pressure artery brain clot thrombolysis alteplase imaging "
+    "carotid atrial fibrillation anticoagulation rehabilitation aphasia weakness "
+    "emergency onset symptoms guideline recommendation evidence risk diabetes "
+    "cholesterol smoking exercise diet hemorrhage ischemic transient attack"
+).split()
+
+
+def sentences(count: int, seed: int = 0) -> List[str]:
+    """Deterministic pseudo-clinical sentences."""
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+            for _ in range(count)]
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: Path, pages: List[List[str]]) -> None:
+    """
+    Write a minimal text-only PDF (Helvetica, one line per string).
+
+    Args:
+        path: Output file
+        pages: Lines of text for each page
+    """
+    page_count = len(pages)
+    font_id = 3
+    objects = {
+        1: "<< /Type /Catalog /Pages 2 0 R >>",
+        font_id: "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    kids = []
+    for i, lines in enumerate(pages):
+        page_id, content_id = 4 + 2 * i, 5 + 2 * i
+        kids.append(f"{page_id} 0 R")
+        stream = "BT /F1 9 Tf 11 TL 40 800 Td " + " ".join(f"({_escape(line)}) Tj T*" for line in lines) + " ET"
+        objects[page_id] = (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {content_id} 0 R >>")
+        objects[content_id] = f"<< /Length {len(stream.encode('latin-1'))} >>\nstream\n{stream}\nendstream"
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {page_count} >>"
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for object_id in sorted(objects):
+        offsets[object_id] = len(output)
+        output += f"{object_id} 0 obj\n{objects[object_id]}\nendobj\n".encode('latin-1')
+
+    xref = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode('latin-1')
+    for object_id in sorted(objects):
+        output += f"{offsets[object_id]:010d} 00000 n \n".encode('latin-1')
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode('latin-1')
+    Path(path).write_bytes(bytes(output))
+
+
+def write_guideline_pdf(path: Path, page_count: int, seed: int = 0) -> None:
+    """A PDF of ``page_count`` pages of synthetic guideline text (~60 lines each)."""
+    lines = sentences(page_count * 60, seed)
+    write_pdf(path, [[line[:110] for line in lines[i * 60:(i + 1) * 60]] for i in range(page_count)])
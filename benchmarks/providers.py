@@ -0,0 +1,168 @@
+"""
+Local stand-ins for the Gemini APIs used by the benchmarks.
+
+They run fully offline and are deterministic, so timings reflect our own
+code paths plus a configurable simulated network latency.
+"""
+
+import asyncio
+import hashlib
+import math
+import random
+import threading
+import time
+from types import SimpleNamespace
+from typing import List, Union
+
+from utils.lexical_index import tokenize
+
+
+class LocalEmbeddingClient:
+    """Drop-in replacement for ``google.generativeai.embed_content``."""
+    
+    def __init__(self, dimension: int = 3072, request_latency: float = 0.05,
+                 per_text_latency: float = 0.002, failure_rate: float = 0.0, seed: int = 0):
+        """
+        Initialize the stand-in provider.
+        
+        Args:
+            dimension: Size of the returned vectors
+            request_latency: Simulated round-trip time per request (seconds)
+            per_text_latency: Additional simulated time per text in a request
+            failure_rate: Probability that a request raises an error
+            seed: Seed for the failure injection
+        """
+        self.dimension = dimension
+        self.request_latency = request_latency
+        self.per_text_latency = per_text_latency
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.texts = 0
+    
+    def vector(self, text: str) -> List[float]:
+        """Deterministic unit vector derived from the text's hash."""
+        values = []
+        counter = 0
+        while len(values) < self.dimension:
+            digest = hashlib.sha256(f"{counter}:{text}".encode('utf-8')).digest()
+            values.extend((b - 127.5) / 127.5 for b in digest)
+            counter += 1
+        values = values[:self.dimension]
+        norm = math.sqrt(sum(v * v for v in values)) or 1.0
+        return [v / norm for v in values]
+    
+    def embed_content(self, model: str, content: Union[str, List[str]], task_type: str = None, **kwargs):
+        """Mimic ``genai.embed_content`` for a single text or a list of texts."""
+        texts = [content] if isinstance(content, str) else list(content)
+        
+        with self._lock:
+            self.requests += 1
+            self.texts += len(texts)
+            fail = self._random.random() < self.failure_rate
+        
+        time.sleep(self.request_latency + self.per_text_latency * len(texts))
+        
+        if fail:
+            raise RuntimeError("503 simulated provider overload")
+        
+        vectors = [self.vector(text) for text in texts]
+        return {'embedding': vectors[0] if isinstance(content, str) else vectors}
+
+
+class QuotaEmbeddingClient(LocalEmbeddingClient):
+    """``LocalEmbeddingClient`` that enforces a requests-per-second quota like the real API (429 beyond it)."""
+    
+    def __init__(self, requests_per_second: float, **kwargs):
+        super().__init__(**kwargs)
+        self.requests_per_second = requests_per_second
+        self.rejected = 0
+        self._accepted = []
+    
+    def embed_content(self, model: str, content: Union[str, List[str]], task_type: str = None, **kwargs):
+        with self._lock:
+            now = time.monotonic()
+            self._accepted = [t for t in self._accepted if now - t < 1.0]
+            allowed = len(self._accepted) < self.requests_per_second
+            if allowed:
+                self._accepted.append(now)
+            else:
+                self.rejected += 1
+        
+        if not allowed:
+            time.sleep(self.request_latency)
+            raise RuntimeError("429 Resource has been exhausted (e.g. check quota).")
+        return super().embed_content(model, content, task_type, **kwargs)
+
+
+class HashEmbeddingClient(LocalEmbeddingClient):
+    """
+    ``LocalEmbeddingClient`` whose vectors reflect the words of the text.
+    
+    Word unigrams and bigrams (half weight) are feature-hashed into signed
+    buckets with log-scaled counts, so texts sharing terms get similar
+    vectors and retrieval quality can be measured without the real model.
+    """
+    
+    def __init__(self, dimension: int = 512, request_latency: float = 0.0,
+                 per_text_latency: float = 0.0, **kwargs):
+        super().__init__(dimension=dimension, request_latency=request_latency,
+                         per_text_latency=per_text_latency, **kwargs)
+    
+    def vector(self, text: str) -> List[float]:
+        """Unit vector of hashed term counts."""
+        tokens = tokenize(text)
+        counts = {}
+        for feature, weight in [(token, 1.0) for token in tokens] + \
+                [(f"{a} {b}", 0.5) for a, b in zip(tokens, tokens[1:])]:
+            counts[feature] = counts.get(feature, 0.0) + weight
+        
+        values = [0.0] * self.dimension
+        for feature, count in counts.items():
+            digest = hashlib.md5(feature.encode('utf-8')).digest()
+            bucket = int.from_bytes(digest[:4], 'little') % self.dimension
+            sign = 1.0 if digest[4] & 1 else -1.0
+            values[bucket] += sign * (1.0 + math.log(count))
+        norm = math.sqrt(sum(v * v for v in values)) or 1.0
+        return [v / norm for v in values]
+
+
+class EchoModel:
+    """
+    Drop-in replacement for ``genai.GenerativeModel`` that echoes the question.
+    
+    Answers are the prompt's last ``echo_chars`` characters, produced after a
+    simulated ``latency``; the async variant streams them in ``stream_chunks``
+    pieces like the real client does with ``stream=True``.
+    """
+    
+    def __init__(self, latency: float = 0.0, echo_chars: int = 200, stream_chunks: int = 4):
+        self.latency = latency
+        self.echo_chars = echo_chars
+        self.stream_chunks = stream_chunks
+        self.calls = 0
+    
+    def _answer(self, prompt: str) -> str:
+        self.calls += 1
+        return " ".join(prompt.split())[-self.echo_chars:]
+    
+    def generate_content(self, prompt: str, generation_config=None, stream: bool = False):
+        """Mimic ``GenerativeModel.generate_content`` (non-streaming)."""
+        time.sleep(self.latency)
+        return SimpleNamespace(text=self._answer(prompt))
+    
+    async def generate_content_async(self, prompt: str, generation_config=None, stream: bool = False):
+        """Mimic ``GenerativeModel.generate_content_async``, optionally streaming."""
+        await asyncio.sleep(self.latency)
+        text = self._answer(prompt)
+        if not stream:
+            return SimpleNamespace(text=text)
+        
+        size = max(1, -(-len(text) // self.stream_chunks))
+        
+        async def chunks():
+            for start in range(0, len(text), size):
+                yield SimpleNamespace(text=text[start:start + size])
+        
+        return chunks()
@@ -0,0 +1 @@
+# RAG benchmark suite
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+RAG benchmark: retrieval quality and per-stage latency on data/medical_docs,
+fully offline.
+
+The documents are indexed into a temporary collection with the hash-based
+embedder standing in for Gemini embeddings and the echo model standing in
+for generation (see benchmarks/providers.py), so results are deterministic
+and only change when our own code does. Simulated provider latency can be
+added with --embed-latency / --generate-latency.
+
+Each question of the golden set (golden.json) lists phrases; a chunk is
+relevant to it when its text contains one of them (case, markdown emphasis
+and whitespace ignored). recall@k is the share of questions with a relevant
+chunk in the top k, MRR the mean reciprocal rank of the first one. Latency
+is reported per stage (embed, search, format = context selection and prompt
+building, generate) and end to end as p50/p95/p99 over every question and
+repetition.
+
+Usage:
+    python benchmarks/rag/bench_rag.py [--mode hybrid] [--repeat 5] [--output report.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from benchmarks.providers import EchoModel, HashEmbeddingClient
+from config import CHUNK_OVERLAP, CHUNK_SIZE, CONTEXT_TOKEN_BUDGET, MEDICAL_DOCS_DIR, MMR_LAMBDA, RETRIEVAL_CANDIDATES
+from modules.rag_engine import RAGEngine
+from utils.document_processor import DocumentProcessor
+from utils.rate_limiter import AdaptiveRateLimiter
+
+GOLDEN_PATH = Path(__file__).parent / "golden.json"
+RECALL_AT = (1, 3, 5, 10)
+STAGES = ("embed", "search", "format", "generate")
+PERCENTILES = (50, 95, 99)
+
+
+def normalize(text: str) -> str:
+    """Lowercase, drop markdown emphasis and collapse whitespace."""
+    return " ".join(re.sub(r"[*_]", "", text.lower()).split())
+
+
+def relevant_ids(phrases: List[str], chunks: Dict[str, str]) -> List[str]:
+    """Ids of the chunks containing any of the phrases."""
+    phrases = [normalize(phrase) for phrase in phrases]
+    return [chunk_id for chunk_id, text in chunks.items() if any(phrase in text for phrase in phrases)]
+
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    """Percentiles and mean of latency samples, in milliseconds."""
+    values = np.asarray(samples) * 1000
+    summary = {f"p{p}": round(float(np.percentile(values, p)), 3) for p in PERCENTILES}
+    summary['mean'] = round(float(values.mean()), 3)
+    return summary
+
+
+def run_benchmark(docs: Path = MEDICAL_DOCS_DIR, golden: Path = GOLDEN_PATH, k: int = 5,
+                  mode: str = "hybrid", backend: str = "local", repeat: int = 5, dimension: int = 512,
+                  embed_latency: float = 0.0, generate_latency: float = 0.0,
+                  chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP) -> Dict[str, Any]:
+    """
+    Index ``docs`` with the offline stand-ins and measure the golden questions.
+
+    Args:
+        docs: Directory of documents to index
+        golden: JSON list of {"question", "relevant": [phrases]}
+        k: Passages picked for the prompt (as in RAGEngine.query)
+        mode: Search mode ("vector", "lexical" or "hybrid")
+        backend: Vector store backend ("local" or "chroma")
+        repeat: Timed passes over the golden set
+        dimension: Size of the hash embeddings
+        embed_latency: Simulated seconds per embedding request
+        generate_latency: Simulated seconds per generation
+        chunk_size: Characters per chunk
+        chunk_overlap: Overlap between chunks
+
+    Returns:
+        Report with corpus counts, retrieval metrics, latency per stage and per-question results
+    """
+    questions = json.loads(Path(golden).read_text(encoding='utf-8'))
+    depth = max(max(RECALL_AT), RETRIEVAL_CANDIDATES, k)
+
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        rag = RAGEngine("rag_benchmark", tmp, "offline", "gemini-2.5-flash",
+                        rate_limiter=AdaptiveRateLimiter(), answer_cache_size=0,
+                        vector_backend=backend, search_mode=mode, embedding_dimensions=dimension,
+                        retrieval_candidates=RETRIEVAL_CANDIDATES, mmr_lambda=MMR_LAMBDA,
+                        context_token_budget=CONTEXT_TOKEN_BUDGET)
+        client = HashEmbeddingClient(dimension=dimension, request_latency=embed_latency)
+        rag.embedding_generator.embedding_model = client
+        rag.model = EchoModel(latency=generate_latency)
+        indexed = rag.index_directory(str(docs), DocumentProcessor(chunk_size=chunk_size, chunk_overlap=chunk_overlap))
+
+        stored = rag.collection.get()
+        chunks = {chunk_id: normalize(text) for chunk_id, text in zip(stored['ids'], stored['documents'])}
+
+        # Every query embedding is requested from the provider, as on a cold cache
+        generator = rag.embedding_generator
+        generator.cache = None
+
+        timings = {stage: [] for stage in STAGES + ('total',)}
+        rankings: Dict[str, List[str]] = {}
+        for _ in range(max(repeat, 1)):
+            for item in questions:
+                question = item['question']
+                start = time.perf_counter()
+                embedding = generator.generate_embedding(question)
+                embedded = time.perf_counter()
+                candidates = rag.search(question, depth, query_embedding=embedding, mode=mode)
+                searched = time.perf_counter()
+                passages = rag.select_context(candidates[:max(k, RETRIEVAL_CANDIDATES)], k)
+                context, sources = rag.format_context(passages)
+                rag._build_prompt(question, context)
+                formatted = time.perf_counter()
+                rag.generate_answer(question, context, sources)
+                generated = time.perf_counter()
+
+                for stage, seconds in zip(STAGES + ('total',), (embedded - start, searched - embedded,
+                                                                 formatted - searched, generated - formatted,
+                                                                 generated - start)):
+                    timings[stage].append(seconds)
+                rankings[question] = [chunk['id'] for chunk in candidates]
+
+    results = []
+    for item in questions:
+        relevant = set(relevant_ids(item['relevant'], chunks))
+        ranking = rankings[item['question']]
+        first: Optional[int] = next((rank for rank, chunk_id in enumerate(ranking, 1) if chunk_id in relevant), None)
+        results.append({
+            'question': item['question'],
+            'relevant_chunks': len(relevant),
+            'first_relevant_rank': first,
+        })
+
+    judged = [result for result in results if result['relevant_chunks']]
+    ranks = [result['first_relevant_rank'] for result in judged]
+    retrieval = {f"recall@{n}": round(sum(rank is not None and rank <= n for rank in ranks) / max(len(ranks), 1), 4)
+                 for n in RECALL_AT}
+    retrieval['mrr'] = round(sum(1.0 / rank for rank in ranks if rank) / max(len(ranks), 1), 4)
+
+    return {
+        'settings': {'mode': mode, 'backend': backend, 'k': k, 'repeat': repeat, 'dimension': dimension,
+                     'chunk_size': chunk_size, 'chunk_overlap': chunk_overlap,
+                     'embed_latency': embed_latency, 'generate_latency': generate_latency},
+        'corpus': {'documents': indexed.get('indexed', 0), 'chunks': len(chunks), 'questions': len(questions),
+                   'unjudged_questions': [result['question'] for result in results if not result['relevant_chunks']]},
+        'retrieval': retrieval,
+        'latency_ms': {stage: latency_summary(samples) for stage, samples in timings.items()},
+        'embedding_requests': client.requests,
+        'questions': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=Path, default=MEDICAL_DOCS_DIR)
+    parser.add_argument("--golden", type=Path, default=GOLDEN_PATH)
+    parser.add_argument("--k", type=int, default=5, help="Passages picked for the prompt")
+    parser.add_argument("--mode", choices=RAGEngine.SEARCH_MODES, default="hybrid")
+    parser.add_argument("--backend", choices=("local", "chroma"), default="local")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed passes over the golden set")
+    parser.add_argument("--dimension", type=int, default=512, help="Hash embedding size")
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="Simulated seconds per embedding request")
+    parser.add_argument("--generate-latency", type=float, default=0.0, help="Simulated seconds per answer")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--chunk-overlap", type=int, default=CHUNK_OVERLAP)
+    parser.add_argument("--output", type=Path, help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.docs, args.golden, args.k, args.mode, args.backend, args.repeat, args.dimension,
+                           args.embed_latency, args.generate_latency, args.chunk_size, args.chunk_overlap)
+
+    corpus = report['corpus']
+    print(f"📊 {corpus['chunks']} chunks from {corpus['documents']} documents, {corpus['questions']} questions")
+    for question in corpus['unjudged_questions']:
+        print(f"  ⚠️  No chunk contains a relevant phrase for: {question}")
+    print("  " + "  ".join(f"{name} {value:.3f}" for name, value in report['retrieval'].items()))
+    for stage, summary in report['latency_ms'].items():
+        print(f"  {stage:>9}: p50 {summary['p50']:8.3f} ms  p95 {summary['p95']:8.3f} ms  p99 {summary['p99']:8.3f} ms")
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n", encoding='utf-8')
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
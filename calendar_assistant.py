@@ -12,6 +12,8 @@ from fastmcp import Client
 from pipedream import Pipedream
 from dotenv import load_dotenv
 
+from utils.rate_limiter import gemini_rate_limiter, is_throttle_error
+
 load_dotenv()
 
 class SmartCalendarAssistant:
@@ -315,48 +317,35 @@ Remember: You are a SMART personal assistant. Think ahead, prevent problems, and
         print("✅ AI assistant ready!\n")
     
     async def send_message(self, message: str) -> str:
-        """Send a message to the AI and get response with retry logic"""
-        max_retries = 3
-        base_delay = 2
+        """Send a message to the AI and get response (rate-limited, retried on 429/503)"""
+        limiter = gemini_rate_limiter()
         
-        for attempt in range(max_retries):
-            try:
-                # Send initial message
-                response = await self.chat.send_message(message)
-                
-                # Handle tool calls in a loop
-                while response.candidates[0].content.parts:
-                    parts = response.candidates[0].content.parts
-                    
-                    # Check if there are any function calls
-                    has_function_calls = any(
-                        hasattr(part, 'function_call') and part.function_call 
-                        for part in parts
-                    )
-                    
-                    if not has_function_calls:
-                        return response.text
-                    
-                    # Continue the conversation to execute function calls
-                    response = await self.chat.send_message("")
+        try:
+            # Send initial message
+            response = await limiter.acall(self.chat.send_message, message, retryable=is_throttle_error)
+            
+            # Handle tool calls in a loop
+            while response.candidates[0].content.parts:
+                parts = response.candidates[0].content.parts
                 
-                return response.text
+                # Check if there are any function calls
+                has_function_calls = any(
+                    hasattr(part, 'function_call') and part.function_call 
+                    for part in parts
+                )
                 
-            except Exception as e:
-                error_msg = str(e)
+                if not has_function_calls:
+                    return response.text
                 
-                if "503" in error_msg or "overloaded" in error_msg.lower():
-                    if attempt < max_retries - 1:
-                        delay = base_delay * (2 ** attempt)
-                        print(f"⏳ Model overloaded, retrying in {delay}s...")
-                        await asyncio.sleep(delay)
-                        continue
-                    else:
-                        return "⚠️ The AI is currently overloaded. Please try again shortly."
-                else:
-                    return f"❌ Error: {error_msg}"
-        
-        return "⚠️ Failed after multiple retries. Please try again later."
+                # Continue the conversation to execute function calls
+                response = await limiter.acall(self.chat.send_message, "", retryable=is_throttle_error)
+            
+            return response.text
+            
+        except Exception as e:
+            if is_throttle_error(e):
+                return "⚠️ The AI is currently overloaded. Please try again shortly."
+            return f"❌ Error: {str(e)}"
     
     async def run(self):
         """Main CLI loop"""
@@ -13,10 +13,10 @@ MEDICAL_DOCS_DIR = DATA_DIR / "medical_docs"
 VECTOR_DB_DIR = DATA_DIR / "vector_db"
 DATABASE_PATH = DATA_DIR / "healthcare.db"
 
-# Ensure directories exist
-DATA_DIR.mkdir(exist_ok=True)
-MEDICAL_DOCS_DIR.mkdir(exist_ok=True)
-VECTOR_DB_DIR.mkdir(exist_ok=True)
+def ensure_directories():
+    """Create the data directories (called at app startup and by the code that writes to them, not on import)."""
+    for directory in (DATA_DIR, MEDICAL_DOCS_DIR, VECTOR_DB_DIR):
+        directory.mkdir(parents=True, exist_ok=True)
 
 # Pipedream Configuration (from existing .env)
 PIPEDREAM_PROJECT_ID = os.getenv("PIPEDREAM_PROJECT_ID")
@@ -30,14 +30,64 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
 # RAG Configuration
 EMBEDDING_MODEL = "models/gemini-embedding-001"  # Gemini embeddings
+EMBEDDING_DIMENSIONS = 3072  # Output size of EMBEDDING_MODEL
 LLM_MODEL = "gemini-2.5-flash"
 CHUNK_SIZE = 500  # Characters per chunk
 CHUNK_OVERLAP = 50  # Overlap between chunks
+NEAR_DUPLICATE_THRESHOLD = 0.85  # MinHash Jaccard at which a chunk reuses the embedding of another document's copy (None = off)
 TOP_K_RESULTS = 5  # Number of relevant chunks to retrieve
 TEMPERATURE = 0.1  # LLM temperature for consistent answers
+EMBEDDING_CACHE_PATH = VECTOR_DB_DIR / "embedding_cache.db"  # Content-addressed embedding cache
+EMBEDDING_CACHE_MAX_ENTRIES = 100_000  # LRU cap (~1.2 GB at 3072 float32 dims)
+ANSWER_CACHE_MAX_ENTRIES = 512  # Cached RAG answers (0 disables)
+ANSWER_CACHE_TTL_SECONDS = 3600  # Cached answers expire after an hour
+ANSWER_CACHE_SIMILARITY = 0.95  # Cosine threshold for semantic cache hits (None = exact only)
+RAG_WARMUP_ENABLED = os.getenv("RAG_WARMUP_ENABLED", "true").lower() != "false"  # Build and warm the RAG engine at API startup
+RAG_WARMUP_ATTEMPTS = 3  # Warm-up attempts (30 s apart) before failed components stay failed
+
+# Chat Latency Budget (per-stage deadlines; a stage that keeps failing is skipped for a while)
+CHAT_STAGE_TIMEOUTS = {
+    'history': 1.0,  # Conversation history read
+    'embedding': 3.0,  # Query embedding (BM25 alone after this)
+    'search': 2.0,  # Vector search (BM25 alone after this)
+    'generation': 20.0,  # Gemini answer (top passages or a cached answer after this)
+}
+CIRCUIT_FAILURE_THRESHOLD = 5  # Consecutive stage failures before its circuit opens
+CIRCUIT_RESET_SECONDS = 30.0  # Seconds an open circuit waits before a trial call
+
+# Gemini Rate Limiting (one limiter shared by embedding, generation and calendar chat)
+GEMINI_REQUESTS_PER_MINUTE = int(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "1000"))  # Project quota ceiling
+GEMINI_BURST = 10  # Requests allowed back to back before the rate applies
+GEMINI_MIN_REQUESTS_PER_MINUTE = 30  # Floor for the adaptive rate after repeated 429/503s
+GEMINI_RATE_INCREASE_PER_SUCCESS = 10  # Requests/minute regained after each successful call
+GEMINI_RATE_DECREASE_FACTOR = 0.8  # Rate multiplier on a 429/503 response
+GEMINI_MAX_RETRIES = 4  # Jittered retries per call after the first attempt
 
 # Vector Database Configuration
 CHROMA_COLLECTION_NAME = "stroke_medical_docs"
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "chroma")  # "chroma" or "local" (NumPy memmap)
+SEARCH_MODE = "hybrid"  # "vector", "lexical" (BM25 only) or "hybrid" (reciprocal-rank fusion)
+LEXICAL_FALLBACK_TIMEOUT = CHAT_STAGE_TIMEOUTS['embedding']  # Seconds to wait for a query embedding before using BM25 alone
+RETRIEVAL_CANDIDATES = 20  # Candidates retrieved before MMR picks the context chunks
+MMR_LAMBDA = 0.85  # MMR relevance/diversity trade-off (1.0 = relevance only, None = no MMR)
+CONTEXT_TOKEN_BUDGET = 700  # Estimated prompt tokens available for retrieved context (None = no limit)
+VECTOR_PRECISION = os.getenv("VECTOR_PRECISION", "float32")  # "float32", "float16" or "int8" (local backend)
+VECTOR_TRUNCATE_DIMENSIONS = None  # e.g. 768 to keep the first 768 Matryoshka dims (None = all)
+VECTOR_RESCORE = False  # Re-rank top candidates against full-precision vectors (local backend)
+REINDEX_REQUESTS_PER_MINUTE = int(os.getenv("REINDEX_REQUESTS_PER_MINUTE", "300"))  # Embedding requests/minute an index rebuild may use (the rest is left to chat)
+
+# Document Ingestion Configuration
+INGESTION_DB_PATH = DATA_DIR / "ingestion_jobs.db"  # Persistent upload job queue
+INGESTION_WORKERS = int(os.getenv("INGESTION_WORKERS", "2"))  # Concurrent ingestion jobs
+DOCUMENT_WORKERS = int(os.getenv("DOCUMENT_WORKERS", "1"))  # Processes extracting files / PDF pages (1 = in-process)
+
+# Chat Intent Routing Configuration
+INTENT_ROUTER_ENABLED = True  # Answer small talk and booking requests without RAG
+INTENT_MODEL_PATH = os.getenv("INTENT_MODEL_PATH")  # Optional pickled local intent classifier
+INTENT_MODEL_THRESHOLD = 0.8  # Minimum model probability to skip RAG
+EMERGENCY_FAST_PATH_ENABLED = True  # Reply to stroke-emergency messages before any network call
+EMERGENCY_CONTINUE_WITH_RAG = True  # Follow the WebSocket emergency frame with the full RAG answer (REST replies at once)
+EMERGENCY_PHONE_NUMBER = os.getenv("EMERGENCY_PHONE_NUMBER", "911")  # Number given in emergency replies
 
 # Appointment Configuration
 DEFAULT_APPOINTMENT_DURATION = 30  # minutes
@@ -195,6 +245,7 @@ def validate_config():
 
 if __name__ == "__main__":
     validate_config()
+    ensure_directories()
     print(f"📁 Data directory: {DATA_DIR}")
     print(f"📚 Medical docs: {MEDICAL_DOCS_DIR}")
     print(f"🗄️  Database: {DATABASE_PATH}")
@@ -0,0 +1,162 @@
+"""
+Emergency Detector Module
+Spots messages describing an active stroke emergency (the FAST / BE-FAST
+signs) with one precompiled Aho-Corasick pass, so the chat can tell the
+patient to call emergency services before any embedding, search or LLM call.
+"""
+
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from utils.aho_corasick import AhoCorasick
+
+# Curated lexicon, matched on whole words after normalize_message
+# - 'emergency': an active emergency on its own
+# - 'symptom': a stroke sign; an emergency unless the message only asks about it
+# - 'urgency': an onset or time cue marking a symptom as happening now
+# - 'informational': marks a question about symptoms in general or about a past stroke
+EMERGENCY_LEXICON = {
+    'emergency': [
+        "having a stroke", "having stroke", "had a stroke just now", "its a stroke", "think its a stroke",
+        "stroke right now", "unconscious", "passed out", "not breathing", "cant breathe", "stopped breathing",
+        "collapsed", "wont wake up", "not responding", "unresponsive", "seizure", "having a fit",
+        "worst headache of my life",
+    ],
+    'symptom': [
+        # Face
+        "face drooping", "face is drooping", "face droops", "face drooped", "drooping face", "droopy face",
+        "face is droopy", "face went numb", "face is numb", "numb face", "facial droop", "facial drooping",
+        "crooked smile", "uneven smile", "smile is uneven", "mouth is drooping", "drooping mouth",
+        # Arm / leg / one side
+        "arm weakness", "arm is weak", "weak arm", "arm feels weak", "arm is numb", "numb arm", "arm numbness",
+        "arm went numb", "cant lift my arm", "cant raise my arm", "arm is drifting", "arm drifts down",
+        "cant move my arm", "cant move my leg", "cant move my face", "cant move one side", "cant feel my arm",
+        "cant feel my leg", "cant feel my face",
+        "leg is weak", "leg went numb", "weakness on one side", "numbness on one side", "one side is numb",
+        "one side is weak", "sudden numbness", "sudden weakness", "paralyzed", "paralysis",
+        # Speech
+        "slurred speech", "speech is slurred", "slurring", "slurred words", "garbled speech", "cant speak",
+        "cant talk", "unable to speak", "trouble speaking", "difficulty speaking", "words are jumbled",
+        "words come out wrong", "cant get words out", "cant understand what",
+        # Balance, eyes, head
+        "sudden dizziness", "lost balance", "loss of balance", "cant walk", "cant stand up", "sudden vision loss",
+        "lost vision", "lost my vision", "cant see out of", "sudden blindness", "double vision suddenly",
+        "sudden severe headache", "thunderclap headache", "sudden confusion",
+    ],
+    'urgency': [
+        "right now", "just now", "suddenly", "all of a sudden", "just started", "started just", "happening now",
+        "is happening", "currently", "minutes ago", "an hour ago", "few hours ago", "this morning", "tonight",
+        "woke up with", "hurry",
+    ],
+    'informational': [
+        "what are", "what is", "what does", "what do", "signs of", "symptoms of", "warning signs",
+        "how do i recognize", "how to recognize", "how can i tell", "how do you know", "difference between",
+        "stand for", "mean", "meaning", "explain", "example", "list", "cause", "causes", "caused by", "why",
+        "after a stroke", "after stroke", "recovery", "rehabilitation", "rehab", "prevent", "means",
+        "understand", "since", "last year", "last month", "years ago", "months ago", "in the past", "used to",
+        "history of", "will it improve", "improve", "get better", "long term", "therapy",
+    ],
+}
+
+EMERGENCY_RESPONSE = (
+    "🚨 This may be a stroke or another medical emergency. Call emergency services ({number}) right now "
+    "and note the time the symptoms started.\n\n"
+    "Stroke warning signs (BE-FAST): Balance loss, Eyes (sudden vision loss), Face drooping, "
+    "Arm weakness, Speech difficulty, Time to call {number}.\n\n"
+    "While waiting: stay with the person, keep them lying on their side if they are drowsy or vomiting, "
+    "and do not give them food, drink or medication. Do not drive yourself to the hospital."
+)
+
+
+def normalize_message(message: str) -> str:
+    """Lowercase, drop apostrophes ("can't" -> "cant"), turn other punctuation into spaces."""
+    text = message.lower().replace("'", "").replace("’", "")
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text).split())
+
+
+def emergency_response(number: str = "911") -> str:
+    """Canned emergency reply."""
+    return EMERGENCY_RESPONSE.format(number=number)
+
+
+class EmergencyDetector:
+    """
+    Precompiled multi-pattern matcher over the emergency lexicon.
+
+    A message is an emergency when it contains an 'emergency' phrase, or a
+    stroke 'symptom' and either an 'urgency' cue or no 'informational' cue
+    ("my face is drooping" is, "what does face drooping mean" and "I have had
+    arm weakness since my stroke" are not). Pronouns and family words are
+    not urgency cues; only onset and time cues are.
+    Match latency and hit counts are recorded.
+    """
+
+    def __init__(self, lexicon: Dict[str, List[str]] = None):
+        """
+        Build the automaton.
+
+        Args:
+            lexicon: Category -> phrases (defaults to EMERGENCY_LEXICON)
+        """
+        lexicon = lexicon or EMERGENCY_LEXICON
+        # Padding with spaces makes every phrase match whole words only
+        self.matcher = AhoCorasick({
+            f" {normalize_message(phrase)} ": category
+            for category, phrases in lexicon.items() for phrase in phrases
+        })
+        self._lock = threading.Lock()
+        self.checks = 0
+        self.hits = 0
+        self.total_us = 0.0
+        self.max_us = 0.0
+        self.phrase_hits: Counter = Counter()
+
+    def match(self, message: str) -> Dict[str, List[str]]:
+        """Lexicon phrases found in a message, by category."""
+        found: Dict[str, List[str]] = {}
+        for _, phrase, category in self.matcher.finditer(f" {normalize_message(message)} "):
+            found.setdefault(category, []).append(phrase.strip())
+        return found
+
+    def detect(self, message: str) -> Optional[Dict]:
+        """
+        Check a message for an active emergency.
+
+        Returns:
+            None, or a dictionary with the matched 'phrases' and 'match_us'
+        """
+        started = time.perf_counter()
+        found = self.match(message)
+        emergency = bool(found.get('emergency')) or bool(found.get('symptom')) and (
+            bool(found.get('urgency')) or not found.get('informational')
+        )
+        elapsed_us = (time.perf_counter() - started) * 1_000_000
+
+        phrases = found.get('emergency', []) + found.get('symptom', []) if emergency else []
+        with self._lock:
+            self.checks += 1
+            self.total_us += elapsed_us
+            self.max_us = max(self.max_us, elapsed_us)
+            if emergency:
+                self.hits += 1
+                self.phrase_hits.update(phrases)
+
+        if not emergency:
+            return None
+        print(f"🚨 Emergency phrases {phrases} matched in {elapsed_us:.0f}µs")
+        return {'phrases': phrases, 'match_us': elapsed_us}
+
+    def stats(self) -> Dict:
+        """Check and hit counters, match latency and the most frequent phrases."""
+        with self._lock:
+            return {
+                'checks': self.checks,
+                'hits': self.hits,
+                'hit_ratio': self.hits / self.checks if self.checks else 0.0,
+                'mean_match_us': self.total_us / self.checks if self.checks else 0.0,
+                'max_match_us': self.max_us,
+                'top_phrases': dict(self.phrase_hits.most_common(10))
+            }
@@ -0,0 +1,239 @@
+"""
+Ingestion Queue Module
+Persistent, SQLite-backed job queue for document ingestion, drained by a
+pool of worker threads so uploads never wait on extraction or embedding.
+"""
+
+import json
+import sqlite3
+import threading
+import traceback
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+# Job lifecycle: queued -> extracting -> embedding -> indexed (or error)
+JOB_STATES = ('queued', 'extracting', 'embedding', 'indexed', 'error')
+ACTIVE_STATES = ('extracting', 'embedding')
+
+
+class IngestionQueue:
+    """
+    Durable queue of ingestion jobs.
+
+    Features:
+    - Jobs survive restarts (jobs interrupted mid-run are re-queued)
+    - Configurable number of worker threads
+    - Per-job state and chunk progress counters
+
+    The handler is called as ``handler(job, progress)`` where ``progress``
+    takes (stage, chunks_done, chunks_total); its return value is stored as
+    the job result. Raising marks the job as 'error'.
+    """
+
+    # Seconds an idle worker sleeps before checking for jobs queued elsewhere
+    POLL_INTERVAL = 2.0
+
+    def __init__(self, db_path: str, handler: Callable[[Dict, Callable[[str, int, int], None]], Any],
+                 workers: int = 2):
+        """
+        Initialize the queue and re-queue jobs interrupted by a restart.
+
+        Args:
+            db_path: SQLite file holding the jobs table
+            handler: Function that processes one job
+            workers: Number of worker threads
+        """
+        self.db_path = str(db_path)
+        self.handler = handler
+        self.workers = max(1, workers)
+        self._wake = threading.Condition()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._initialize_table()
+        self._requeue_interrupted()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _initialize_table(self):
+        """Create the jobs table if it doesn't exist."""
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS ingestion_jobs (
+                job_id TEXT PRIMARY KEY,
+                doc_id TEXT NOT NULL,
+                payload TEXT NOT NULL,  -- JSON passed to the handler
+                status TEXT NOT NULL,  -- 'queued', 'extracting', 'embedding', 'indexed', 'error'
+                chunks_done INTEGER NOT NULL DEFAULT 0,
+                chunks_total INTEGER NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,  -- JSON returned by the handler
+                error TEXT,
+                created_at TEXT NOT NULL,
+                started_at TEXT,
+                finished_at TEXT
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_status ON ingestion_jobs(status, created_at)")
+        conn.commit()
+        conn.close()
+
+    def _requeue_interrupted(self):
+        """Put jobs that were running when the process stopped back in the queue."""
+        conn = self._connect()
+        conn.execute(
+            f"UPDATE ingestion_jobs SET status = 'queued', chunks_done = 0 "
+            f"WHERE status IN ({','.join('?' * len(ACTIVE_STATES))})",
+            ACTIVE_STATES
+        )
+        conn.commit()
+        conn.close()
+
+    # ==================== PRODUCER SIDE ====================
+
+    def enqueue(self, doc_id: str, payload: Dict) -> str:
+        """
+        Add a job and wake a worker.
+
+        Args:
+            doc_id: Document the job ingests
+            payload: JSON-serializable job description for the handler
+
+        Returns:
+            job_id: ID of the new job
+        """
+        job_id = str(uuid.uuid4())
+        conn = self._connect()
+        conn.execute(
+            "INSERT INTO ingestion_jobs (job_id, doc_id, payload, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+            (job_id, doc_id, json.dumps(payload), datetime.now().isoformat())
+        )
+        conn.commit()
+        conn.close()
+
+        with self._wake:
+            self._wake.notify()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """
+        Get a job's state and progress.
+
+        Returns:
+            Job dictionary, or None if no such job exists
+        """
+        conn = self._connect()
+        row = conn.execute("SELECT * FROM ingestion_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        conn.close()
+        return self._row_to_job(row) if row else None
+
+    def list_jobs(self, limit: int = 50) -> List[Dict]:
+        """Most recent jobs first."""
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT * FROM ingestion_jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+        conn.close()
+        return [self._row_to_job(row) for row in rows]
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> Dict:
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        job['progress'] = job['chunks_done'] / job['chunks_total'] if job['chunks_total'] else (
+            1.0 if job['status'] == 'indexed' else 0.0
+        )
+        return job
+
+    # ==================== WORKER SIDE ====================
+
+    def _claim(self) -> Optional[Dict]:
+        """Atomically move the oldest queued job to 'extracting' and return it."""
+        conn = self._connect()
+        conn.isolation_level = None
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM ingestion_jobs WHERE status = 'queued' ORDER BY created_at, rowid LIMIT 1"
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            conn.execute(
+                "UPDATE ingestion_jobs SET status = 'extracting', attempts = attempts + 1, started_at = ? "
+                "WHERE job_id = ?",
+                (datetime.now().isoformat(), row['job_id'])
+            )
+            conn.execute("COMMIT")
+            return self._row_to_job(row)
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _update(self, job_id: str, **fields):
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        conn = self._connect()
+        conn.execute(f"UPDATE ingestion_jobs SET {assignments} WHERE job_id = ?", (*fields.values(), job_id))
+        conn.commit()
+        conn.close()
+
+    def _run(self, job: Dict):
+        """Process one claimed job and record the outcome."""
+        job_id = job['job_id']
+
+        def progress(stage: str, done: int, total: int):
+            if stage in ACTIVE_STATES:
+                self._update(job_id, status=stage, chunks_done=done, chunks_total=total)
+
+        try:
+            result = self.handler(job, progress)
+            self._update(job_id, status='indexed', result=json.dumps(result, default=str),
+                         error=None, finished_at=datetime.now().isoformat())
+            print(f"✅ Ingestion job {job_id[:8]} indexed")
+        except Exception as e:
+            traceback.print_exc()
+            self._update(job_id, status='error', error=str(e), finished_at=datetime.now().isoformat())
+            print(f"❌ Ingestion job {job_id[:8]} failed: {e}")
+
+    def _worker(self):
+        while not self._stop.is_set():
+            try:
+                job = self._claim()
+            except sqlite3.OperationalError as e:
+                print(f"⚠️  Ingestion queue unavailable: {e}")
+                job = None
+
+            if job is None:
+                with self._wake:
+                    self._wake.wait(self.POLL_INTERVAL)
+                continue
+
+            self._run(job)
+
+    def start(self):
+        """Start the worker threads (no-op if already running)."""
+        if self._threads:
+            return
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"ingestion-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(f"✓ Ingestion queue started with {self.workers} worker(s)")
+
+    def stop(self, timeout: float = 5.0):
+        """Ask workers to exit after their current job and wait for them."""
+        self._stop.set()
+        with self._wake:
+            self._wake.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
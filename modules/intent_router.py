@@ -0,0 +1,313 @@
+"""
+Intent Router Module
+Cheap local classification of chat messages in front of the RAG engine, so
+small talk gets a templated reply and booking requests go to the scheduler
+without an embedding call, a vector search or an LLM prompt.
+"""
+
+import pickle
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Routes: small talk and booking are answered locally, everything else is RAG
+FAST_INTENTS = ('greeting', 'thanks', 'goodbye', 'booking')
+MEDICAL = 'medical'
+
+# Whole-message small talk ("hi", "hello doctor, how are you?", "thanks a lot!")
+SMALL_TALK_PATTERNS = {
+    'greeting': re.compile(
+        r"(hi+|hello+|hey+|hiya|howdy|yo|greetings|good (morning|afternoon|evening|day)|"
+        r"(as+)?sala+m+( ?(o|u|-)? ?alaikum)?|salaam)"
+        r"( there| everyone| all)?( (doc|doctor|healthbot|bot|assistant))?"
+        r"( how are you( doing)?( today)?| hows it going| whats up)?"
+    ),
+    'thanks': re.compile(
+        r"((ok(ay)?|great|perfect|awesome|cool) )?(thanks+|thank (you|u)|thx|ty|much appreciated|jazakallah( khair)?)"
+        r"( (so|very) much| a lot| again| for (the|your|all the) help| for helping( me)?)*( (doc|doctor|healthbot))?"
+    ),
+    'goodbye': re.compile(
+        r"(ok(ay)? )?(bye+|goodbye|bye bye|see (you|ya)( later| soon)?|take care|good night|allah hafiz|khuda hafiz)"
+        r"( (doc|doctor|healthbot))?"
+    ),
+}
+
+# Appointment requests ("book me with Dr. Ayesha tomorrow", "any free slots on Monday?")
+BOOKING_PATTERN = re.compile(
+    r"\b(book|schedule|reschedule|arrange|set up|make|get|need|want)\b.{0,40}"
+    r"\b(appointment|consultation|visit|check ?-?up|slot|session)s?\b"
+    r"|\bbook\b.{0,20}\b(with|me|an?)\b"
+    r"|\b(appointment|slot|availability)s?\b.{0,30}\b(available|free|open|with dr)\b"
+    r"|\b(is|are) dr\.? \w+ (available|free)\b"
+)
+
+# Anything symptom-like goes to RAG even when it also mentions booking
+SYMPTOM_PATTERN = re.compile(
+    r"\b(pain|hurts?|ache|numb(ness)?|weak(ness)?|bleed(ing)?|dizz(y|iness)|faint(ed|ing)?|vomit(ing)?|"
+    r"fever|symptoms?|emergency|breath(e|ing)?|chest|slurred|droop(ing)?|seizure|unconscious|"
+    r"medicine|medication|dose|side effects?|should i|what (is|are|causes)|why|"
+    r"stroke|tia|tpa|thrombolysis|clot|rehab(ilitation)?|therapy|physiotherapy|recovery|survivors?|paraly(sis|zed))\b"
+)
+
+# Questions about whether or how often care is needed ("do I need a follow-up
+# appointment after tPA?") are medical questions, not booking requests
+CARE_QUESTION_PATTERN = re.compile(
+    r"\b(do|does|will|would|did) (i|we|you|he|she|they|my \w+|\w+ (survivors|patients)|patients?|people) "
+    r"(still |really |usually )?(need|have to|require)\b"
+    r"|\bhow (often|soon|long|many|frequently)\b|\b(should|must) (i|we|he|she|they|my \w+)\b"
+    r"|\bwhen (should|do|does)\b|\bis (it|a \w+) (necessary|needed|required|important)\b"
+)
+
+# Specialty words too generic to pick a doctor by
+GENERIC_SPECIALTY_TERMS = ('specialist', 'medicine', 'general')
+
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+
+SMALL_TALK_REPLIES = {
+    'greeting': "Hello! I'm HealthBot, your healthcare assistant. I can answer medical questions, "
+                "share health information and help you book an appointment. How can I help you today?",
+    'thanks': "You're welcome! Let me know if there's anything else I can help you with.",
+    'goodbye': "Take care! I'm here whenever you need help with your health or appointments.",
+}
+
+
+def normalize_message(message: str) -> str:
+    """Lowercase, drop punctuation and emoji, collapse whitespace."""
+    text = message.lower().replace("'", "").replace("’", "")
+    text = re.sub(r"[^\w\s.-]", " ", text)
+    text = re.sub(r"(?<!\bdr)\.|(?<!\d)-|-(?!\d)", " ", text)
+    return " ".join(text.split())
+
+
+def load_intent_model(path: str) -> Callable[[str], Tuple[str, float]]:
+    """
+    Load a pickled scikit-learn style text classifier (e.g. TF-IDF + logistic
+    regression) trained on the router's intent labels.
+
+    The model must provide ``predict_proba`` and ``classes_``.
+
+    Returns:
+        Function mapping a message to (intent, probability)
+    """
+    with open(path, 'rb') as f:
+        model = pickle.load(f)
+
+    def classify(message: str) -> Tuple[str, float]:
+        probabilities = model.predict_proba([message])[0]
+        best = max(range(len(probabilities)), key=lambda i: probabilities[i])
+        return str(model.classes_[best]), float(probabilities[best])
+
+    return classify
+
+
+class IntentRouter:
+    """
+    Routes chat messages to a fast path or to RAG.
+
+    Rules run first: whole-message small talk, then booking requests without
+    symptoms that do not ask whether or how often care is needed. Messages no rule claims go to the optional local model, whose
+    answer is only trusted above ``model_threshold``; everything else is a
+    medical question. Per-route counts and latencies are kept, and the
+    latency saved by a fast path is estimated against the mean RAG latency.
+    """
+
+    def __init__(self, classifier: Optional[Callable[[str], Tuple[str, float]]] = None,
+                 model_threshold: float = 0.8, max_fast_path_words: int = 40):
+        """
+        Initialize the router.
+
+        Args:
+            classifier: Optional local model mapping a message to (intent, probability)
+            model_threshold: Minimum probability to take a fast path on the model's word
+            max_fast_path_words: Longer messages always go to RAG
+        """
+        self.classifier = classifier
+        self.model_threshold = model_threshold
+        self.max_fast_path_words = max_fast_path_words
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict[str, float]] = {}
+        self._saved_ms = 0.0
+
+    def route(self, message: str) -> Dict:
+        """
+        Classify a message.
+
+        Returns:
+            Decision with 'intent', 'source' ('rule', 'model' or 'default'),
+            'rule' (the matching rule or model label), 'confidence' and 'route_ms'
+        """
+        started = time.perf_counter()
+        intent, source, rule, confidence = self._classify(message)
+        return {
+            'intent': intent,
+            'source': source,
+            'rule': rule,
+            'confidence': confidence,
+            'route_ms': (time.perf_counter() - started) * 1000
+        }
+
+    def _classify(self, message: str) -> Tuple[str, str, Optional[str], float]:
+        text = normalize_message(message)
+        if not text or len(text.split()) > self.max_fast_path_words:
+            return MEDICAL, 'default', None, 1.0
+
+        for intent, pattern in SMALL_TALK_PATTERNS.items():
+            if pattern.fullmatch(text):
+                return intent, 'rule', intent, 1.0
+
+        if BOOKING_PATTERN.search(text):
+            if SYMPTOM_PATTERN.search(text):
+                return MEDICAL, 'rule', 'booking_with_symptoms', 1.0
+            if CARE_QUESTION_PATTERN.search(text):
+                return MEDICAL, 'rule', 'booking_question', 1.0
+            return 'booking', 'rule', 'booking', 1.0
+
+        if self.classifier is not None:
+            try:
+                label, probability = self.classifier(message)
+                if label in FAST_INTENTS and probability >= self.model_threshold:
+                    return label, 'model', label, probability
+            except Exception as e:
+                print(f"⚠️  Intent model failed, using RAG: {e}")
+
+        return MEDICAL, 'default', None, 1.0
+
+    # ==================== METRICS ====================
+
+    def record(self, decision: Dict, elapsed_ms: float) -> None:
+        """
+        Record how long a routed message took end to end and log the decision.
+
+        Args:
+            decision: Result of ``route``
+            elapsed_ms: Time to answer the message on the route taken
+        """
+        intent = decision['intent']
+        with self._lock:
+            route = self._routes.setdefault(intent, {'count': 0, 'total_ms': 0.0})
+            route['count'] += 1
+            route['total_ms'] += elapsed_ms
+
+            rag = self._routes.get(MEDICAL)
+            saved_ms = None
+            if intent != MEDICAL and rag and rag['count']:
+                saved_ms = max(rag['total_ms'] / rag['count'] - elapsed_ms, 0.0)
+                self._saved_ms += saved_ms
+
+        saved = f", saved ~{saved_ms:.0f}ms vs RAG" if saved_ms is not None else ""
+        print(f"🧭 intent={intent} ({decision['source']}"
+              f"{': ' + decision['rule'] if decision['rule'] else ''}) "
+              f"route={decision['route_ms']:.2f}ms total={elapsed_ms:.0f}ms{saved}")
+
+    def stats(self) -> Dict:
+        """Per-route counts and mean latency, and total latency saved."""
+        with self._lock:
+            routes = {
+                intent: {'count': int(route['count']), 'mean_ms': route['total_ms'] / route['count']}
+                for intent, route in self._routes.items()
+            }
+            saved_ms = self._saved_ms
+        return {
+            'routes': routes,
+            'fast_path_messages': sum(r['count'] for i, r in routes.items() if i != MEDICAL),
+            'latency_saved_ms': saved_ms,
+            'model_enabled': self.classifier is not None
+        }
+
+
+# ==================== FAST-PATH REPLIES ====================
+
+def small_talk_reply(intent: str, greeting: Optional[str] = None) -> str:
+    """
+    Templated reply for a small-talk intent.
+
+    Args:
+        intent: 'greeting', 'thanks' or 'goodbye'
+        greeting: Personalized opening used instead of the generic greeting (optional)
+    """
+    if intent == 'greeting' and greeting:
+        return f"{greeting} How can I help you with your health today?"
+    return SMALL_TALK_REPLIES.get(intent, SMALL_TALK_REPLIES['greeting'])
+
+
+def parse_date(text: str, today: date) -> Optional[date]:
+    """Find a date in a message: YYYY-MM-DD, today, tomorrow, day after tomorrow or a weekday."""
+    iso = re.search(r"\b(\d{4}-\d{2}-\d{2})\b", text)
+    if iso:
+        try:
+            return datetime.strptime(iso.group(1), '%Y-%m-%d').date()
+        except ValueError:
+            return None
+    if "day after tomorrow" in text:
+        return today + timedelta(days=2)
+    if re.search(r"\b(tomorrow|tmrw|tmr)\b", text):
+        return today + timedelta(days=1)
+    if re.search(r"\b(today|tonight)\b", text):
+        return today
+    for index, name in enumerate(WEEKDAYS):
+        if re.search(rf"\b{name[:3]}({name[3:]})?\b", text):
+            return today + timedelta(days=(index - today.weekday()) % 7 or 7)
+    return None
+
+
+def match_doctor(text: str, doctors: List[Dict]) -> Optional[Dict]:
+    """Find the doctor a message names (by first or last name) or whose specialty it mentions."""
+    words = set(re.findall(r"[a-z]+", text.replace("'", "")))
+    for doctor in doctors:
+        names = re.findall(r"[a-z]+", doctor['name'].lower().replace("dr.", "").replace("'", ""))
+        if any(name in words for name in names if len(name) > 2):
+            return doctor
+    for doctor in doctors:
+        # "cardiologist" finds Cardiology, "neurologist" Neurology
+        stems = [term[:7] for term in re.findall(r"[a-z]+", doctor['specialty'].lower())
+                 if len(term) > 4 and term not in GENERIC_SPECIALTY_TERMS]
+        if any(word.startswith(stem) for stem in stems for word in words):
+            return doctor
+    return None
+
+
+def booking_reply(message: str, scheduler, today: date, max_slots: int = 6) -> Dict:
+    """
+    Answer a booking request from the scheduler: the doctor's free slots on
+    the requested date, or what is still missing to look them up.
+
+    Args:
+        message: The user's message
+        scheduler: AppointmentScheduler
+        today: Current date in the clinic's timezone
+        max_slots: Slots listed in the reply
+
+    Returns:
+        Dictionary with 'answer' and 'booking' (doctor_id, doctor, date, slots)
+    """
+    text = normalize_message(message)
+    doctors = scheduler.get_all_doctors()
+    doctor = match_doctor(text, doctors)
+    when = parse_date(text, today)
+    booking = {'doctor_id': doctor['doctor_id'] if doctor else None,
+               'doctor': doctor['name'] if doctor else None,
+               'date': when.isoformat() if when else None,
+               'slots': []}
+
+    if doctor is None:
+        listing = "\n".join(f"- {d['name']} ({d['specialty']})" for d in doctors)
+        answer = f"I can help you book an appointment. Which doctor would you like to see?\n{listing}"
+    elif when is None:
+        answer = f"Sure, I can book you with {doctor['name']} ({doctor['specialty']}). Which date works for you?"
+    elif when < today:
+        answer = f"{when.strftime('%B %d, %Y')} has already passed. Which upcoming date works for you?"
+    else:
+        slots = scheduler.get_doctor_availability(doctor['doctor_id'], when)
+        booking['slots'] = slots
+        day = when.strftime('%A, %B %d')
+        if slots:
+            times = ", ".join(slot['start_time'] for slot in slots[:max_slots])
+            more = f" and {len(slots) - max_slots} more" if len(slots) > max_slots else ""
+            answer = (f"{doctor['name']} has these times free on {day}: {times}{more}. "
+                      f"Pick a time to confirm your booking.")
+        else:
+            answer = f"{doctor['name']} has no free slots on {day}. Would another date work?"
+
+    return {'answer': answer, 'booking': booking}
@@ -9,6 +9,7 @@ import json
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
 from collections import Counter
+from pathlib import Path
 
 
 class MemoryManager:
@@ -26,6 +27,7 @@ class MemoryManager:
     def __init__(self, db_path: str = "data/healthcare.db"):
         """Initialize memory manager with database connection."""
         self.db_path = db_path
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
         self._initialize_preferences_table()
     
     def _initialize_preferences_table(self):
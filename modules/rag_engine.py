@@ -2,111 +2,1828 @@
 RAG Engine - Handles semantic search and answer generation for medical Q&A
 """
 
-import chromadb
-from chromadb.config import Settings
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Callable, AsyncIterator, Iterable, Iterator, Set, Tuple
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import copy
+import functools
+import itertools
+import json
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+import numpy as np
 from rich.console import Console
-from rich.panel import Panel
-from rich.markdown import Markdown
-import google.generativeai as genai
+import asyncio
 import sys
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from utils.embeddings import EmbeddingGenerator
+from utils.embeddings import EmbeddingGenerator, ThrottledEmbeddingClient
+from utils.embedding_cache import EmbeddingCache
+from utils.rate_limiter import AdaptiveRateLimiter, gemini_rate_limiter, is_throttle_error
+from utils.answer_cache import AnswerCache
+from utils.circuit_breaker import StageGuard, StageUnavailable
+from utils.lexical_index import BM25Index
+from utils.near_duplicates import NearDuplicateIndex
+from utils.document_manifest import DocumentManifest, file_content_hash, make_chunk_id
+from utils.context_selection import (
+    merge_adjacent, mmr_select, pack_to_budget, relevance_scores, shingle_containment
+)
 
 console = Console()
 
+# Chroma names each segment's directory after its UUID
+UUID_PATTERN = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+
+
+class VectorStore:
+    """
+    Minimal interface the RAG engine needs from a vector index.
+    
+    ``query`` returns results in ChromaDB's shape (lists of lists keyed by
+    'ids', 'documents', 'metadatas' and 'distances'), with squared L2
+    distances between unit vectors, so callers don't depend on the backend.
+    
+    Embeddings can optionally be truncated to their first ``dimensions``
+    components (Matryoshka-style; gemini-embedding-001 supports this) and
+    re-normalized before they are stored or queried.
+    """
+    
+    backend = "abstract"
+    
+    def __init__(self, dimensions: Optional[int] = None):
+        self.truncate_dimensions = dimensions
+    
+    def _truncate(self, embeddings: List[List[float]]) -> np.ndarray:
+        """Truncate (if configured) and L2-normalize embeddings as a float32 matrix."""
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if self.truncate_dimensions:
+            vectors = vectors[:, :self.truncate_dimensions]
+        return normalize_rows(vectors)
+    
+    def add(self, ids: List[str], embeddings: List[List[float]],
+            documents: List[str], metadatas: List[Dict], save: bool = True) -> None:
+        """Store chunks with their embeddings; ids that already exist are skipped."""
+        raise NotImplementedError
+    
+    def upsert(self, ids: List[str], embeddings: List[List[float]],
+               documents: List[str], metadatas: List[Dict], save: bool = True) -> None:
+        """
+        Store chunks, replacing any that already exist under the same id.
+        
+        With ``save=False`` a backend may keep the write in memory until the
+        next ``save`` (a crash then loses it, and the document is indexed again).
+        """
+        raise NotImplementedError
+    
+    def save(self) -> None:
+        """Persist writes made with ``save=False`` (backends that persist every write do nothing)."""
+    
+    def delete(self, ids: List[str]) -> None:
+        """Remove chunks by id (unknown ids are ignored)."""
+        raise NotImplementedError
+    
+    def query(self, query_embeddings: List[List[float]], n_results: int) -> Dict[str, List]:
+        """Nearest neighbours for each query embedding."""
+        raise NotImplementedError
+    
+    def count(self) -> int:
+        """Number of stored chunks."""
+        raise NotImplementedError
+    
+    def get(self, ids: Optional[List[str]] = None) -> Dict[str, List]:
+        """Stored chunks (all of them, or those in ``ids``) as 'ids', 'documents' and 'metadatas' lists."""
+        raise NotImplementedError
+    
+    def embeddings(self, ids: List[str]) -> np.ndarray:
+        """Stored unit vectors (in the search space) for ``ids``, one row each; zero rows for unknown ids."""
+        raise NotImplementedError
+    
+    def clear(self) -> None:
+        """Remove every stored chunk."""
+        raise NotImplementedError
+    
+    def drop(self) -> None:
+        """Delete the store itself, leaving nothing on disk."""
+        raise NotImplementedError
+    
+    def ids_where(self, key: str, value: Any) -> List[str]:
+        """Ids of chunks whose metadata ``key`` equals ``value``."""
+        raise NotImplementedError
+    
+    def compact(self) -> None:
+        """Rewrite storage so deleted chunks no longer take up space."""
+        raise NotImplementedError
+    
+    def disk_bytes(self) -> int:
+        """Bytes the store occupies on disk."""
+        raise NotImplementedError
+    
+    def stats(self) -> Dict:
+        """Storage details for get_stats()."""
+        return {'backend': self.backend, 'dimensions': self.truncate_dimensions}
+
+
+def directory_bytes(path: Path) -> int:
+    """Total size of the files under a directory."""
+    return sum(f.stat().st_size for f in Path(path).rglob('*') if f.is_file())
+
+
+def batched(items: Iterable, size: int) -> Iterator[List]:
+    """Group an iterable into lists of ``size`` items (the last may be shorter)."""
+    iterator = iter(items)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class VersionSwapped(Exception):
+    """Another index version started serving while a write to the previous one was being prepared."""
+
+
+def writes_index(method: Callable) -> Callable:
+    """Run a RAGEngine method that changes the serving index under the engine's write lock."""
+    @functools.wraps(method)
+    def locked(self, *args, **kwargs):
+        with self._write_lock:
+            return method(self, *args, **kwargs)
+    return locked
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize each row of a matrix (zero rows are left as zeros)."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+class ChromaVectorStore(VectorStore):
+    """VectorStore backed by a persistent ChromaDB collection (always float32)."""
+    
+    backend = "chroma"
+    
+    def __init__(self, persist_directory: Path, collection_name: str, precision: str = "float32",
+                 dimensions: Optional[int] = None, rescore: bool = False):
+        super().__init__(dimensions)
+        if precision != "float32":
+            console.print(f"  ⚠️  Chroma stores float32 only; ignoring precision={precision}", style="yellow")
+        
+        self.collection_name = collection_name
+        self.persist_directory = Path(persist_directory)
+        
+        # Imported here so the local backend (and anything importing this module) doesn't load Chroma
+        import chromadb
+        self.client = chromadb.PersistentClient(path=str(persist_directory))
+        
+        try:
+            self.collection = self.client.get_collection(name=collection_name)
+            console.print(f"  ✓ Loaded existing collection: {collection_name}", style="green")
+            console.print(f"  📊 Documents in collection: {self.collection.count()}", style="cyan")
+        except:
+            self.collection = self._create()
+            console.print(f"  ✓ Created new collection: {collection_name}", style="green")
+    
+    def _create(self):
+        return self.client.create_collection(
+            name=self.collection_name,
+            metadata={"description": "Medical documents about stroke"}
+        )
+    
+    def _prepare(self, embeddings):
+        if not self.truncate_dimensions:
+            return embeddings
+        return self._truncate(embeddings).tolist()
+    
+    def add(self, ids, embeddings, documents, metadatas, save=True) -> None:
+        self.collection.add(documents=documents, embeddings=self._prepare(embeddings),
+                            metadatas=metadatas, ids=ids)
+    
+    def upsert(self, ids, embeddings, documents, metadatas, save=True) -> None:
+        self.collection.upsert(documents=documents, embeddings=self._prepare(embeddings),
+                               metadatas=metadatas, ids=ids)
+    
+    def delete(self, ids) -> None:
+        if ids:
+            self.collection.delete(ids=list(ids))
+    
+    def query(self, query_embeddings, n_results) -> Dict[str, List]:
+        return self.collection.query(query_embeddings=self._prepare(query_embeddings), n_results=n_results)
+    
+    def count(self) -> int:
+        return self.collection.count()
+    
+    def get(self, ids=None) -> Dict[str, List]:
+        if ids is not None and not ids:
+            return {'ids': [], 'documents': [], 'metadatas': []}
+        return self.collection.get(ids=list(ids) if ids is not None else None,
+                                   include=['documents', 'metadatas'])
+    
+    def embeddings(self, ids) -> np.ndarray:
+        ids = list(ids)
+        stored = self.collection.get(ids=ids, include=['embeddings']) if ids else {'ids': []}
+        rows = {chunk_id: i for i, chunk_id in enumerate(stored['ids'])}
+        if not rows:
+            return np.zeros((len(ids), 0), dtype=np.float32)
+        vectors = normalize_rows(np.asarray(stored['embeddings'], dtype=np.float32))
+        result = np.zeros((len(ids), vectors.shape[1]), dtype=np.float32)
+        for i, chunk_id in enumerate(ids):
+            if chunk_id in rows:
+                result[i] = vectors[rows[chunk_id]]
+        return result
+    
+    def clear(self) -> None:
+        self.client.delete_collection(name=self.collection_name)
+        self.collection = self._create()
+    
+    def drop(self) -> None:
+        self.client.delete_collection(name=self.collection_name)
+    
+    def ids_where(self, key, value) -> List[str]:
+        return self.collection.get(where={key: value}, include=[])['ids']
+    
+    # Chunks copied per request when rebuilding the collection
+    COMPACT_BATCH = 1000
+    
+    def compact(self) -> None:
+        """
+        Copy the live chunks into a fresh collection and swap it in.
+        
+        Chroma does not shrink a collection's segment files on delete, so this
+        is the only way to drop the space held by deleted chunks. Afterwards,
+        segment directories that no collection references any more are
+        removed and the SQLite file is vacuumed.
+        """
+        stored = self.collection.get(include=['embeddings', 'documents', 'metadatas'])
+        staging_name = f"{self.collection_name}_compact"
+        try:
+            self.client.delete_collection(name=staging_name)  # left over from an interrupted run
+        except Exception:
+            pass
+        staging = self.client.create_collection(name=staging_name, metadata=self.collection.metadata)
+        
+        for i in range(0, len(stored['ids']), self.COMPACT_BATCH):
+            part = slice(i, i + self.COMPACT_BATCH)
+            staging.add(ids=stored['ids'][part], embeddings=stored['embeddings'][part],
+                        documents=stored['documents'][part], metadatas=stored['metadatas'][part])
+        
+        self.client.delete_collection(name=self.collection_name)
+        staging.modify(name=self.collection_name)
+        self.collection = self.client.get_collection(name=self.collection_name)
+        
+        try:
+            db_path = self.persist_directory / "chroma.sqlite3"
+            conn = sqlite3.connect(str(db_path), timeout=10)
+            try:
+                live_segments = {row[0] for row in conn.execute("SELECT id FROM segments")}
+                conn.execute("VACUUM")
+            finally:
+                conn.close()
+            
+            for path in self.persist_directory.iterdir():
+                if path.is_dir() and UUID_PATTERN.fullmatch(path.name) and path.name not in live_segments:
+                    shutil.rmtree(path)
+        except Exception as e:
+            console.print(f"  ⚠️  Could not reclaim Chroma storage: {e}", style="yellow")
+    
+    def disk_bytes(self) -> int:
+        # Chroma's SQLite file plus its per-segment directories; other files
+        # in the persist directory (caches, local indexes) are not Chroma's
+        return sum(
+            directory_bytes(path) if path.is_dir() else path.stat().st_size
+            for path in self.persist_directory.iterdir()
+            if path.name.startswith('chroma.sqlite3') or (path.is_dir() and path.name != 'local_index')
+        )
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process exact-search index.
+    
+    L2-normalized embeddings live in one contiguous matrix on disk
+    (memory-mapped read-only); ids, documents and metadata live in a JSON
+    sidecar (``index.json``). Top-k is one matrix-vector product plus
+    ``argpartition``.
+    
+    The matrix can be stored as float32, float16, or int8 with a per-vector
+    scale (``scales.f32``). With ``rescore`` enabled, the untruncated float32
+    vectors are kept in ``full.f32`` and the top candidates from the compact
+    matrix are re-ranked against them.
+    
+    Rows are append-only: replacing or deleting a chunk tombstones its old
+    row (listed under 'deleted' in the sidecar) so it is never returned.
+    Appends made with ``save=False`` only write the matrices; the sidecar is
+    rewritten on the next ``save``, and rows it doesn't list are dropped on
+    the next append after a crash.
+    """
+    
+    backend = "local"
+    
+    PRECISIONS = {
+        'float32': (np.float32, "vectors.f32"),
+        'float16': (np.float16, "vectors.f16"),
+        'int8': (np.int8, "vectors.i8"),
+    }
+    
+    # Candidates re-ranked at full precision per requested result
+    RESCORE_FACTOR = 4
+    
+    # Rows converted to float32 at a time when scoring compact matrices
+    SCORE_BLOCK_ROWS = 8192
+    
+    def __init__(self, persist_directory: Path, collection_name: str, precision: str = "float32",
+                 dimensions: Optional[int] = None, rescore: bool = False):
+        super().__init__(dimensions)
+        if precision not in self.PRECISIONS:
+            raise ValueError(f"Unknown precision: {precision} (expected one of {list(self.PRECISIONS)})")
+        
+        self.precision = precision
+        self.rescore = rescore
+        self.dtype, vectors_file = self.PRECISIONS[precision]
+        self.directory = Path(persist_directory) / "local_index" / collection_name
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.vectors_path = self.directory / vectors_file
+        self.scales_path = self.directory / "scales.f32"
+        self.full_path = self.directory / "full.f32"
+        self.sidecar_path = self.directory / "index.json"
+        self._lock = threading.Lock()
+        self._unsaved = False
+        self._load()
+        console.print(
+            f"  ✓ Loaded local index: {collection_name} ({self.count()} vectors, {precision}"
+            f"{f', {self.dimension} dims' if self.dimension else ''})",
+            style="green"
+        )
+    
+    def _load(self) -> None:
+        """Read the sidecar and memory-map the vector matrices."""
+        self._unsaved = False
+        if self.sidecar_path.exists():
+            with open(self.sidecar_path, 'r', encoding='utf-8') as f:
+                sidecar = json.load(f)
+        else:
+            sidecar = {'dimension': 0, 'ids': [], 'documents': [], 'metadatas': []}
+        
+        self.ids = sidecar['ids']
+        self.documents = sidecar['documents']
+        self.metadatas = sidecar['metadatas']
+        self.deleted = set(sidecar.get('deleted', []))
+        self.dimension = sidecar['dimension']
+        self.full_dimension = sidecar.get('full_dimension', 0)
+        
+        if self.ids:
+            layout = (sidecar.get('precision', 'float32'), sidecar.get('truncate_dimensions'),
+                      sidecar.get('rescore', False))
+            wanted = (self.precision, self.truncate_dimensions, self.rescore)
+            if layout != wanted:
+                raise ValueError(
+                    f"Local index at {self.directory} was built with (precision, dimensions, rescore)="
+                    f"{layout}, not {wanted}; rebuild it to change the storage format"
+                )
+        self._remap()
+    
+    def _remap(self) -> None:
+        """Index the live rows and memory-map the vector matrices at their current size."""
+        self.positions = {chunk_id: i for i, chunk_id in enumerate(self.ids) if i not in self.deleted}
+        rows = len(self.ids)
+        self.matrix = self._map(self.vectors_path, self.dtype, rows, self.dimension)
+        self.scales = self._map(self.scales_path, np.float32, rows, 1)[:, 0] if self.precision == 'int8' else None
+        self.full = self._map(self.full_path, np.float32, rows, self.full_dimension) if self.rescore else None
+        self.live = None
+        if self.deleted:
+            self.live = np.ones(rows, dtype=bool)
+            self.live[list(self.deleted)] = False
+    
+    @staticmethod
+    def _map(path: Path, dtype, rows: int, width: int) -> np.ndarray:
+        if rows == 0 or not width:
+            return np.zeros((0, width or 0), dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r', shape=(rows, width))
+    
+    @staticmethod
+    def _append(path: Path, rows: int, block: np.ndarray) -> None:
+        """Drop rows left behind by an interrupted write, then append a block."""
+        row_bytes = block.shape[1] * block.dtype.itemsize
+        with open(path, 'ab') as f:
+            f.truncate(rows * row_bytes)
+            f.write(np.ascontiguousarray(block).tobytes())
+    
+    def _save_sidecar(self) -> None:
+        self._unsaved = False
+        tmp_path = self.sidecar_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'dimension': self.dimension,
+                'full_dimension': self.full_dimension,
+                'precision': self.precision,
+                'truncate_dimensions': self.truncate_dimensions,
+                'rescore': self.rescore,
+                'deleted': sorted(self.deleted),
+                'ids': self.ids,
+                'documents': self.documents,
+                'metadatas': self.metadatas
+            }, f)
+        os.replace(tmp_path, self.sidecar_path)
+    
+    def _quantize(self, vectors: np.ndarray):
+        """Convert unit vectors to the storage precision; returns (matrix, scales)."""
+        if self.precision == 'int8':
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            quantized = np.round(vectors / scales[:, None]).astype(np.int8)
+            return quantized, scales.astype(np.float32)[:, None]
+        return vectors.astype(self.dtype), None
+    
+    def add(self, ids, embeddings, documents, metadatas, save=True) -> None:
+        """Append new vectors; ids that already exist are skipped, like Chroma's add."""
+        with self._lock:
+            self._append_rows([i for i, chunk_id in enumerate(ids) if chunk_id not in self.positions],
+                              ids, embeddings, documents, metadatas, save)
+    
+    def upsert(self, ids, embeddings, documents, metadatas, save=True) -> None:
+        """Append vectors, tombstoning the rows of ids that already exist."""
+        with self._lock:
+            self.deleted.update(self.positions[chunk_id] for chunk_id in ids if chunk_id in self.positions)
+            self._append_rows(list(range(len(ids))), ids, embeddings, documents, metadatas, save)
+    
+    def save(self) -> None:
+        with self._lock:
+            if self._unsaved:
+                self._save_sidecar()
+    
+    def delete(self, ids) -> None:
+        """Tombstone the rows of the given ids."""
+        with self._lock:
+            rows = {self.positions[chunk_id] for chunk_id in ids if chunk_id in self.positions}
+            if rows:
+                self.deleted.update(rows)
+                self._save_sidecar()
+                self._remap()
+    
+    def _append_rows(self, selected: List[int], ids, embeddings, documents, metadatas, save: bool) -> None:
+        """Write the selected items as new rows (caller holds the lock)."""
+        if not selected:
+            return
+        
+        raw = np.asarray([embeddings[i] for i in selected], dtype=np.float32)
+        vectors = self._truncate(raw)
+        if self.dimension and vectors.shape[1] != self.dimension:
+            raise ValueError(f"Embedding dimension {vectors.shape[1]} != index dimension {self.dimension}")
+        self.dimension = vectors.shape[1]
+        self.full_dimension = raw.shape[1]
+        
+        rows = len(self.ids)
+        matrix, scales = self._quantize(vectors)
+        self._append(self.vectors_path, rows, matrix)
+        if scales is not None:
+            self._append(self.scales_path, rows, scales)
+        if self.rescore:
+            self._append(self.full_path, rows, normalize_rows(raw))
+        
+        for i in selected:
+            self.ids.append(ids[i])
+            self.documents.append(documents[i])
+            self.metadatas.append(metadatas[i])
+        
+        if save:
+            self._save_sidecar()
+        else:
+            self._unsaved = True
+        self._remap()
+    
+    def _scores(self, matrix: np.ndarray, scales: Optional[np.ndarray], queries: np.ndarray) -> np.ndarray:
+        """Approximate cosine scores of every stored vector (rows) against unit queries (columns)."""
+        if matrix.dtype == np.float32:
+            return matrix @ queries
+        
+        scores = np.empty((len(matrix), queries.shape[1]), dtype=np.float32)
+        for start in range(0, len(matrix), self.SCORE_BLOCK_ROWS):
+            block = np.asarray(matrix[start:start + self.SCORE_BLOCK_ROWS], dtype=np.float32)
+            scores[start:start + len(block)] = block @ queries
+        if scales is not None:
+            scores *= scales[:, None]
+        return scores
+    
+    def query(self, query_embeddings, n_results) -> Dict[str, List]:
+        results = {'ids': [], 'documents': [], 'metadatas': [], 'distances': []}
+        matrix, scales, full, ids, live = self.matrix, self.scales, self.full, self.ids, self.live
+        live_count = len(self.positions)
+        k = min(n_results, live_count)
+        
+        if k == 0 or not len(query_embeddings):
+            for key in results:
+                results[key].extend([] for _ in query_embeddings)
+            return results
+        
+        # All queries in one pass over the matrix
+        all_scores = self._scores(matrix, scales, self._truncate(query_embeddings).T)
+        if live is not None:
+            all_scores[~live] = -np.inf
+        
+        for column, embedding in enumerate(query_embeddings):
+            scores = all_scores[:, column]
+            
+            if full is not None:
+                # Re-rank a wider candidate set against the full-precision vectors
+                candidates = min(live_count, k * self.RESCORE_FACTOR)
+                top = np.argpartition(-scores, candidates - 1)[:candidates]
+                exact = np.asarray(full[np.sort(top)]) @ normalize_rows(np.asarray([embedding], dtype=np.float32))[0]
+                scores = np.full(len(ids), -np.inf, dtype=np.float32)
+                scores[np.sort(top)] = exact
+            
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            
+            results['ids'].append([ids[i] for i in top])
+            results['documents'].append([self.documents[i] for i in top])
+            results['metadatas'].append([self.metadatas[i] for i in top])
+            # Squared L2 between unit vectors, matching Chroma's default metric
+            results['distances'].append([float(2.0 - 2.0 * scores[i]) for i in top])
+        
+        return results
+    
+    def count(self) -> int:
+        return len(self.positions)
+    
+    def get(self, ids=None) -> Dict[str, List]:
+        if ids is None:
+            rows = sorted(self.positions.values())
+        else:
+            rows = [self.positions[chunk_id] for chunk_id in ids if chunk_id in self.positions]
+        return {
+            'ids': [self.ids[i] for i in rows],
+            'documents': [self.documents[i] for i in rows],
+            'metadatas': [self.metadatas[i] for i in rows]
+        }
+    
+    def embeddings(self, ids) -> np.ndarray:
+        matrix, scales, positions = self.matrix, self.scales, self.positions
+        result = np.zeros((len(ids), self.dimension), dtype=np.float32)
+        for i, chunk_id in enumerate(ids):
+            row = positions.get(chunk_id)
+            if row is not None:
+                result[i] = np.asarray(matrix[row], dtype=np.float32) * (scales[row] if scales is not None else 1.0)
+        return normalize_rows(result)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self.matrix = self.full = self.scales = None
+            for path in (self.vectors_path, self.scales_path, self.full_path, self.sidecar_path):
+                if path.exists():
+                    path.unlink()
+            self._load()
+    
+    def drop(self) -> None:
+        with self._lock:
+            self.matrix = self.full = self.scales = None
+            shutil.rmtree(self.directory, ignore_errors=True)
+    
+    def ids_where(self, key, value) -> List[str]:
+        return [self.ids[i] for i in sorted(self.positions.values()) if self.metadatas[i].get(key) == value]
+    
+    def compact(self) -> None:
+        """Rewrite the matrices and sidecar without tombstoned rows."""
+        with self._lock:
+            if not self.deleted:
+                return
+            
+            rows = np.asarray(sorted(self.positions.values()), dtype=np.int64)
+            blocks = [(self.vectors_path, self.matrix)]
+            if self.scales is not None:
+                blocks.append((self.scales_path, self.scales[:, None]))
+            if self.full is not None:
+                blocks.append((self.full_path, self.full))
+            
+            for path, matrix in blocks:
+                tmp_path = path.with_suffix(path.suffix + '.tmp')
+                with open(tmp_path, 'wb') as f:
+                    f.write(np.ascontiguousarray(matrix[rows]).tobytes())
+                os.replace(tmp_path, path)
+            
+            self.ids = [self.ids[i] for i in rows]
+            self.documents = [self.documents[i] for i in rows]
+            self.metadatas = [self.metadatas[i] for i in rows]
+            self.deleted = set()
+            self._save_sidecar()
+            self._remap()
+    
+    def disk_bytes(self) -> int:
+        return directory_bytes(self.directory)
+    
+    def stats(self) -> Dict:
+        """Memory footprint of the search matrix and the optional rescoring copy."""
+        search_bytes = self.matrix.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+        return {
+            'backend': self.backend,
+            'precision': self.precision,
+            'dimensions': self.dimension,
+            'full_dimensions': self.full_dimension,
+            'rescore': self.rescore,
+            'vectors': self.count(),
+            'deleted_rows': len(self.deleted),
+            'search_bytes': int(search_bytes),
+            'rescore_bytes': int(self.full.nbytes) if self.full is not None else 0
+        }
+
+
+VECTOR_STORES = {
+    ChromaVectorStore.backend: ChromaVectorStore,
+    LocalVectorStore.backend: LocalVectorStore,
+}
+
+
+class IndexVersion:
+    """
+    One build of the index under one physical name: the vector store, the
+    BM25 index, near-duplicate signatures and document manifest, plus the
+    embedding generator whose model produced the stored vectors.
+    
+    RAGEngine serves from one version at a time (``RAGEngine.active``). A
+    request takes the version once and uses it throughout, so swapping in a
+    rebuilt version never mixes two indexes in one answer.
+    """
+    
+    def __init__(self, name: str, settings: Dict[str, Any], collection: VectorStore, lexical_index: BM25Index,
+                 manifest: DocumentManifest, near_duplicates: Optional[NearDuplicateIndex],
+                 embedding_generator: EmbeddingGenerator):
+        self.name = name
+        self.settings = settings
+        self.collection = collection
+        self.lexical_index = lexical_index
+        self.manifest = manifest
+        self.near_duplicates = near_duplicates
+        self.embedding_generator = embedding_generator
+    
+    def files(self) -> List[Path]:
+        """Sidecar files kept next to the vector store."""
+        return [self.lexical_index.path, self.manifest.path] + (
+            [self.near_duplicates.path] if self.near_duplicates is not None else []
+        )
+    
+    def drop(self) -> None:
+        """Delete the vector store and every sidecar file of this version."""
+        self.collection.drop()
+        for path in self.files():
+            if path.exists():
+                path.unlink()
+    
+    def describe(self) -> Dict[str, Any]:
+        return {'name': self.name, 'settings': self.settings, 'chunks': self.collection.count(),
+                'documents': len(self.manifest.keys())}
+
 
 class RAGEngine:
     """Retrieval-Augmented Generation engine for medical Q&A."""
     
-    def __init__(self, collection_name: str, persist_directory: str, api_key: str, model_name: str, system_prompt: str = None):
+    # Slightly higher temperature than TEMPERATURE for natural, conversational responses
+    GENERATION_CONFIG = {
+        'temperature': 0.3,
+        'max_output_tokens': 1024,
+    }
+    
+    SEARCH_MODES = ("vector", "lexical", "hybrid")
+    
+    # Reciprocal-rank fusion constant; 60 is the value from the original RRF paper
+    RRF_K = 60
+    
+    # Candidates this close to an already chosen passage are not sent again
+    # (embedding cosine, or share of word 3-grams found in the other passage)
+    DUPLICATE_SIMILARITY = 0.97
+    DUPLICATE_TEXT_OVERLAP = 0.5
+    
+    # Context used when retrieval finds nothing, so the LLM still answers
+    NO_DOCUMENTS_CONTEXT = "No specific medical documents available. Use your general medical knowledge."
+    
+    # Query embedded and searched by warm_up
+    WARM_UP_QUERY = "What are the warning signs of a stroke?"
+    
+    # Per-stage deadlines (seconds) of an async chat request; the embedding
+    # stage defaults to lexical_fallback_timeout
+    STAGE_TIMEOUTS = {
+        'history': 1.0,
+        'embedding': None,
+        'search': 2.0,
+        'generation': 20.0,
+    }
+    
+    # Degraded answers quote this many characters of each passage
+    DEGRADED_PASSAGE_CHARS = 600
+    DEGRADED_INTRO = ("The AI assistant is temporarily unavailable, so here are the most relevant passages "
+                      "from our medical library:")
+    UNAVAILABLE_ANSWER = ("The AI assistant is temporarily unavailable. Please try again in a few minutes. "
+                          "If you have symptoms of a stroke, call emergency services right away.")
+    
+    # Shadow comparisons queued at most; queries beyond that aren't compared
+    SHADOW_MAX_PENDING = 32
+    
+    # Shadowed queries with differing top results kept for inspection
+    SHADOW_SAMPLES = 20
+    
+    def __init__(self, collection_name: str, persist_directory: str, api_key: str, model_name: str, system_prompt: str = None,
+                 embedding_cache_path: Optional[str] = None, embedding_cache_size: int = 100_000,
+                 answer_cache_size: int = 512, answer_cache_ttl: float = 3600,
+                 answer_cache_similarity: Optional[float] = 0.95, vector_backend: str = "chroma",
+                 search_mode: str = "hybrid", lexical_fallback_timeout: float = 3.0,
+                 embedding_dimensions: int = 3072, vector_precision: str = "float32",
+                 vector_dimensions: Optional[int] = None, vector_rescore: bool = False,
+                 retrieval_candidates: int = 20, mmr_lambda: Optional[float] = 0.85,
+                 context_token_budget: Optional[int] = 700,
+                 rate_limiter: Optional[AdaptiveRateLimiter] = None,
+                 stage_timeouts: Optional[Dict[str, Optional[float]]] = None,
+                 circuit_failure_threshold: int = 5, circuit_reset_seconds: float = 30.0,
+                 near_duplicate_threshold: Optional[float] = 0.85,
+                 embedding_model: str = "models/gemini-embedding-001"):
+        """
+        Initialize the RAG engine.
+        
+        Args:
+            collection_name: Name of the ChromaDB collection
+            persist_directory: Directory to persist the vector database
+            api_key: Google API key for Gemini
+            model_name: Gemini model name
+            system_prompt: System prompt for answer generation (optional)
+            embedding_cache_path: SQLite file for the embedding cache (defaults to persist_directory)
+            embedding_cache_size: Maximum cached embeddings before LRU eviction
+            answer_cache_size: Maximum cached answers (0 disables the answer cache)
+            answer_cache_ttl: Seconds before a cached answer expires
+            answer_cache_similarity: Cosine similarity for semantic answer cache hits
+                (None matches only identical normalized questions)
+            vector_backend: Vector index backend, "chroma" or "local"
+            search_mode: Default retrieval mode, "vector", "lexical" or "hybrid"
+            lexical_fallback_timeout: Seconds to wait for a query embedding in aquery
+                before answering from the lexical index alone
+            embedding_dimensions: Output size of the embedding model
+            vector_precision: Storage precision for the local backend,
+                "float32", "float16" or "int8"
+            vector_dimensions: Keep only the first N embedding dimensions
+                (Matryoshka truncation; None keeps all of them)
+            vector_rescore: Re-rank the top candidates against full-precision,
+                untruncated vectors (local backend only)
+            retrieval_candidates: Candidates retrieved for context selection
+            mmr_lambda: Relevance/diversity trade-off for MMR over the candidates
+                (None passes the top results through unchanged)
+            context_token_budget: Maximum estimated tokens of context in the prompt
+                (None for no limit)
+            rate_limiter: Limiter for every Gemini call, embeddings included
+                (defaults to the process-wide one)
+            stage_timeouts: Overrides of STAGE_TIMEOUTS for the async pipeline
+                (None for a stage means no deadline)
+            circuit_failure_threshold: Consecutive failures of a stage before
+                its circuit opens and requests skip it
+            circuit_reset_seconds: Seconds an open circuit waits before a trial call
+            near_duplicate_threshold: Estimated Jaccard similarity at which a new
+                chunk reuses the embedding of a chunk of another document instead
+                of being embedded (None disables the check)
+            embedding_model: Gemini embedding model
+        
+        The index settings (embedding model and dimensions, vector backend,
+        precision, truncation and rescoring) apply to new index versions. The
+        version being served keeps the settings it was built with, recorded
+        in "<collection_name>_alias.json"; see ``rebuild_index``.
+        """
+        self.collection_name = collection_name
+        self.persist_directory = Path(persist_directory)
+        self.persist_directory.mkdir(parents=True, exist_ok=True)
+        self.system_prompt = system_prompt or "You are a helpful medical education assistant."
+        self.api_key = api_key
+        
+        # Initialize Gemini; generation and embedding share one rate limiter
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+        self.rate_limiter = rate_limiter or gemini_rate_limiter()
+        
+        # Persistent embedding cache, shared by every index version, so
+        # unchanged text is never embedded twice by the same model
+        self.embedding_cache = EmbeddingCache(
+            embedding_cache_path or str(self.persist_directory / "embedding_cache.db"),
+            max_entries=embedding_cache_size
+        )
+        
+        # Cache of generated answers; cleared whenever the collection changes
+        self.answer_cache = AnswerCache(
+            max_entries=answer_cache_size,
+            ttl_seconds=answer_cache_ttl,
+            similarity_threshold=answer_cache_similarity
+        ) if answer_cache_size > 0 else None
+        
+        if search_mode not in self.SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {search_mode} (expected one of {self.SEARCH_MODES})")
+        self.search_mode = search_mode
+        self.lexical_fallback_timeout = lexical_fallback_timeout
+        
+        # Deadline and circuit breaker per stage of aquery / astream_query
+        timeouts = {**self.STAGE_TIMEOUTS, 'embedding': lexical_fallback_timeout, **(stage_timeouts or {})}
+        self.stages = {
+            stage: StageGuard(stage, timeout, circuit_failure_threshold, circuit_reset_seconds)
+            for stage, timeout in timeouts.items()
+        }
+        
+        # Post-retrieval context selection (see select_context)
+        self.retrieval_candidates = retrieval_candidates
+        self.mmr_lambda = mmr_lambda
+        self.context_token_budget = context_token_budget
+        self.near_duplicate_threshold = near_duplicate_threshold
+        
+        # Serve the version the alias points at (the collection itself until
+        # the first rebuild), with the settings it was built with
+        self.configured_settings = {
+            'embedding_model': embedding_model,
+            'embedding_dimensions': embedding_dimensions,
+            'vector_backend': vector_backend,
+            'vector_precision': vector_precision,
+            'vector_dimensions': vector_dimensions,
+            'vector_rescore': vector_rescore
+        }
+        self.alias_path = self.persist_directory / f"{collection_name}_alias.json"
+        self._alias_lock = threading.Lock()
+        alias = self._read_alias()
+        settings = {**self.configured_settings, **alias.get('settings', {})}
+        if settings != self.configured_settings:
+            console.print(f"  ⚠️  Index {alias['active']} was built with other settings than configured; "
+                          f"serving it as built until rebuild_index", style="yellow")
+        self.active = self._open_version(alias.get('active', collection_name), settings)
+        if not alias:
+            self._update_alias(active=self.active.name, settings=self.active.settings)
+        
+        # Held while writes are stored in the serving version (text extraction
+        # and embedding happen outside it) and by activate_version while it swaps
+        self._write_lock = threading.RLock()
+        # Chunk ids written so far by documents still being indexed, by doc key
+        self._ingesting: Dict[str, Set[str]] = {}
+        self._legacy_sources: Optional[Dict[str, List[str]]] = None
+        self._legacy_lock = threading.Lock()
+        
+        # Version compared against the serving one on live queries (see start_shadow)
+        self.shadow: Optional[IndexVersion] = None
+        self.shadow_report: Dict[str, Any] = {}
+        self._shadow_pool: Optional[ThreadPoolExecutor] = None
+        self._shadow_pending = 0
+        self._shadow_lock = threading.Lock()
+    
+    # The serving version's parts; activate_version swaps them all at once
+    
+    @property
+    def collection(self) -> VectorStore:
+        return self.active.collection
+    
+    @property
+    def lexical_index(self) -> BM25Index:
+        return self.active.lexical_index
+    
+    @property
+    def manifest(self) -> DocumentManifest:
+        return self.active.manifest
+    
+    @property
+    def near_duplicates(self) -> Optional[NearDuplicateIndex]:
+        return self.active.near_duplicates
+    
+    @property
+    def embedding_generator(self) -> EmbeddingGenerator:
+        return self.active.embedding_generator
+    
+    def add_documents(self, chunks: List[Dict[str, Any]],
+                      progress: Optional[Callable[[int, int], None]] = None) -> int:
+        """
+        Add or update document chunks in the vector database.
+        
+        Chunks are upserted under their own ``id`` (see
+        ``DocumentProcessor.process_document``); chunks already stored with the
+        same text and metadata are skipped without being re-embedded. A chunk
+        that nearly repeats a chunk of another document is stored with its own
+        text and metadata but reuses that chunk's embedding instead of being
+        embedded again; the other chunk's id is set as its ``duplicate_of``.
+        
+        Embeddings are generated without holding the write lock, which is
+        only taken to store them.
+        
+        Args:
+            chunks: List of document chunks with text and metadata
+            progress: Called with (chunks done, total chunks) while embedding (optional)
+            
+        Returns:
+            Number of chunks written
+        """
+        if not chunks:
+            print("⚠️  No chunks to add")
+            return 0
+        return self._on_serving_version(lambda version: self._add_chunks(version, chunks, progress))
+    
+    def _on_serving_version(self, write: Callable[[IndexVersion], Any]) -> Any:
+        """Run ``write`` against the serving version, again if another one starts serving before it is stored."""
+        while True:
+            version = self.active
+            try:
+                return write(version)
+            except VersionSwapped:
+                console.print(f"  ↻ Index {version.name} stopped serving during a write; repeating it on "
+                              f"{self.active.name}", style="yellow")
+    
+    def _check_serving(self, version: IndexVersion) -> None:
+        """Raise VersionSwapped unless ``version`` still serves (caller holds the write lock)."""
+        if version is not self.active:
+            raise VersionSwapped(version.name)
+    
+    def _add_chunks(self, version: IndexVersion, chunks: List[Dict[str, Any]],
+                    progress: Optional[Callable[[int, int], None]] = None,
+                    written_ids: Optional[Set[str]] = None, save: bool = True) -> int:
+        """
+        add_documents against one version: embed outside the write lock, then store under it.
+        
+        Args:
+            version: Version the embeddings are made for
+            chunks: Non-empty list of document chunks
+            progress: As for add_documents
+            written_ids: Set the ids of the batch are added to while the lock is held (optional)
+            save: Persist the stores now; otherwise the caller calls _save_indexes
+            
+        Returns:
+            Number of chunks written
+            
+        Raises:
+            VersionSwapped: ``version`` stopped serving before the chunks were stored
+        """
+        # Later duplicates of an id win, as they would with successive upserts
+        by_id: Dict[str, Dict[str, Any]] = {}
+        for i, chunk in enumerate(chunks):
+            chunk_id = chunk.get('id') or make_chunk_id(
+                EmbeddingCache.text_hash(f"{chunk.get('metadata', {}).get('source', '')}\0{chunk['text']}"),
+                chunk.get('chunk_index', i)
+            )
+            by_id[chunk_id] = chunk
+        
+        stored = version.collection.get(ids=list(by_id))
+        unchanged = {
+            chunk_id for chunk_id, text, metadata in zip(stored['ids'], stored['documents'], stored['metadatas'])
+            if text == by_id[chunk_id]['text'] and metadata == by_id[chunk_id].get('metadata', {})
+        }
+        ids = [chunk_id for chunk_id in by_id if chunk_id not in unchanged]
+        links, vectors = self._link_near_duplicates(version, by_id, ids)
+        pending = [chunk_id for chunk_id in ids if chunk_id not in links]
+        skipped = len(unchanged) + len(links)
+        
+        print(f"📦 Processing {len(by_id)} chunks ({len(unchanged)} unchanged, {len(links)} near-duplicates)...")
+        if progress is not None:
+            progress(skipped, len(by_id))
+        
+        # Extract texts and prepare data for the vector store
+        texts = [by_id[chunk_id]['text'] for chunk_id in ids]
+        metadatas = [by_id[chunk_id].get('metadata', {}) for chunk_id in ids]
+        
+        # Generate embeddings using our custom embedding generator
+        if pending:
+            print("🔄 Generating embeddings...")
+            embeddings = version.embedding_generator.generate_batch(
+                [by_id[chunk_id]['text'] for chunk_id in pending],
+                progress=(lambda done, total: progress(skipped + done, len(by_id))) if progress else None
+            )
+            
+            if not embeddings:
+                print("❌ Failed to generate embeddings")
+                return 0
+            vectors.update(zip(pending, embeddings))
+        
+        # Near-duplicates reuse the embedding of the chunk they repeat
+        embeddings = [vectors[links.get(chunk_id, chunk_id)] for chunk_id in ids]
+        
+        with self._write_lock:
+            self._check_serving(version)
+            if written_ids is not None:
+                written_ids.update(by_id)
+            if not ids:
+                return 0
+            
+            # Upsert into the vector store
+            print("💾 Storing in vector database...")
+            version.collection.upsert(
+                documents=texts,
+                embeddings=embeddings,
+                metadatas=metadatas,
+                ids=ids,
+                save=save
+            )
+            version.lexical_index.upsert(ids, texts, metadatas, save=save)
+            if version.near_duplicates is not None:
+                version.near_duplicates.add(ids, texts, [self._chunk_group(metadata) for metadata in metadatas],
+                                            save=save)
+            self._invalidate_answers()
+        
+        print(f"✅ Successfully stored {len(ids)} chunks in vector database")
+        return len(ids)
+    
+    @staticmethod
+    def _save_indexes(version: IndexVersion) -> None:
+        """Persist a version's stores after writes made with save=False (caller holds the write lock)."""
+        version.collection.save()
+        version.lexical_index.save()
+        if version.near_duplicates is not None:
+            version.near_duplicates.save()
+    
+    @staticmethod
+    def _chunk_group(metadata: Optional[Dict[str, Any]]) -> str:
+        """Document a chunk belongs to, for near-duplicate checks."""
+        metadata = metadata or {}
+        return str(metadata.get('doc_id') or metadata.get('source', ''))
+    
+    def _link_near_duplicates(self, version: IndexVersion, by_id: Dict[str, Dict[str, Any]],
+                              ids: List[str]) -> Tuple[Dict[str, str], Dict[str, List[float]]]:
+        """
+        Match chunks about to be written to near-identical chunks of other
+        documents, whose embedding they can reuse.
+        
+        Candidates are the stored chunks whose embedding is still in the
+        embedding cache, and the chunks before them in ``ids``. Matched chunks
+        get the matching chunk's id as 'duplicate_of'; they are still stored
+        under their own id, so their text is what gets retrieved and removing
+        either document leaves the other intact.
+        
+        Returns:
+            Mapping of chunk id to the id of the chunk it repeats, and the
+            cached embeddings of the stored chunks matched
+        """
+        cache = version.embedding_generator.cache
+        if version.near_duplicates is None or cache is None:
+            return {}, {}
+        
+        pending = NearDuplicateIndex(threshold=version.near_duplicates.threshold)
+        links: Dict[str, str] = {}
+        vectors: Dict[str, List[float]] = {}
+        for chunk_id in ids:
+            chunk = by_id[chunk_id]
+            group = self._chunk_group(chunk.get('metadata'))
+            match = version.near_duplicates.find(chunk['text'], group, exclude=chunk_id)
+            if match is not None and match[0] not in vectors:
+                stored = version.collection.get(ids=[match[0]])['documents']
+                vector = cache.get(version.embedding_generator.model_name, "retrieval_document",
+                                   stored[0]) if stored else None
+                if vector is None:
+                    match = None
+                else:
+                    vectors[match[0]] = vector
+            match = match or pending.find(chunk['text'], group)
+            if match is None:
+                pending.add([chunk_id], [chunk['text']], [group], save=False)
+            else:
+                links[chunk_id] = chunk['duplicate_of'] = match[0]
+        return links, vectors
+    
+    @writes_index
+    def delete_chunks(self, ids: List[str]) -> None:
+        """Remove chunks from the vector store and the lexical index."""
+        ids = list(ids)
+        if not ids:
+            return
+        self.collection.delete(ids)
+        self.lexical_index.remove(ids)
+        if self.near_duplicates is not None:
+            self.near_duplicates.remove(ids)
+        self._invalidate_answers()
+    
+    def _legacy_chunk_ids(self, source: str) -> List[str]:
+        """Ids of chunks from the same source stored before chunk ids were content-derived."""
+        with self._legacy_lock:
+            if self._legacy_sources is None:
+                self._legacy_sources = {}
+                stored = self.collection.get()
+                for chunk_id, metadata in zip(stored['ids'], stored['metadatas']):
+                    if 'content_hash' not in (metadata or {}):
+                        self._legacy_sources.setdefault(metadata.get('source', ''), []).append(chunk_id)
+            return self._legacy_sources.pop(source, [])
+    
+    def _protected_ids(self, exclude: Optional[str] = None) -> Set[str]:
+        """Chunk ids listed in the manifest or written by documents still being indexed (caller holds the write lock)."""
+        ids = self.manifest.referenced_ids(exclude=exclude)
+        for doc_key, chunk_ids in self._ingesting.items():
+            if doc_key != exclude:
+                ids |= chunk_ids
+        return ids
+    
+    def is_document_current(self, doc_key: str, content_hash: str, processor,
+                            index: Optional[IndexVersion] = None) -> bool:
+        """Whether a document is indexed with this content and chunking, with all its chunks present."""
+        version = index or self.active
+        if not version.manifest.is_current(doc_key, content_hash, processor.chunking_settings()):
+            return False
+        chunk_ids = set(version.manifest.get(doc_key)['chunk_ids'])
+        stored = version.collection.get(ids=list(chunk_ids))
+        # Chunks of another document's content (near-duplicate links made by
+        # earlier versions) need the document indexed again
+        return len(stored['ids']) == len(chunk_ids) and all(
+            (metadata or {}).get('content_hash', content_hash) == content_hash for metadata in stored['metadatas']
+        )
+    
+    def index_document(self, doc_key: str, filepath: str, processor,
+                       progress: Optional[Callable[[str, int, int], None]] = None,
+                       **document_info) -> Dict[str, Any]:
+        """
+        Index one document incrementally.
+        
+        Unchanged documents (same content hash and chunking settings, chunks
+        still present) are skipped before any text extraction. Otherwise the
+        document is streamed through the chunker and embedded one batch at a
+        time, and chunks from its previous version that no other document
+        shares are deleted. Chunks that nearly repeat a chunk of another
+        document reuse its embedding (see ``add_documents``).
+        
+        Extraction and embedding run without the write lock, so documents
+        can be indexed in parallel and deletions and compaction only wait
+        for the batch being stored. If another version starts serving
+        meanwhile, the document is indexed again into it.
+        
+        Args:
+            doc_key: Stable key for the document (upload id or relative path)
+            filepath: Path to the document
+            processor: DocumentProcessor used to load and chunk it
+            progress: Called with (stage, chunks done, total chunks), where stage
+                is 'extracting' or 'embedding' (optional)
+            **document_info: Passed to ``iter_document_chunks`` (doc_type, author,
+                url, or pre-extracted text)
+            
+        Returns:
+            Dictionary with 'status' ('unchanged' or 'indexed'), 'chunks',
+            'written', 'deduplicated' and 'removed' counts
+        """
+        content_hash = file_content_hash(filepath)
+        return self._on_serving_version(lambda version: self._index_document(
+            version, doc_key, filepath, content_hash, processor, progress, document_info
+        ))
+    
+    def _index_document(self, version: IndexVersion, doc_key: str, filepath: str, content_hash: str,
+                        processor, progress: Optional[Callable[[str, int, int], None]],
+                        document_info: Dict[str, Any]) -> Dict[str, Any]:
+        """index_document against one version (raises VersionSwapped if it stops serving)."""
+        if self.is_document_current(doc_key, content_hash, processor, index=version):
+            return {'status': 'unchanged', 'chunks': len(version.manifest.get(doc_key)['chunk_ids']),
+                    'written': 0, 'deduplicated': 0, 'removed': 0}
+        
+        if progress is not None:
+            progress('extracting', 0, 0)
+        
+        # Chunks written so far are kept out of compaction and of other
+        # documents' deletions until the manifest lists them
+        written_ids: Set[str] = set()
+        with self._write_lock:
+            self._ingesting[doc_key] = written_ids
+        written = deduplicated = 0
+        try:
+            # Stream chunks and embed them a batch at a time, so memory is bounded
+            # by one batch however large the document is. The total reported to
+            # ``progress`` is the number of chunks seen so far. The stores are
+            # written to disk once per document rather than once per batch.
+            generator = version.embedding_generator
+            batch_size = generator.batch_size * generator.max_concurrency
+            chunk_ids: List[str] = []
+            chunks = processor.iter_document_chunks(filepath, content_hash=content_hash, **document_info)
+            for batch in batched(chunks, batch_size):
+                offset = len(chunk_ids)
+                for chunk in batch:
+                    chunk['metadata']['doc_id'] = doc_key
+                
+                embedding_progress = (
+                    lambda done, total, offset=offset: progress('embedding', offset + done, offset + total)
+                ) if progress else None
+                written += self._add_chunks(version, batch, progress=embedding_progress, written_ids=written_ids,
+                                            save=False)
+                
+                for chunk in batch:
+                    chunk_ids.append(chunk['id'])
+                    deduplicated += 'duplicate_of' in chunk
+            
+            with self._write_lock:
+                self._check_serving(version)
+                previous = self.manifest.get(doc_key)
+                stale = set(previous['chunk_ids']) if previous else set(self._legacy_chunk_ids(Path(filepath).stem))
+                stale -= set(chunk_ids) | self._protected_ids(exclude=doc_key)
+                self.delete_chunks(sorted(stale))
+                self.manifest.set(doc_key, str(filepath), content_hash, processor.chunking_settings(), chunk_ids)
+        finally:
+            with self._write_lock:
+                if written:
+                    self._save_indexes(version)
+                if self._ingesting.get(doc_key) is written_ids:
+                    del self._ingesting[doc_key]
+        
+        if deduplicated:
+            print(f"🔁 {deduplicated} of {len(chunk_ids)} chunks ({deduplicated / len(chunk_ids):.0%}) "
+                  f"reused a near-duplicate's embedding")
+        return {'status': 'indexed', 'chunks': len(chunk_ids), 'written': written,
+                'deduplicated': deduplicated, 'removed': len(stale)}
+    
+    @writes_index
+    def remove_document(self, doc_key: str, source: Optional[str] = None) -> int:
+        """
+        Delete a document's chunks (except any shared with other documents).
+        
+        Chunks are found through the manifest and the 'doc_id' metadata tag;
+        ``source`` additionally removes chunks stored under the old id schemes.
+        
+        Args:
+            doc_key: Key the document was indexed under (upload id or relative path)
+            source: The document's 'source' metadata value, for legacy chunks (optional)
+            
+        Returns:
+            Number of chunks deleted
+        """
+        entry = self.manifest.remove(doc_key)
+        ids = set(entry['chunk_ids']) if entry else set()
+        ids.update(self.collection.ids_where('doc_id', doc_key))
+        if source:
+            ids.update(self._legacy_chunk_ids(source))
+        
+        stale = ids - self._protected_ids(exclude=doc_key)
+        self.delete_chunks(sorted(stale))
+        return len(stale)
+    
+    def index_directory(self, directory: str, processor) -> Dict[str, int]:
+        """
+        Bring the index in line with a directory of documents.
+        
+        New and changed files are indexed, unchanged files are skipped and
+        files that have disappeared are removed. Documents are keyed by
+        "<directory name>/<relative path>". With one worker, changed files are
+        streamed page by page; with more, they are extracted ``workers`` at a
+        time in parallel with ``processor.load_documents``.
+        
+        Args:
+            directory: Path to directory containing documents
+            processor: DocumentProcessor used to load and chunk files
+            
+        Returns:
+            Counts of 'indexed', 'unchanged', 'removed' and 'failed' documents
+        """
+        dir_path = Path(directory)
+        summary = {'indexed': 0, 'unchanged': 0, 'removed': 0, 'failed': 0}
+        prefix = f"{dir_path.name}/"
+        seen = set()
+        chunks = deduplicated = 0
+        
+        changed = []
+        for filepath in processor.find_documents(directory):
+            doc_key = prefix + filepath.relative_to(dir_path).as_posix()
+            seen.add(doc_key)
+            content_hash = file_content_hash(str(filepath))
+            if self.is_document_current(doc_key, content_hash, processor):
+                summary['unchanged'] += 1
+            else:
+                changed.append((doc_key, filepath, content_hash))
+        
+        for group in batched(changed, processor.workers):
+            if processor.workers > 1:
+                texts = processor.load_documents([filepath for _, filepath, _ in group])
+            else:
+                texts = [None] * len(group)  # streamed page by page by index_document
+            
+            for (doc_key, filepath, content_hash), text in zip(group, texts):
+                try:
+                    if isinstance(text, Exception):
+                        raise text
+                    document_info = {'text': text} if text is not None else {}
+                    result = self.index_document(doc_key, str(filepath), processor, **document_info)
+                    summary[result['status']] += 1
+                    if result['status'] == 'indexed':
+                        chunks += result['chunks']
+                        deduplicated += result['deduplicated']
+                except Exception as e:
+                    console.print(f"✗ Failed to index {filepath.name}: {e}", style="red")
+                    summary['failed'] += 1
+        
+        for doc_key in self.manifest.keys():
+            if doc_key.startswith(prefix) and doc_key not in seen:
+                self.remove_document(doc_key)
+                summary['removed'] += 1
+        
+        if chunks:
+            console.print(f"🔁 Near-duplicates: {deduplicated} of {chunks} indexed chunks ({deduplicated / chunks:.0%}) "
+                          f"reused an embedding", style="cyan")
+        return summary
+    
+    @writes_index
+    def compact(self) -> Dict[str, int]:
+        """
+        Delete orphaned chunks and rebuild the indexes without them.
+        
+        Orphans are chunks tagged with a 'doc_id' that is no longer in the
+        manifest (e.g. left behind by a crash during deletion) nor being
+        indexed, and that no other document lists (identical files share
+        chunks). The vector
+        store and the BM25 index are then rewritten so deleted chunks stop
+        taking up space.
+        
+        Returns:
+            Dictionary with 'orphans_removed', 'chunks', 'bytes_before',
+            'bytes_after' and 'bytes_reclaimed'
+        """
+        bytes_before = self.collection.disk_bytes() + self.lexical_index.disk_bytes() + self._near_duplicate_bytes()
+        
+        stored = self.collection.get()
+        referenced = self._protected_ids()
+        orphans = [
+            chunk_id for chunk_id, metadata in zip(stored['ids'], stored['metadatas'])
+            if (metadata or {}).get('doc_id') and metadata['doc_id'] not in self.manifest.entries
+            and metadata['doc_id'] not in self._ingesting and chunk_id not in referenced
+        ]
+        self.delete_chunks(orphans)
+        
+        self.collection.compact()
+        self.lexical_index.compact()
+        self._sync_lexical_index(self.active)
+        self._sync_near_duplicates(self.active)
+        
+        bytes_after = self.collection.disk_bytes() + self.lexical_index.disk_bytes() + self._near_duplicate_bytes()
+        return {
+            'orphans_removed': len(orphans),
+            'chunks': self.collection.count(),
+            'bytes_before': bytes_before,
+            'bytes_after': bytes_after,
+            'bytes_reclaimed': bytes_before - bytes_after
+        }
+    
+    # ==================== INDEX VERSIONS ====================
+    
+    def _read_alias(self) -> Dict[str, Any]:
+        """The alias file: serving version name and settings, plus build bookkeeping ({} if not written yet)."""
+        if not self.alias_path.exists():
+            return {}
+        with open(self.alias_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def _update_alias(self, **fields) -> None:
+        """Change fields of the alias file atomically (None removes a field)."""
+        with self._alias_lock:
+            alias = {**self._read_alias(), **fields}
+            alias = {key: value for key, value in alias.items() if value is not None}
+            tmp_path = self.alias_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(alias, f, indent=2)
+            os.replace(tmp_path, self.alias_path)
+    
+    def _open_version(self, name: str, settings: Dict[str, Any]) -> IndexVersion:
+        """Open the index stored under a physical name, creating it if needed."""
+        vector_backend = settings['vector_backend']
+        if vector_backend not in VECTOR_STORES:
+            raise ValueError(f"Unknown vector backend: {vector_backend} (expected one of {list(VECTOR_STORES)})")
+        console.print(f"🔍 Initializing vector database ({vector_backend})...", style="cyan")
+        collection = VECTOR_STORES[vector_backend](
+            self.persist_directory, name, precision=settings['vector_precision'],
+            dimensions=settings['vector_dimensions'], rescore=settings['vector_rescore']
+        )
+        embedding_generator = EmbeddingGenerator(
+            api_key=self.api_key, model_name=settings['embedding_model'], cache=self.embedding_cache,
+            dimension=settings['embedding_dimensions'], rate_limiter=self.rate_limiter
+        )
+        
+        # BM25 index built alongside the vector store, for exact medical terms
+        # and for answering when the embedding API is slow or down
+        lexical_index = BM25Index(str(self.persist_directory / f"{name}_bm25.json"))
+        
+        # MinHash signatures of the stored chunks, to catch near-copies at ingestion
+        near_duplicates = NearDuplicateIndex(
+            str(self.persist_directory / f"{name}_minhash.json"), threshold=self.near_duplicate_threshold
+        ) if self.near_duplicate_threshold is not None else None
+        
+        # Which version of each document is indexed, for incremental re-ingest
+        manifest = DocumentManifest(str(self.persist_directory / f"{name}_manifest.json"))
+        
+        version = IndexVersion(name, settings, collection, lexical_index, manifest, near_duplicates,
+                               embedding_generator)
+        self._sync_lexical_index(version)
+        self._sync_near_duplicates(version)
+        return version
+    
+    def open_version(self, **settings) -> IndexVersion:
+        """
+        Open the version a rebuild writes to.
+        
+        An unfinished build with the same settings is resumed; otherwise a
+        new version is created as "<collection_name>_v<n>", and an unfinished
+        build with other settings is deleted.
+        
+        Args:
+            **settings: Overrides of the configured index settings
+            
+        Returns:
+            The version (not serving until activate_version)
+        """
+        unknown = set(settings) - set(self.configured_settings)
+        if unknown:
+            raise ValueError(f"Unknown index settings: {sorted(unknown)}")
+        settings = {**self.configured_settings, **settings}
+        
+        alias = self._read_alias()
+        building = alias.get('building')
+        if building and building['name'] != self.active.name:
+            if self.shadow is not None and self.shadow.name == building['name']:
+                if self.shadow.settings == settings:
+                    return self.shadow
+                self.stop_shadow()
+            if building['settings'] == settings:
+                return self._open_version(building['name'], settings)
+            self._open_version(building['name'], building['settings']).drop()
+        
+        generation = alias.get('generation', 1) + 1
+        name = f"{self.collection_name}_v{generation}"
+        self._update_alias(generation=generation, building={'name': name, 'settings': settings})
+        return self._open_version(name, settings)
+    
+    def _writer_for(self, version: IndexVersion) -> 'RAGEngine':
+        """
+        Shallow copy of the engine whose indexing methods write to ``version``.
+        
+        Model, caches, rate limiter and settings are shared; the answer cache
+        is left out, as answers come from the serving version only.
+        """
+        writer = copy.copy(self)
+        writer.active = version
+        writer.answer_cache = None
+        writer.shadow = None
+        writer._write_lock = threading.RLock()
+        writer._ingesting = {}
+        writer._legacy_sources = {}  # Chunks under legacy ids are only in the original collection
+        writer._legacy_lock = threading.Lock()
+        return writer
+    
+    def _document_info(self, doc_key: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """doc_type, author and url a served document was indexed with, read from its stored chunks."""
+        stored = self.collection.get(ids=list(dict.fromkeys(entry['chunk_ids'])))
+        metadatas = [metadata or {} for metadata in stored['metadatas']]
+        own = [metadata for metadata in metadatas if metadata.get('doc_id') == doc_key] or metadatas
+        if not own:
+            return {}
+        return {key: own[0][key] for key in ('doc_type', 'author', 'url') if key in own[0]}
+    
+    def _copy_document(self, writer: 'RAGEngine', doc_key: str, entry: Dict[str, Any]) -> bool:
+        """
+        Copy a served document whose file is gone into the version ``writer`` fills.
+        
+        Its stored chunks are re-embedded as they are (they can't be split
+        again without the file).
+        
+        Returns:
+            False if the version already holds this copy
+        """
+        copied = writer.manifest.get(doc_key)
+        if copied and (copied['content_hash'], copied['settings']) == (entry['content_hash'], entry['settings']):
+            return False
+        
+        stored = self.collection.get(ids=list(dict.fromkeys(entry['chunk_ids'])))
+        chunks = [{'id': chunk_id, 'text': text, 'metadata': metadata}
+                  for chunk_id, text, metadata in zip(stored['ids'], stored['documents'], stored['metadatas'])]
+        writer.add_documents(chunks)
+        writer.manifest.set(doc_key, entry['path'], entry['content_hash'], entry['settings'], entry['chunk_ids'])
+        return True
+    
+    def _copy_unowned_chunks(self, writer: 'RAGEngine') -> int:
+        """
+        Mirror stored chunks that no document owns (stored before the manifest
+        existed) into the version ``writer`` fills.
+        
+        Returns:
+            Number of such chunks in the serving version
+        """
+        owned = self.manifest.referenced_ids()
+        stored = self.collection.get()
+        chunks = [
+            {'id': chunk_id, 'text': text, 'metadata': metadata}
+            for chunk_id, text, metadata in zip(stored['ids'], stored['documents'], stored['metadatas'])
+            if chunk_id not in owned and not (metadata or {}).get('doc_id')
+        ]
+        
+        mirrored = writer.collection.get()
+        wanted = {chunk['id'] for chunk in chunks}
+        writer.delete_chunks([
+            chunk_id for chunk_id, metadata in zip(mirrored['ids'], mirrored['metadatas'])
+            if not (metadata or {}).get('doc_id') and chunk_id not in wanted
+        ])
+        if chunks:
+            writer.add_documents(chunks)
+        return len(chunks)
+    
+    def populate_version(self, version: IndexVersion, processor,
+                         requests_per_minute: Optional[float] = None) -> Dict[str, int]:
+        """
+        Bring a version in line with the documents the serving version holds.
+        
+        Each served document is indexed into ``version`` from its file with
+        ``processor``; documents already there with the same content and
+        chunking are skipped, so an interrupted build resumes where it
+        stopped. Documents whose file is gone are copied chunk by chunk, and
+        so are chunks no document owns. Documents no longer served are
+        removed. The serving version is only read, so chat is unaffected.
+        
+        Args:
+            version: Version to fill (see open_version)
+            processor: DocumentProcessor with the chunking the version should use
+            requests_per_minute: Cap on the build's embedding requests, on top of
+                the shared Gemini limiter (None for no extra cap)
+            
+        Returns:
+            Counts of 'indexed', 'unchanged', 'copied', 'removed' and 'failed'
+            documents, and 'unowned_chunks'
+        """
+        writer = self._writer_for(version)
+        generator = version.embedding_generator
+        client = generator.embedding_model
+        if requests_per_minute:
+            generator.embedding_model = ThrottledEmbeddingClient(
+                client, AdaptiveRateLimiter(requests_per_minute, burst=1)
+            )
+        
+        summary = {'indexed': 0, 'unchanged': 0, 'copied': 0, 'removed': 0, 'failed': 0}
+        try:
+            served = self.manifest.keys()
+            for doc_key in served:
+                entry = self.manifest.get(doc_key)
+                if entry is None:
+                    continue  # removed since
+                try:
+                    if Path(entry['path']).exists():
+                        result = writer.index_document(doc_key, entry['path'], processor,
+                                                       **self._document_info(doc_key, entry))
+                        summary[result['status']] += 1
+                    else:
+                        summary['copied' if self._copy_document(writer, doc_key, entry) else 'unchanged'] += 1
+                except Exception as e:
+                    console.print(f"✗ Failed to rebuild {doc_key} into {version.name}: {e}", style="red")
+                    summary['failed'] += 1
+            
+            for doc_key in version.manifest.keys():
+                if doc_key not in self.manifest.entries:
+                    writer.remove_document(doc_key)
+                    summary['removed'] += 1
+            
+            summary['unowned_chunks'] = self._copy_unowned_chunks(writer)
+        finally:
+            generator.embedding_model = client
+        return summary
+    
+    def activate_version(self, version: IndexVersion, processor) -> IndexVersion:
         """
-        Initialize the RAG engine.
+        Make a populated version the serving one.
+        
+        The version first catches up with documents indexed or removed since
+        it was populated without the write lock, then once more under it for
+        whatever changed during that pass, and is swapped in with a single
+        assignment and recorded in the alias file. Requests already running
+        finish on the version they started with; documents being indexed
+        into the previous version are indexed again into this one.
         
         Args:
-            collection_name: Name of the ChromaDB collection
-            persist_directory: Directory to persist the vector database
-            api_key: Google API key for Gemini
-            model_name: Gemini model name
-            system_prompt: System prompt for answer generation (optional)
+            version: Version to serve
+            processor: DocumentProcessor the version was populated with
+            
+        Returns:
+            The version served until now (kept on disk for a rollback; see IndexVersion.drop)
         """
-        self.collection_name = collection_name
-        self.persist_directory = Path(persist_directory)
-        self.persist_directory.mkdir(parents=True, exist_ok=True)
-        self.system_prompt = system_prompt or "You are a helpful medical education assistant."
+        def catch_up():
+            summary = self.populate_version(version, processor)
+            if summary['failed']:
+                raise RuntimeError(f"{summary['failed']} documents could not be indexed into {version.name}")
         
-        # Initialize Gemini
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel(model_name)
+        catch_up()
+        with self._write_lock:
+            catch_up()
+            previous, self.active = self.active, version
+            self._update_alias(active=version.name, settings=version.settings, previous=previous.name,
+                               building=None)
+            self._legacy_sources = None
+            if self.shadow is version:
+                self.stop_shadow()
+            self._invalidate_answers()
         
-        # Initialize embedding generator
-        self.embedding_generator = EmbeddingGenerator(api_key=api_key)
+        console.print(f"✓ Serving index {version.name} (was {previous.name})", style="green")
+        return previous
+    
+    def rebuild_index(self, processor, shadow: bool = False, requests_per_minute: Optional[float] = None,
+                      drop_previous: bool = False, **settings) -> Dict[str, Any]:
+        """
+        Re-embed every served document into a new version without interrupting chat.
         
-        # Initialize ChromaDB
-        console.print("🔍 Initializing vector database...", style="cyan")
-        self.client = chromadb.PersistentClient(
-            path=str(self.persist_directory)
-        )
+        The new version is filled in the background of the serving one (see
+        populate_version), then either activated or, with ``shadow``, compared
+        against the serving version on live queries until ``activate_version``
+        is called. A build with failed documents is left unactivated; running
+        the rebuild again resumes it.
         
-        try:
-            self.collection = self.client.get_collection(name=collection_name)
-            console.print(f"  ✓ Loaded existing collection: {collection_name}", style="green")
-            console.print(f"  📊 Documents in collection: {self.collection.count()}", style="cyan")
-        except:
-            self.collection = self.client.create_collection(
-                name=collection_name,
-                metadata={"description": "Medical documents about stroke"}
-            )
-            console.print(f"  ✓ Created new collection: {collection_name}", style="green")
+        Args:
+            processor: DocumentProcessor with the chunking the new version should use
+            shadow: Shadow the new version instead of activating it
+            requests_per_minute: Cap on the build's embedding requests (None for no extra cap)
+            drop_previous: Delete the replaced version once the new one serves
+            **settings: Overrides of the configured index settings
+            
+        Returns:
+            populate_version's counts plus 'version' and 'status'
+            ('active', 'shadowing' or 'incomplete')
+        """
+        version = self.open_version(**settings)
+        console.print(f"🔨 Building index {version.name}...", style="cyan")
+        result = {'version': version.name, **self.populate_version(version, processor, requests_per_minute)}
+        
+        if result['failed']:
+            result['status'] = 'incomplete'
+        elif shadow:
+            self.start_shadow(version)
+            result['status'] = 'shadowing'
+        else:
+            previous = self.activate_version(version, processor)
+            if drop_previous:
+                previous.drop()
+            result['status'] = 'active'
+        return result
     
-    def add_documents(self, chunks: List[Dict[str, Any]]) -> None:
+    # ==================== SHADOW COMPARISON ====================
+    
+    @staticmethod
+    def _new_shadow_report(version: IndexVersion) -> Dict[str, Any]:
+        return {'version': version.name, 'queries': 0, 'identical': 0, 'mean_overlap': None,
+                'skipped': 0, 'samples': []}
+    
+    def _record_comparison(self, report: Dict[str, Any], question: str,
+                           served_ids: List[str], shadow_ids: List[str]) -> None:
+        """Add one query's top results from both versions to a shadow report."""
+        overlap = len(set(served_ids) & set(shadow_ids)) / max(len(served_ids), len(shadow_ids), 1)
+        if not served_ids and not shadow_ids:
+            overlap = 1.0
+        report['queries'] += 1
+        report['mean_overlap'] = (overlap if report['mean_overlap'] is None
+                                  else report['mean_overlap'] + (overlap - report['mean_overlap']) / report['queries'])
+        if served_ids == shadow_ids:
+            report['identical'] += 1
+        else:
+            report['samples'] = (report['samples'] + [
+                {'question': question, 'overlap': overlap, 'serving': served_ids, 'shadow': shadow_ids}
+            ])[-self.SHADOW_SAMPLES:]
+    
+    def compare_versions(self, version: IndexVersion, queries: List[str], n_results: int = 5) -> Dict[str, Any]:
         """
-        Add document chunks to the vector database.
+        Search each query on the serving version and on ``version`` and compare the top results.
         
-        Args:
-            chunks: List of document chunks with text and metadata
+        Returns:
+            Report with 'queries', 'identical' (same ids in the same order),
+            'mean_overlap' (shared share of the top ``n_results`` ids) and
+            'samples' of queries whose results differ
         """
-        if not chunks:
-            print("⚠️  No chunks to add")
-            return
+        report = self._new_shadow_report(version)
+        for question in queries:
+            served = self.search(question, n_results)
+            shadowed = self.search(question, n_results, index=version)
+            self._record_comparison(report, question, [chunk['id'] for chunk in served],
+                                    [chunk['id'] for chunk in shadowed])
+        return report
+    
+    def start_shadow(self, version: IndexVersion) -> None:
+        """
+        Compare ``version`` with the serving one on live queries.
         
-        print(f"� Processing {len(chunks)} chunks...")
+        Every retrieval is searched again on ``version`` in a background
+        thread and the overlap of the top results is collected in
+        ``shadow_report``. Answers always come from the serving version.
+        """
+        with self._shadow_lock:
+            if self._shadow_pool is None:
+                self._shadow_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rag-shadow")
+            self.shadow = version
+            self.shadow_report = self._new_shadow_report(version)
+        console.print(f"👥 Shadowing index {version.name}", style="cyan")
+    
+    def stop_shadow(self) -> None:
+        """Stop shadow comparisons (the report is kept)."""
+        with self._shadow_lock:
+            self.shadow = None
+    
+    def _shadow_query(self, question: str, candidates: List[Dict[str, Any]], n_results: int, pool: int) -> None:
+        """Queue a comparison of a live query's top results with the shadow version's."""
+        shadow = self.shadow
+        if shadow is None or not question.strip():
+            return
+        with self._shadow_lock:
+            if self._shadow_pending >= self.SHADOW_MAX_PENDING:
+                self.shadow_report['skipped'] += 1
+                return
+            self._shadow_pending += 1
+        served_ids = [chunk['id'] for chunk in candidates[:n_results]]
         
-        # Extract texts and prepare data for ChromaDB
-        texts = [chunk['text'] for chunk in chunks]
-        metadatas = [chunk.get('metadata', {}) for chunk in chunks]
-        ids = [f"chunk_{i}_{chunk.get('metadata', {}).get('source', 'unknown')}" 
-               for i, chunk in enumerate(chunks)]
+        def compare():
+            try:
+                shadow_ids = [chunk['id'] for chunk in self.search(question, pool, index=shadow)[:n_results]]
+                with self._shadow_lock:
+                    if self.shadow is shadow:
+                        self._record_comparison(self.shadow_report, question, served_ids, shadow_ids)
+            finally:
+                with self._shadow_lock:
+                    self._shadow_pending -= 1
         
-        # Generate embeddings using our custom embedding generator
-        print("🔄 Generating embeddings...")
-        embeddings = self.embedding_generator.generate_batch(texts)
+        self._shadow_pool.submit(compare)
+    
+    def _invalidate_answers(self) -> None:
+        """Drop cached answers after the collection has changed."""
+        if self.answer_cache is not None:
+            self.answer_cache.clear()
+    
+    def _sync_lexical_index(self, version: IndexVersion) -> None:
+        """Build a version's BM25 index from its vector store if it is missing or stale."""
+        if version.lexical_index.count() >= version.collection.count():
+            return
         
-        if not embeddings:
-            print("❌ Failed to generate embeddings")
+        console.print("  🔤 Building lexical index from vector store...", style="cyan")
+        stored = version.collection.get()
+        version.lexical_index.add(stored['ids'], stored['documents'], stored['metadatas'])
+        console.print(f"  ✓ Lexical index ready ({version.lexical_index.count()} chunks)", style="green")
+    
+    def _sync_near_duplicates(self, version: IndexVersion) -> None:
+        """Compute MinHash signatures of a version's stored chunks if its near-duplicate index is empty."""
+        if version.near_duplicates is None or version.near_duplicates.count() or not version.collection.count():
             return
         
-        # Add to ChromaDB
-        print("💾 Storing in vector database...")
-        self.collection.add(
-            documents=texts,
-            embeddings=embeddings,
-            metadatas=metadatas,
-            ids=ids
+        stored = version.collection.get()
+        version.near_duplicates.add(stored['ids'], stored['documents'],
+                                    [self._chunk_group(metadata) for metadata in stored['metadatas']])
+        console.print(f"  ✓ Near-duplicate index ready ({version.near_duplicates.count()} chunks)", style="green")
+    
+    def _near_duplicate_bytes(self) -> int:
+        return self.near_duplicates.disk_bytes() if self.near_duplicates is not None else 0
+    
+    def _vector_search(self, query_embedding: List[float], n_results: int,
+                       index: Optional[IndexVersion] = None) -> List[Dict[str, Any]]:
+        """Nearest chunks to a query embedding (in the serving version unless ``index`` is given)."""
+        return self._vector_search_many([query_embedding], n_results, index)[0]
+    
+    def _vector_search_many(self, query_embeddings: List[List[float]], n_results: int,
+                            index: Optional[IndexVersion] = None) -> List[List[Dict[str, Any]]]:
+        """Nearest chunks to each query embedding, from a single collection query."""
+        results = (index or self.active).collection.query(
+            query_embeddings=query_embeddings,
+            n_results=n_results
         )
         
-        print(f"✅ Successfully added {len(chunks)} chunks to vector database")
+        # Format results, one list per query
+        rankings = []
+        for q in range(len(query_embeddings)):
+            chunks = []
+            if results and results['documents'] and q < len(results['documents']):
+                for i, doc in enumerate(results['documents'][q]):
+                    chunk = {
+                        'text': doc,
+                        'metadata': results['metadatas'][q][i] if results['metadatas'] else {},
+                        'distance': results['distances'][q][i] if results['distances'] else None,
+                        'id': results['ids'][q][i] if results['ids'] else None
+                    }
+                    chunks.append(chunk)
+            rankings.append(chunks)
+        
+        return rankings
+    
+    def lexical_search(self, query: str, n_results: int = 5,
+                       index: Optional[IndexVersion] = None) -> List[Dict[str, Any]]:
+        """
+        Search chunks with BM25 only (no embedding call).
+        
+        Args:
+            query: The search query
+            n_results: Number of results to return
+            index: Version to search (defaults to the serving one)
+            
+        Returns:
+            List of matching chunks with metadata and lexical scores
+        """
+        return (index or self.active).lexical_index.search_chunks(query, n_results)
+    
+    def _fuse(self, rankings: List[List[Dict[str, Any]]], n_results: int) -> List[Dict[str, Any]]:
+        """Combine ranked result lists with reciprocal-rank fusion."""
+        fused: Dict[str, Dict[str, Any]] = {}
+        
+        for ranking in rankings:
+            for rank, chunk in enumerate(ranking, 1):
+                entry = fused.setdefault(chunk['id'], dict(chunk, rrf_score=0.0))
+                entry['rrf_score'] += 1.0 / (self.RRF_K + rank)
+                for key in ('distance', 'lexical_score'):
+                    if entry.get(key) is None and chunk.get(key) is not None:
+                        entry[key] = chunk[key]
+        
+        return sorted(fused.values(), key=lambda chunk: chunk['rrf_score'], reverse=True)[:n_results]
     
-    def search(self, query: str, n_results: int = 5) -> List[Dict[str, Any]]:
+    def search(self, query: str, n_results: int = 5, query_embedding: Optional[List[float]] = None,
+               mode: Optional[str] = None, index: Optional[IndexVersion] = None) -> List[Dict[str, Any]]:
         """
-        Search for relevant document chunks using semantic similarity.
+        Search for relevant document chunks.
+        
+        In "hybrid" mode a larger candidate set is taken from both the vector
+        store and the BM25 index and fused with reciprocal-rank fusion. If the
+        query embedding cannot be produced, the lexical ranking is used alone.
         
         Args:
             query: The search query
             n_results: Number of results to return
+            query_embedding: Precomputed embedding for the query (optional)
+            mode: "vector", "lexical" or "hybrid" (defaults to self.search_mode)
+            index: Version to search (defaults to the serving one); a precomputed
+                query embedding must come from its embedding model
             
         Returns:
             List of relevant chunks with metadata and scores
@@ -115,38 +1832,150 @@ class RAGEngine:
             print("⚠️  Empty query")
             return []
         
+        index = index or self.active
+        mode = mode or self.search_mode
+        if mode == "lexical":
+            return self.lexical_search(query, n_results, index)
+        
         # Generate embedding for the query
-        query_embedding = self.embedding_generator.generate_embedding(query)
+        if query_embedding is None:
+            query_embedding = index.embedding_generator.generate_embedding(query)
         
         if not query_embedding:
-            print("❌ Failed to generate query embedding")
-            return []
+            print("❌ Failed to generate query embedding, using lexical search")
+            return self.lexical_search(query, n_results, index)
         
-        # Search in ChromaDB
         try:
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=n_results
-            )
-            
-            # Format results
-            chunks = []
-            if results and results['documents'] and results['documents'][0]:
-                for i, doc in enumerate(results['documents'][0]):
-                    chunk = {
-                        'text': doc,
-                        'metadata': results['metadatas'][0][i] if results['metadatas'] else {},
-                        'distance': results['distances'][0][i] if results['distances'] else None,
-                        'id': results['ids'][0][i] if results['ids'] else None
-                    }
-                    chunks.append(chunk)
+            if mode == "vector":
+                return self._vector_search(query_embedding, n_results, index)
             
-            return chunks
+            candidates = max(n_results * 4, 20)
+            return self._fuse([
+                self._vector_search(query_embedding, candidates, index),
+                self.lexical_search(query, candidates, index)
+            ], n_results)
             
         except Exception as e:
             print(f"❌ Search failed: {e}")
             return []
     
+    def search_many(self, queries: List[str], n_results: int = 5, mode: Optional[str] = None,
+                    index: Optional[IndexVersion] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Search for several queries at once (evaluation runs, FAQ precomputation,
+        query variants).
+        
+        Gives the same rankings as calling ``search`` for each query, but embeds
+        all queries in one batched request and looks them all up with a single
+        multi-vector collection query. Queries whose embedding fails fall back
+        to lexical search, as in ``search``.
+        
+        Args:
+            queries: The search queries
+            n_results: Number of results to return per query
+            mode: "vector", "lexical" or "hybrid" (defaults to self.search_mode)
+            index: Version to search (defaults to the serving one)
+            
+        Returns:
+            One list of chunks per query, in query order (empty for blank queries)
+        """
+        index = index or self.active
+        mode = mode or self.search_mode
+        rankings: List[List[Dict[str, Any]]] = [[] for _ in queries]
+        positions = [i for i, query in enumerate(queries) if query and query.strip()]
+        if not positions:
+            return rankings
+        
+        if mode == "lexical":
+            for i in positions:
+                rankings[i] = self.lexical_search(queries[i], n_results, index)
+            return rankings
+        
+        # One batched embedding call; failed items come back as zero vectors
+        embeddings = index.embedding_generator.generate_batch([queries[i] for i in positions])
+        embedded = [i for i, embedding in zip(positions, embeddings) if any(embedding)]
+        vectors = [embedding for embedding in embeddings if any(embedding)]
+        for i in set(positions) - set(embedded):
+            print(f"❌ Failed to generate query embedding, using lexical search: {queries[i][:50]}")
+            rankings[i] = self.lexical_search(queries[i], n_results, index)
+        if not embedded:
+            return rankings
+        
+        try:
+            if mode == "vector":
+                for i, chunks in zip(embedded, self._vector_search_many(vectors, n_results, index)):
+                    rankings[i] = chunks
+                return rankings
+            
+            candidates = max(n_results * 4, 20)
+            for i, chunks in zip(embedded, self._vector_search_many(vectors, candidates, index)):
+                rankings[i] = self._fuse([chunks, self.lexical_search(queries[i], candidates, index)], n_results)
+            return rankings
+            
+        except Exception as e:
+            print(f"❌ Search failed: {e}")
+            for i in embedded:
+                rankings[i] = []
+            return rankings
+    
+    def select_context(self, candidates: List[Dict[str, Any]], n_results: int = 5,
+                       index: Optional[IndexVersion] = None) -> List[Dict[str, Any]]:
+        """
+        Choose the passages to put in the prompt from a ranked candidate set.
+        
+        Picks candidates by Maximal Marginal Relevance over the stored chunk
+        embeddings until ``n_results`` are represented, skipping candidates
+        that repeat a chosen one (near-copies of a document, heavily
+        overlapping chunks) instead of sending them again, merges
+        consecutive chunks of the same document, and packs the passages
+        into ``context_token_budget``.
+        
+        Args:
+            candidates: Ranked search results (see ``search``)
+            n_results: Number of chunks to pick before merging
+            index: Version the candidates come from (defaults to the serving one)
+            
+        Returns:
+            Passages in rank order; merged passages list their chunk ids in 'ids'
+        """
+        if self.mmr_lambda is None or len(candidates) <= 1:
+            picked = candidates[:n_results]
+        else:
+            try:
+                vectors = (index or self.active).collection.embeddings([candidate['id'] for candidate in candidates])
+            except Exception as e:
+                print(f"⚠️  Could not load stored embeddings for MMR: {e}")
+                vectors = np.zeros((len(candidates), 0), dtype=np.float32)
+            similarity = vectors @ vectors.T
+            duplicates = (similarity >= self.DUPLICATE_SIMILARITY) | (
+                shingle_containment([candidate['text'] for candidate in candidates]) >= self.DUPLICATE_TEXT_OVERLAP
+            )
+            order = mmr_select(relevance_scores(candidates), similarity, n_results, self.mmr_lambda, duplicates)
+            picked = [candidates[i] for i in order]
+        
+        return pack_to_budget(merge_adjacent(picked), self.context_token_budget)
+    
+    def retrieve(self, query: str, n_results: int = 5, query_embedding: Optional[List[float]] = None,
+                 index: Optional[IndexVersion] = None) -> List[Dict[str, Any]]:
+        """
+        Search a wider candidate set, then select the context passages from it.
+        
+        Args:
+            query: The search query
+            n_results: Number of chunks to pick
+            query_embedding: Precomputed embedding for the query (optional)
+            index: Version to search (defaults to the serving one)
+            
+        Returns:
+            Context passages (see ``select_context``)
+        """
+        index = index or self.active
+        pool = max(n_results, self.retrieval_candidates)
+        candidates = self.search(query, pool, query_embedding=query_embedding, index=index)
+        if index is not self.shadow:
+            self._shadow_query(query, candidates, n_results, pool)
+        return self.select_context(candidates, n_results, index)
+    
     def format_context(self, search_results: List[Dict]) -> tuple:
         """
         Format search results into context for LLM.
@@ -181,20 +2010,35 @@ class RAGEngine:
         context_text = "\n\n".join(context_parts)
         return context_text, sources
     
-    def generate_answer(self, query: str, context: str, sources: List[Dict]) -> Dict:
+    def format_history(self, history: Optional[List[Dict]], question: str = "") -> str:
         """
-        Generate answer using Gemini with retrieved context.
+        Format recent conversation turns for the prompt.
         
         Args:
-            query: User's question
-            context: Retrieved context from vector search
-            sources: List of source documents
+            history: Conversations from MemoryManager.get_conversation_history (oldest first)
+            question: Current question; a trailing copy of it already saved to history is skipped
             
         Returns:
-            Dictionary with answer and citations
+            Formatted history text (empty when there is none)
         """
-        # Build prompt
-        prompt = f"""You are an intelligent and friendly medical assistant named HealthBot. You help patients with medical questions, appointment scheduling, and general health information.
+        if not history:
+            return ""
+        
+        turns = list(history)
+        if turns and turns[-1].get('role') in ('user', 'patient') and turns[-1].get('message') == question:
+            turns = turns[:-1]
+        
+        lines = []
+        for turn in turns:
+            speaker = "Assistant" if turn.get('role') == 'assistant' else "User"
+            lines.append(f"{speaker}: {turn.get('message', '')[:500]}")
+        return "\n".join(lines)
+    
+    def _build_prompt(self, query: str, context: str, history: str = "") -> str:
+        """Build the generation prompt from the question, retrieved context and history."""
+        history_section = f"\nRECENT CONVERSATION:\n{history}\n" if history else ""
+        
+        return f"""You are an intelligent and friendly medical assistant named HealthBot. You help patients with medical questions, appointment scheduling, and general health information.
 
 YOUR CAPABILITIES:
 - Answer medical questions using verified medical sources
@@ -220,46 +2064,130 @@ IMPORTANT SAFETY RULES:
 
 MEDICAL KNOWLEDGE BASE:
 {context}
-
+{history_section}
 USER MESSAGE: {query}
 
 YOUR RESPONSE (be natural, helpful, and conversational): """
+    
+    @staticmethod
+    def _format_citations(sources: List[Dict]) -> List[str]:
+        """Format sources for citation."""
+        citations = []
+        for source in sources:
+            citation = f"[{source['id']}] {source['name']}"
+            if source['author']:
+                citation += f" by {source['author']}"
+            if source['type']:
+                citation += f" ({source['type']})"
+            citations.append(citation)
+        return citations
+    
+    def _answer_result(self, answer_text: str, sources: List[Dict]) -> Dict:
+        """Package generated text with its citations."""
+        return {
+            'answer': answer_text,
+            'citations': self._format_citations(sources),
+            'sources': sources
+        }
+    
+    def _error_result(self, error: Exception) -> Dict:
+        """Fallback result when generation fails (never cached)."""
+        Console().print(f"✗ Error generating answer: {error}", style="red")
+        return {
+            'answer': "I apologize, but I encountered an error generating the answer. Please try again.",
+            'citations': [],
+            'sources': [],
+            'error': True
+        }
+    
+    def degraded_answer(self, question: str, prepared: Dict, reason: str = "") -> Dict:
+        """
+        Answer without the LLM, for when generation is unavailable.
+        
+        Serves a cached answer to the question (even one past its TTL) if
+        there is one, otherwise the top retrieved passages with citations.
+        Degraded answers are never cached.
+        
+        Args:
+            question: User's question
+            prepared: Retrieval results from _aprepare
+            reason: Why generation was skipped, for the log
+            
+        Returns:
+            Result dictionary with 'degraded' set
+        """
+        print(f"⚠️  Degraded answer without the LLM ({reason})")
+        if self.answer_cache is not None and question.strip():
+            cached = self.answer_cache.get(question, prepared.get('query_embedding'),
+                                           count_miss=False, allow_stale=True)
+            if cached is not None:
+                cached.update(cached=True, degraded=True)
+                return cached
+        
+        search_results = prepared.get('search_results') or []
+        if not search_results:
+            return {'answer': self.UNAVAILABLE_ANSWER, 'citations': [], 'sources': [], 'degraded': True}
+        
+        passages = [self.DEGRADED_INTRO]
+        for source, passage in zip(prepared['sources'], search_results):
+            text = " ".join(passage['text'].split())
+            if len(text) > self.DEGRADED_PASSAGE_CHARS:
+                text = text[:self.DEGRADED_PASSAGE_CHARS].rsplit(" ", 1)[0] + " …"
+            passages.append(f"[{source['id']}] {text}")
+        
+        result = self._answer_result("\n\n".join(passages), prepared['sources'])
+        result['degraded'] = True
+        return result
+    
+    def generate_answer(self, query: str, context: str, sources: List[Dict], history: str = "") -> Dict:
+        """
+        Generate answer using Gemini with retrieved context.
+        
+        Args:
+            query: User's question
+            context: Retrieved context from vector search
+            sources: List of source documents
+            history: Formatted recent conversation (optional)
+            
+        Returns:
+            Dictionary with answer and citations
+        """
+        prompt = self._build_prompt(query, context, history)
         
         try:
-            # Generate response with slightly higher temperature for natural conversation
-            response = self.model.generate_content(
-                prompt,
-                generation_config={
-                    'temperature': 0.3,  # Increased from 0.1 for more natural, conversational responses
-                    'max_output_tokens': 1024,
-                }
+            response = self.rate_limiter.call(
+                self.model.generate_content, prompt, generation_config=self.GENERATION_CONFIG
             )
+            return self._answer_result(response.text, sources)
+        except Exception as e:
+            return self._error_result(e)
+    
+    async def agenerate_answer(self, query: str, context: str, sources: List[Dict], history: str = "") -> Dict:
+        """
+        Async version of generate_answer using the non-blocking Gemini client.
+        
+        Args:
+            query: User's question
+            context: Retrieved context from vector search
+            sources: List of source documents
+            history: Formatted recent conversation (optional)
             
-            answer_text = response.text
-            
-            # Format sources for citation
-            citations = []
-            for source in sources:
-                citation = f"[{source['id']}] {source['name']}"
-                if source['author']:
-                    citation += f" by {source['author']}"
-                if source['type']:
-                    citation += f" ({source['type']})"
-                citations.append(citation)
-            
-            return {
-                'answer': answer_text,
-                'citations': citations,
-                'sources': sources
-            }
-            
+        Returns:
+            Dictionary with answer and citations
+        """
+        prompt = self._build_prompt(query, context, history)
+        
+        try:
+            return self._answer_result(await self._agenerate_text(prompt), sources)
         except Exception as e:
-            Console().print(f"✗ Error generating answer: {e}", style="red")
-            return {
-                'answer': "I apologize, but I encountered an error generating the answer. Please try again.",
-                'citations': [],
-                'sources': []
-            }
+            return self._error_result(e)
+    
+    async def _agenerate_text(self, prompt: str) -> str:
+        """One rate-limited async generation call (errors propagate)."""
+        response = await self.rate_limiter.acall(
+            self.model.generate_content_async, prompt, generation_config=self.GENERATION_CONFIG
+        )
+        return response.text
     
     def query(self, question: str, n_results: int = 5, verbose: bool = False) -> Dict:
         """
@@ -277,14 +2205,33 @@ YOUR RESPONSE (be natural, helpful, and conversational): """
         
         if verbose:
             console.print(f"\n❓ Question: {question}", style="bold cyan")
+        
+        # Answered from one index version even if another is swapped in meanwhile
+        index = self.active
+        
+        # 0. Answer cache: exact question first, then semantic match on the embedding
+        query_embedding = None
+        if self.answer_cache is not None and question.strip():
+            semantic = self.answer_cache.semantic_enabled and self.search_mode != "lexical"
+            cached = self.answer_cache.get(question, count_miss=not semantic)
+            if cached is None and semantic:
+                query_embedding = index.embedding_generator.generate_embedding(question)
+                cached = self.answer_cache.get(question, query_embedding)
+            if cached is not None:
+                if verbose:
+                    console.print("  ⚡ Answer served from cache", style="green")
+                cached['cached'] = True
+                return cached
+        
+        if verbose:
             console.print("🔍 Searching medical documents...", style="cyan")
         
-        # 1. Semantic search
-        search_results = self.search(question, n_results)
+        # 1. Retrieval (vector, lexical or hybrid), then MMR and context packing
+        search_results = self.retrieve(question, n_results, query_embedding=query_embedding, index=index)
         
         if not search_results:
             # No documents found - fall back to direct LLM response
-            return self.generate_answer(question, "No specific medical documents available. Use your general medical knowledge.", [])
+            return self.generate_answer(question, self.NO_DOCUMENTS_CONTEXT, [])
 
         
         if verbose:
@@ -300,8 +2247,227 @@ YOUR RESPONSE (be natural, helpful, and conversational): """
         result = self.generate_answer(question, context, sources)
         result['search_results'] = search_results
         
+        # Answers from a version swapped out meanwhile were cleared with the cache
+        if self.answer_cache is not None and not result.get('error') and index is self.active:
+            self.answer_cache.put(question, result, query_embedding)
+        
+        return result
+    
+    async def _aprepare(self, question: str, n_results: int,
+                        history_loader: Optional[Callable[[], List[Dict]]]) -> Dict:
+        """
+        Async retrieval stage shared by aquery and astream_query.
+        
+        Retrieval (embed, then search in a worker thread) and the history read
+        run concurrently, each step under its stage deadline: a slow or failing
+        query embedding or vector search falls back to the lexical index, a
+        slow history read to no history.
+        
+        Returns:
+            Dictionary with either 'cached' (a ready result) or the 'context',
+            'sources', 'history', 'search_results', 'query_embedding' and
+            'index' (the version searched) needed for generation
+        """
+        index = self.active
+        cache = self.answer_cache if question.strip() else None
+        semantic = cache is not None and cache.semantic_enabled and self.search_mode != "lexical"
+        if cache is not None:
+            cached = cache.get(question, count_miss=not semantic)
+            if cached is not None:
+                return {'cached': cached}
+        
+        pool = max(n_results, self.retrieval_candidates)
+        
+        async def retrieve():
+            if self.search_mode == "lexical":
+                results = await asyncio.to_thread(self.lexical_search, question, pool, index)
+                return None, None, results
+            
+            async def embed():
+                embedding = await index.embedding_generator.agenerate_embedding(question)
+                if not embedding:
+                    raise RuntimeError("no embedding returned")
+                return embedding
+            
+            try:
+                query_embedding = await self.stages['embedding'].run(embed)
+            except StageUnavailable as e:
+                print(f"⚠️  Query embedding {e.reason}, using lexical search")
+                query_embedding = None
+            
+            if semantic:
+                cached = cache.get(question, query_embedding)
+                if cached is not None:
+                    return query_embedding, cached, []
+            if not query_embedding:
+                results = await asyncio.to_thread(self.lexical_search, question, pool, index)
+                return query_embedding, None, results
+            try:
+                results = await self.stages['search'].run(
+                    lambda: asyncio.to_thread(self.search, question, pool, query_embedding, index=index)
+                )
+            except StageUnavailable as e:
+                print(f"⚠️  Vector search {e.reason}, using lexical search")
+                results = await asyncio.to_thread(self.lexical_search, question, pool, index)
+            return query_embedding, None, results
+        
+        async def load_history():
+            if history_loader is None:
+                return []
+            try:
+                return await self.stages['history'].run(lambda: asyncio.to_thread(history_loader))
+            except StageUnavailable as e:
+                print(f"⚠️  Could not load conversation history: {e.reason}")
+                return []
+        
+        (query_embedding, cached, search_results), history = await asyncio.gather(retrieve(), load_history())
+        
+        if cached is not None:
+            return {'cached': cached}
+        
+        if search_results:
+            self._shadow_query(question, search_results, n_results, pool)
+            search_results = await asyncio.to_thread(self.select_context, search_results, n_results, index)
+            context, sources = self.format_context(search_results)
+        else:
+            # No documents found - fall back to direct LLM response
+            context, sources = self.NO_DOCUMENTS_CONTEXT, []
+        
+        return {
+            'context': context,
+            'sources': sources,
+            'history': self.format_history(history, question),
+            'search_results': search_results,
+            'query_embedding': query_embedding,
+            'index': index
+        }
+    
+    def _finish(self, question: str, prepared: Dict, result: Dict) -> Dict:
+        """Attach retrieval results to a generated answer and cache it if shareable."""
+        if not prepared['search_results']:
+            return result
+        
+        result['search_results'] = prepared['search_results']
+        
+        # Answers that depended on one user's conversation are never shared
+        if self.answer_cache is not None and not result.get('error') and not result.get('degraded') \
+                and not prepared['history'] and prepared['index'] is self.active:
+            self.answer_cache.put(question, result, prepared['query_embedding'])
+        
         return result
     
+    async def aquery(self, question: str, n_results: int = 5,
+                     history_loader: Optional[Callable[[], List[Dict]]] = None) -> Dict:
+        """
+        Non-blocking RAG pipeline for use inside the event loop.
+        
+        Embedding and generation use the async Gemini client; the vector search
+        and the conversation-history read run in worker threads. Retrieval
+        (embed, then search) and the history read run concurrently. Every
+        stage has a deadline and a circuit breaker; if generation times out,
+        fails or is short-circuited the result is a degraded_answer.
+        
+        Args:
+            question: User's question
+            n_results: Number of chunks to retrieve
+            history_loader: Callable returning recent conversation turns (optional)
+            
+        Returns:
+            Dictionary with answer, citations, and metadata
+        """
+        prepared = await self._aprepare(question, n_results, history_loader)
+        if 'cached' in prepared:
+            prepared['cached']['cached'] = True
+            return prepared['cached']
+        
+        prompt = self._build_prompt(question, prepared['context'], prepared['history'])
+        try:
+            text = await self.stages['generation'].run(lambda: self._agenerate_text(prompt))
+            result = self._answer_result(text, prepared['sources'])
+        except StageUnavailable as e:
+            result = self.degraded_answer(question, prepared, str(e))
+        return self._finish(question, prepared, result)
+    
+    async def astream_query(self, question: str, n_results: int = 5,
+                            history_loader: Optional[Callable[[], List[Dict]]] = None) -> AsyncIterator[Dict]:
+        """
+        Streaming variant of aquery.
+        
+        Yields ``{'type': 'delta', 'content': ...}`` events as Gemini produces
+        text, followed by exactly one ``{'type': 'final', ...}`` event carrying
+        the assembled answer, citations and sources. A cached answer is
+        delivered as a single final event, and so is a degraded_answer when
+        generation is unavailable before any text was streamed. The generation
+        deadline covers the whole stream; text streamed before it passed, or
+        before the stream failed, is kept and the final event is marked
+        'truncated'.
+        
+        Args:
+            question: User's question
+            n_results: Number of chunks to retrieve
+            history_loader: Callable returning recent conversation turns (optional)
+        """
+        prepared = await self._aprepare(question, n_results, history_loader)
+        if 'cached' in prepared:
+            prepared['cached']['cached'] = True
+            yield {'type': 'final', **prepared['cached']}
+            return
+        
+        prompt = self._build_prompt(question, prepared['context'], prepared['history'])
+        parts = []
+        stage = self.stages['generation']
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        
+        def remaining():
+            return None if stage.timeout is None else max(0.0, started + stage.timeout - loop.time())
+        
+        try:
+            stage.check()
+            # Opening the stream is retried; once text has been sent it is not
+            response = await asyncio.wait_for(self.rate_limiter.acall(
+                self.model.generate_content_async, prompt, generation_config=self.GENERATION_CONFIG, stream=True
+            ), timeout=remaining())
+            chunks = response.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout=remaining())
+                except StopAsyncIteration:
+                    break
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunks without text parts (e.g. finish metadata)
+                    continue
+                if text:
+                    parts.append(text)
+                    yield {'type': 'delta', 'content': text}
+            stage.success((loop.time() - started) * 1000)
+            result = self._answer_result("".join(parts), prepared['sources'])
+        except StageUnavailable as e:
+            result = self.degraded_answer(question, prepared, str(e))
+        except asyncio.TimeoutError:
+            stage.failure((loop.time() - started) * 1000, timed_out=True)
+            reason = f"generation timed out after {stage.timeout}s"
+            if parts:
+                print(f"⚠️  Answer truncated: {reason}")
+                result = self._answer_result("".join(parts), prepared['sources'])
+                result.update(degraded=True, truncated=True)
+            else:
+                result = self.degraded_answer(question, prepared, reason)
+        except Exception as e:
+            stage.failure((loop.time() - started) * 1000)
+            if not parts:
+                result = self.degraded_answer(question, prepared, f"generation failed: {e}")
+            else:
+                if is_throttle_error(e):
+                    self.rate_limiter.record_throttle()
+                print(f"⚠️  Answer truncated: generation failed: {e}")
+                result = self._answer_result("".join(parts), prepared['sources'])
+                result.update(degraded=True, truncated=True)
+        
+        yield {'type': 'final', **self._finish(question, prepared, result)}
+    
     def display_answer(self, result: Dict) -> None:
         """
         Display answer in a beautiful format.
@@ -309,6 +2475,8 @@ YOUR RESPONSE (be natural, helpful, and conversational): """
         Args:
             result: Result dictionary from query()
         """
+        from rich.panel import Panel
+        
         console = Console()
         
         # Display answer
@@ -326,15 +2494,18 @@ YOUR RESPONSE (be natural, helpful, and conversational): """
             for citation in result['citations']:
                 console.print(f"  {citation}", style="dim")
     
+    @writes_index
     def clear_collection(self) -> None:
         """Delete all documents from the collection."""
         console = Console()
         try:
-            self.client.delete_collection(name=self.collection_name)
-            self.collection = self.client.create_collection(
-                name=self.collection_name,
-                metadata={"description": "Medical documents about stroke"}
-            )
+            self.collection.clear()
+            self.lexical_index.clear()
+            if self.near_duplicates is not None:
+                self.near_duplicates.clear()
+            self.manifest.clear()
+            self._legacy_sources = None
+            self._invalidate_answers()
             console.print("✓ Collection cleared", style="green")
         except Exception as e:
             console.print(f"✗ Error clearing collection: {e}", style="red")
@@ -343,27 +2514,82 @@ YOUR RESPONSE (be natural, helpful, and conversational): """
         """Get statistics about the vector database."""
         return {
             'collection_name': self.collection_name,
+            'index_version': self.active.name,
+            'vector_backend': self.collection.backend,
+            'vector_store': self.collection.stats(),
+            'search_mode': self.search_mode,
+            'lexical_chunks': self.lexical_index.count(),
+            'near_duplicate_chunks': self.near_duplicates.count() if self.near_duplicates is not None else None,
             'total_documents': self.collection.count(),
-            'persist_directory': str(self.persist_directory)
+            'persist_directory': str(self.persist_directory),
+            'embedding_cache': self.embedding_cache.stats(),
+            'answer_cache': self.answer_cache.stats() if self.answer_cache is not None else None,
+            'rate_limiter': self.rate_limiter.stats(),
+            'stages': {stage: guard.stats() for stage, guard in self.stages.items()},
+            'shadow': self.shadow_report or None
         }
+    
+    def warm_up(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Do the work the first chat request would otherwise pay for.
+        
+        Touches the vector store and the BM25 index, sends one uncached query
+        embedding request, and runs a vector search with its result so the
+        index is loaded into memory. A failing step doesn't stop the others.
+        
+        Returns:
+            Per component ('vector_store', 'lexical_index', 'embedding',
+            'vector_search'): its 'status' ('warm' or 'failed'), 'ms' and,
+            on failure, 'error'
+        """
+        components: Dict[str, Dict[str, Any]] = {}
+        
+        def step(component: str, fn: Callable[[], Any]) -> Any:
+            started = time.perf_counter()
+            try:
+                value = fn()
+                components[component] = {'status': 'warm'}
+            except Exception as e:
+                value = None
+                components[component] = {'status': 'failed', 'error': str(e)}
+            components[component]['ms'] = round((time.perf_counter() - started) * 1000, 1)
+            return value
+        
+        step('vector_store', self.collection.count)
+        step('lexical_index', lambda: self.lexical_search(self.WARM_UP_QUERY, 1))
+        embedding = step('embedding', lambda: self.embedding_generator.warm_up(self.WARM_UP_QUERY))
+        
+        def vector_search():
+            if not embedding:
+                raise RuntimeError("no query embedding")
+            return self._vector_search(embedding, 1)
+        
+        step('vector_search', vector_search)
+        return components
 
 
-def build_index_from_docs(docs_directory: str, rag_engine: RAGEngine) -> None:
+def build_index_from_docs(docs_directory: str, rag_engine: RAGEngine, workers: int = 1) -> None:
     """
-    Helper function to build the vector index from a directory of documents.
+    Helper function to build (or incrementally update) the vector index from
+    a directory of documents. Unchanged documents are skipped.
     
     Args:
         docs_directory: Path to directory containing medical documents
         rag_engine: RAG engine instance
+        workers: Processes used to extract documents
     """
     from utils.document_processor import DocumentProcessor
+    from config import CHUNK_SIZE, CHUNK_OVERLAP
     
-    processor = DocumentProcessor(chunk_size=500, chunk_overlap=50)
-    chunks = processor.process_directory(docs_directory)
+    processor = DocumentProcessor(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP, workers=workers)
+    summary = rag_engine.index_directory(docs_directory, processor)
     
-    if chunks:
-        rag_engine.add_documents(chunks)
-        console.print("\n✓ Vector index built successfully!", style="bold green")
+    if any(summary.values()):
+        console.print(
+            f"\n✓ Vector index up to date: {summary['indexed']} indexed, {summary['unchanged']} unchanged, "
+            f"{summary['removed']} removed, {summary['failed']} failed",
+            style="bold green"
+        )
     else:
         console.print("\n⚠️  No documents found to index", style="yellow")
 
@@ -375,7 +2601,8 @@ if __name__ == "__main__":
         VECTOR_DB_DIR,
         GOOGLE_API_KEY,
         LLM_MODEL,
-        MEDICAL_DOCS_DIR
+        MEDICAL_DOCS_DIR,
+        DOCUMENT_WORKERS
     )
     
     # Initialize RAG engine
@@ -393,9 +2620,9 @@ if __name__ == "__main__":
     console.print(f"  Documents: {stats['total_documents']}")
     console.print(f"  Location: {stats['persist_directory']}")
     
-    if stats['total_documents'] == 0:
-        console.print("\n⚠️  No documents in database. Building index...", style="yellow")
-        build_index_from_docs(str(MEDICAL_DOCS_DIR), rag)
+    # Incremental: only new or changed documents are re-chunked and embedded
+    console.print("\n🔄 Syncing index with medical documents...", style="cyan")
+    build_index_from_docs(str(MEDICAL_DOCS_DIR), rag, workers=DOCUMENT_WORKERS)
     
     # Test query
     if rag.collection.count() > 0:
@@ -13,11 +13,6 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from config import DATABASE_PATH
-from rich.console import Console
-from rich.table import Table
-from rich import box
-
-console = Console()
 
 
 class AppointmentScheduler:
@@ -35,6 +30,7 @@ class AppointmentScheduler:
     
     def _ensure_db_exists(self):
         """Ensure database file exists."""
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
         if not Path(self.db_path).exists():
             raise FileNotFoundError(
                 f"Database not found at {self.db_path}. "
@@ -465,9 +461,15 @@ class AppointmentScheduler:
             return False, f"Error confirming appointment: {e}"
     
     # ==================== DISPLAY HELPERS ====================
+    # rich is imported by these CLI helpers only, so the API server never loads it
     
     def display_doctors(self, doctors: List[Dict]) -> None:
         """Display doctors in a formatted table."""
+        from rich.console import Console
+        from rich.table import Table
+        from rich import box
+        
+        console = Console()
         if not doctors:
             console.print("No doctors found.", style="yellow")
             return
@@ -490,6 +492,11 @@ class AppointmentScheduler:
     
     def display_appointments(self, appointments: List[Dict], title: str = "Appointments") -> None:
         """Display appointments in a formatted table."""
+        from rich.console import Console
+        from rich.table import Table
+        from rich import box
+        
+        console = Console()
         if not appointments:
             console.print("No appointments found.", style="yellow")
             return
@@ -522,6 +529,11 @@ class AppointmentScheduler:
     
     def display_available_slots(self, slots: List[Dict], doctor_name: str = None) -> None:
         """Display available appointment slots."""
+        from rich.console import Console
+        from rich.table import Table
+        from rich import box
+        
+        console = Console()
         if not slots:
             console.print("No available slots found.", style="yellow")
             return
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Compact the RAG index
+Deletes chunks whose document no longer exists, rebuilds the vector store
+and the BM25 index without deleted chunks, and reports the space reclaimed
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def compact_index():
+    """Compact the configured collection"""
+
+    # Import after path is set
+    from modules.rag_engine import RAGEngine
+    from config import CHROMA_COLLECTION_NAME, VECTOR_DB_DIR, GOOGLE_API_KEY, LLM_MODEL, RAG_SYSTEM_PROMPT
+    from config import EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_ENTRIES, VECTOR_STORE_BACKEND
+    from config import SEARCH_MODE, LEXICAL_FALLBACK_TIMEOUT
+    from config import EMBEDDING_DIMENSIONS, VECTOR_PRECISION, VECTOR_TRUNCATE_DIMENSIONS, VECTOR_RESCORE
+
+    print("="*70)
+    print("🧹 Compacting RAG Index")
+    print("="*70)
+
+    # Initialize RAG engine
+    print("\n🔧 Initializing RAG engine...")
+    try:
+        rag = RAGEngine(
+            collection_name=CHROMA_COLLECTION_NAME,
+            persist_directory=str(VECTOR_DB_DIR),
+            api_key=GOOGLE_API_KEY,
+            model_name=LLM_MODEL,
+            system_prompt=RAG_SYSTEM_PROMPT,
+            embedding_cache_path=str(EMBEDDING_CACHE_PATH),
+            embedding_cache_size=EMBEDDING_CACHE_MAX_ENTRIES,
+            vector_backend=VECTOR_STORE_BACKEND,
+            search_mode=SEARCH_MODE,
+            lexical_fallback_timeout=LEXICAL_FALLBACK_TIMEOUT,
+            embedding_dimensions=EMBEDDING_DIMENSIONS,
+            vector_precision=VECTOR_PRECISION,
+            vector_dimensions=VECTOR_TRUNCATE_DIMENSIONS,
+            vector_rescore=VECTOR_RESCORE
+        )
+        print("  ✓ RAG engine ready")
+    except Exception as e:
+        print(f"  ❌ Failed to initialize RAG engine: {e}")
+        return
+
+    print("\n🔄 Rebuilding indexes...")
+    result = rag.compact()
+
+    print("\n" + "="*70)
+    print("📊 Compaction Summary:")
+    print(f"  🗑️  Orphaned chunks removed: {result['orphans_removed']}")
+    print(f"  📦 Chunks remaining: {result['chunks']}")
+    print(f"  💾 Size: {result['bytes_before'] / 1024:.1f} KiB → {result['bytes_after'] / 1024:.1f} KiB")
+    print(f"  ✅ Reclaimed: {result['bytes_reclaimed'] / 1024:.1f} KiB")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    compact_index()
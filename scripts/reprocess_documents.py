@@ -20,6 +20,10 @@ async def reprocess_failed_documents():
     from modules.rag_engine import RAGEngine
     from utils.document_processor import DocumentProcessor
     from config import CHROMA_COLLECTION_NAME, VECTOR_DB_DIR, GOOGLE_API_KEY, LLM_MODEL, RAG_SYSTEM_PROMPT
+    from config import EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_ENTRIES, VECTOR_STORE_BACKEND
+    from config import SEARCH_MODE, LEXICAL_FALLBACK_TIMEOUT
+    from config import EMBEDDING_DIMENSIONS, VECTOR_PRECISION, VECTOR_TRUNCATE_DIMENSIONS, VECTOR_RESCORE
+    from config import CHUNK_SIZE, CHUNK_OVERLAP
     
     print("="*70)
     print("🔄 Reprocessing Failed Documents")
@@ -55,7 +59,16 @@ async def reprocess_failed_documents():
             persist_directory=str(VECTOR_DB_DIR),
             api_key=GOOGLE_API_KEY,
             model_name=LLM_MODEL,
-            system_prompt=RAG_SYSTEM_PROMPT
+            system_prompt=RAG_SYSTEM_PROMPT,
+            embedding_cache_path=str(EMBEDDING_CACHE_PATH),
+            embedding_cache_size=EMBEDDING_CACHE_MAX_ENTRIES,
+            vector_backend=VECTOR_STORE_BACKEND,
+            search_mode=SEARCH_MODE,
+            lexical_fallback_timeout=LEXICAL_FALLBACK_TIMEOUT,
+            embedding_dimensions=EMBEDDING_DIMENSIONS,
+            vector_precision=VECTOR_PRECISION,
+            vector_dimensions=VECTOR_TRUNCATE_DIMENSIONS,
+            vector_rescore=VECTOR_RESCORE
         )
         print("  ✓ RAG engine ready")
     except Exception as e:
@@ -63,10 +76,9 @@ async def reprocess_failed_documents():
         return
     
     # Initialize document processor
-    processor = DocumentProcessor(chunk_size=500, chunk_overlap=50)
+    processor = DocumentProcessor(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
     
     # Process each failed document
-    import time
     for doc in failed_docs:
         try:
             print(f"\n📄 Processing: {doc['filename']}")
@@ -77,29 +89,21 @@ async def reprocess_failed_documents():
                 print(f"  ❌ File not found: {file_path}")
                 continue
             
-            # Process document
-            chunks = processor.process_document(
-                filepath=file_path,
+            # Process and upsert the document (content-derived chunk ids make this idempotent)
+            result = rag.index_document(
+                doc['id'],
+                file_path,
+                processor,
                 doc_type=doc['doc_type'],
                 author="Admin Upload",
                 url=""
             )
             
-            if not chunks:
+            if not result['chunks']:
                 print(f"  ❌ No chunks created")
                 continue
             
-            print(f"  ✓ Created {len(chunks)} chunks")
-            
-            # Update chunk IDs to include timestamp to avoid conflicts
-            timestamp = str(int(time.time()))
-            for i, chunk in enumerate(chunks):
-                chunk['metadata']['chunk_id'] = f"{doc['id']}_{timestamp}_{i}"
-                chunk['id'] = f"{doc['id']}_{timestamp}_{i}"
-            
-            # Add to RAG engine
-            rag.add_documents(chunks)
-            print(f"  ✓ Added to RAG vector database")
+            print(f"  ✓ {result['chunks']} chunks ({result['written']} written to RAG vector database)")
             
             # Verify it was added
             stats = rag.get_stats()
@@ -109,7 +113,7 @@ async def reprocess_failed_documents():
             for m in metadata:
                 if m['id'] == doc['id']:
                     m['status'] = 'indexed'
-                    m['chunks_count'] = len(chunks)
+                    m['chunks_count'] = result['chunks']
                     print(f"  ✓ Status updated to 'indexed'")
                     break
                     
@@ -0,0 +1,100 @@
+"""
+Shared pytest fixtures for the offline RAG engine tests: an embedding
+stand-in and a factory for engines on the local vector backend that use it.
+"""
+
+import hashlib
+import math
+import random
+import sys
+import threading
+from pathlib import Path
+from typing import List, Union
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+WORDS = (
+    "stroke patient blood pressure artery brain clot thrombolysis alteplase imaging "
+    "carotid atrial fibrillation anticoagulation rehabilitation aphasia weakness "
+    "emergency onset symptoms guideline recommendation evidence risk diabetes "
+    "cholesterol smoking exercise diet hemorrhage ischemic transient attack"
+).split()
+
+
+class StubEmbeddingClient:
+    """Stand-in for ``google.generativeai.embed_content``: deterministic unit vectors, no network."""
+
+    def __init__(self, dimension: int = 16, fail: bool = False):
+        """
+        Args:
+            dimension: Size of the returned vectors
+            fail: Raise a 503-style error on every request
+        """
+        self.dimension = dimension
+        self.fail = fail
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.texts = 0
+
+    def vector(self, text: str) -> List[float]:
+        """Unit vector derived from the text's hash."""
+        values = []
+        counter = 0
+        while len(values) < self.dimension:
+            digest = hashlib.sha256(f"{counter}:{text}".encode('utf-8')).digest()
+            values.extend((b - 127.5) / 127.5 for b in digest)
+            counter += 1
+        values = values[:self.dimension]
+        norm = math.sqrt(sum(v * v for v in values)) or 1.0
+        return [v / norm for v in values]
+
+    def embed_content(self, model: str, content: Union[str, List[str]], task_type: str = None, **kwargs):
+        texts = [content] if isinstance(content, str) else list(content)
+        with self._lock:
+            self.requests += 1
+            self.texts += len(texts)
+        if self.fail:
+            raise RuntimeError("503 simulated provider overload")
+        vectors = [self.vector(text) for text in texts]
+        return {'embedding': vectors[0] if isinstance(content, str) else vectors}
+
+
+@pytest.fixture
+def embedding_client():
+    """Factory for stub embedding clients: ``embedding_client(dimension=16, fail=False)``."""
+    return StubEmbeddingClient
+
+
+@pytest.fixture
+def rag_engine(tmp_path):
+    """
+    Factory for RAG engines whose embeddings come from a StubEmbeddingClient.
+
+    ``rag_engine(directory=None, client=None, **engine_kwargs)`` stores the
+    index under ``directory`` (default: a per-test temporary directory) on
+    the local vector backend unless ``vector_backend`` is given; the client
+    is reachable as ``rag.embedding_generator.embedding_model``.
+    """
+    from modules.rag_engine import RAGEngine
+
+    def make(directory=None, client=None, **kwargs):
+        kwargs.setdefault('vector_backend', "local")
+        rag = RAGEngine("test_collection", str(directory or tmp_path / "db"), "test-key", "gemini-2.5-flash",
+                        **kwargs)
+        rag.embedding_generator.embedding_model = client or StubEmbeddingClient()
+        return rag
+
+    return make
+
+
+@pytest.fixture
+def sentences():
+    """Deterministic pseudo-clinical sentences: ``sentences(count, seed=0)``."""
+    def make(count: int, seed: int = 0) -> List[str]:
+        rng = random.Random(seed)
+        return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+                for _ in range(count)]
+
+    return make
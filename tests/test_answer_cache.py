@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Tests for the RAG answer cache (runs offline)
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.answer_cache import AnswerCache, normalize_question
+
+RESULT = {'answer': "Sudden numbness, confusion and trouble speaking [1].", 'citations': ["[1] stroke_overview"]}
+
+
+def test_normalized_exact_hit():
+    cache = AnswerCache(similarity_threshold=None)
+    cache.put("What are the symptoms of a stroke?", RESULT)
+
+    assert normalize_question("  WHAT are the symptoms of a stroke ") == "what are the symptoms of a stroke"
+    assert cache.get("what are the symptoms of a stroke")['answer'] == RESULT['answer']
+    assert cache.get("How is a stroke treated?") is None
+    assert cache.stats()['hit_ratio'] == 0.5
+
+
+def test_semantic_hit_above_threshold():
+    cache = AnswerCache(similarity_threshold=0.9)
+    cache.put("What are the symptoms of a stroke?", RESULT, query_embedding=[1.0, 0.0, 0.0])
+
+    assert cache.get("stroke symptoms?", query_embedding=[0.99, 0.05, 0.0]) is not None
+    assert cache.get("stroke treatment?", query_embedding=[0.0, 1.0, 0.0]) is None
+    assert cache.stats()['semantic_hits'] == 1
+
+
+def test_ttl_lru_and_invalidation():
+    cache = AnswerCache(max_entries=2, ttl_seconds=0.05, similarity_threshold=None)
+    cache.put("a", RESULT)
+    cache.put("b", RESULT)
+    cache.put("c", RESULT)
+    assert cache.get("a") is None  # evicted as least recently used
+
+    time.sleep(0.06)
+    assert cache.get("b") is None  # expired
+
+    cache.put("d", RESULT)
+    cache.clear()
+    assert cache.get("d") is None
+    assert cache.stats()['invalidations'] == 1
+
+
+if __name__ == "__main__":
+    test_normalized_exact_hit()
+    test_semantic_hit_above_threshold()
+    test_ttl_lru_and_invalidation()
+    print("✅ Answer cache tests passed")
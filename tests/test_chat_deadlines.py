@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Tests for per-stage chat deadlines, circuit breakers and degraded answers (runs offline)
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.circuit_breaker import StageGuard, StageUnavailable
+from utils.rate_limiter import AdaptiveRateLimiter
+
+CHUNKS = [
+    {'text': "Alteplase (tPA) dissolves clots when given within 4.5 hours.", 'metadata': {'source': 'treatment'}},
+    {'text': "Use the F.A.S.T. test: Face, Arms, Speech, Time.", 'metadata': {'source': 'warning_signs'}},
+    {'text': "A TIA is a temporary blockage, often called a mini-stroke.", 'metadata': {'source': 'tia'}},
+]
+
+
+class StubModel:
+    """Async Gemini stand-in taking ``delay`` seconds per answer."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+
+    async def generate_content_async(self, prompt, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return SimpleNamespace(text="Alteplase must be given within 4.5 hours.")
+
+
+class BrokenStreamModel:
+    """Async Gemini stand-in whose stream fails after a few chunks."""
+
+    async def generate_content_async(self, prompt, **kwargs):
+        async def chunks():
+            yield SimpleNamespace(text="Alteplase must be given ")
+            yield SimpleNamespace(text="within 4.5 hours")
+            raise ConnectionError("stream reset by peer")
+        return chunks()
+
+
+@pytest.fixture
+def engine(rag_engine):
+    """Engine over CHUNKS with an unlimited rate limiter; keyword arguments go to RAGEngine."""
+    def make(**kwargs):
+        rag = rag_engine(rate_limiter=AdaptiveRateLimiter(), **kwargs)
+        rag.add_documents(CHUNKS)
+        return rag
+    return make
+
+
+def test_guard_opens_after_failures_and_recovers():
+    guard = StageGuard("generation", timeout=0.02, failure_threshold=2, reset_timeout=0.05)
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    async def fast():
+        return "ok"
+
+    async def scenario():
+        for _ in range(2):
+            try:
+                await guard.run(slow)
+                raise AssertionError("expected a timeout")
+            except StageUnavailable as e:
+                assert "timed out" in e.reason
+        assert guard.state == "open"
+        try:
+            await guard.run(fast)
+            raise AssertionError("expected a short circuit")
+        except StageUnavailable as e:
+            assert e.reason == "circuit open"
+
+        await asyncio.sleep(0.06)
+        assert guard.state == "half_open"
+        assert await guard.run(fast) == "ok"
+        assert guard.state == "closed"
+
+    asyncio.run(scenario())
+    stats = guard.stats()
+    assert stats['timeouts'] == 2 and stats['short_circuits'] == 1 and stats['times_opened'] == 1
+
+
+def test_slow_generation_degrades_to_cited_passages(engine):
+    rag = engine(stage_timeouts={'generation': 0.05}, circuit_failure_threshold=2)
+    rag.model = StubModel(delay=1.0)
+
+    started = time.perf_counter()
+    result = asyncio.run(rag.aquery("When is tPA given?", n_results=2))
+    assert time.perf_counter() - started < 0.5
+    assert result['degraded'] and not result.get('error')
+    assert result['answer'].startswith(rag.DEGRADED_INTRO)
+    assert "[1] Alteplase" in result['answer'] and result['citations']
+    assert rag.answer_cache.stats()['entries'] == 0  # degraded answers are not cached
+
+    # Second timeout opens the circuit; the third request skips the model entirely
+    asyncio.run(rag.aquery("What is a TIA?", n_results=2))
+    calls = rag.model.calls
+    events = asyncio.run(_collect(rag.astream_query("What is a TIA?", n_results=2)))
+    assert rag.model.calls == calls
+    assert [event['type'] for event in events] == ['final'] and events[0]['degraded']
+    assert rag.get_stats()['stages']['generation']['short_circuits'] == 1
+
+
+def test_expired_cached_answer_served_when_generation_is_down(engine):
+    rag = engine(stage_timeouts={'generation': 0.05}, answer_cache_ttl=0.05)
+    rag.model = StubModel()
+    fresh = asyncio.run(rag.aquery("When is tPA given?", n_results=2))
+    assert not fresh.get('degraded')
+
+    time.sleep(0.06)
+    rag.model = StubModel(delay=1.0)
+    stale = asyncio.run(rag.aquery("When is tPA given?", n_results=2))
+    assert stale['degraded'] and stale['cached'] and stale['answer'] == fresh['answer']
+
+
+def test_stream_failure_keeps_the_streamed_text(engine):
+    rag = engine()
+    rag.model = BrokenStreamModel()
+    events = asyncio.run(_collect(rag.astream_query("When is tPA given?", n_results=2)))
+    deltas = "".join(event['content'] for event in events if event['type'] == 'delta')
+    final = events[-1]
+    assert deltas == "Alteplase must be given within 4.5 hours"
+    assert final['type'] == 'final' and final['answer'] == deltas
+    assert final['truncated'] and final['degraded'] and not final.get('error')
+    assert final['citations'] and rag.answer_cache.stats()['entries'] == 0
+
+
+async def _collect(events):
+    return [event async for event in events]
+
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for MMR selection, chunk merging and context packing (runs offline)
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.context_selection import (
+    estimate_tokens, merge_adjacent, mmr_select, pack_to_budget, shingle_containment
+)
+from utils.document_processor import DocumentProcessor
+from modules.rag_engine import RAGEngine
+from benchmarks.fixtures import sentences
+from benchmarks.providers import LocalEmbeddingClient
+
+
+def _chunk(index, text, start, end, content_hash="abc"):
+    return {'id': f"{content_hash}_{index}", 'text': text,
+            'metadata': {'source': 'guide', 'content_hash': content_hash, 'chunk_index': index,
+                         'start_char': start, 'end_char': end}}
+
+
+def test_mmr_skips_near_duplicates_and_diversifies():
+    vectors = np.array([[1, 0, 0], [1, 0, 0], [0.9, 0.436, 0], [0, 0, 1]], dtype=np.float32)
+    similarity = vectors @ vectors.T
+    relevance = np.array([1.0, 0.99, 0.95, 0.6], dtype=np.float32)
+    duplicates = similarity >= 0.97
+    assert mmr_select(relevance, similarity, 2, lambda_=1.0, duplicates=duplicates) == [0]  # the copy is represented
+    assert mmr_select(relevance, similarity, 3, lambda_=1.0, duplicates=duplicates) == [0, 2]
+    assert mmr_select(relevance, similarity, 2, lambda_=0.5) == [0, 3]  # dissimilar passage preferred
+    assert mmr_select(relevance, np.zeros((4, 4), dtype=np.float32), 3) == [0, 1, 2]  # no embeddings
+
+
+def test_text_overlap_detects_repeated_passages():
+    base = "Call emergency services at once if the face droops or an arm is weak."
+    overlap = shingle_containment([base, "Stroke signs. " + base, "Lower blood pressure and stop smoking daily."])
+    assert overlap[0, 1] == overlap[1, 0] == 1.0
+    assert overlap[0, 2] == 0.0 and overlap[0, 0] == 0.0
+
+
+def test_adjacent_chunks_merge_without_repeating_the_overlap():
+    text = "Stroke is an emergency. Call for help at once. Time lost is brain lost."
+    first, second, third = _chunk(0, text[:46], 0, 46), _chunk(1, text[24:], 24, len(text)), _chunk(5, "Later.", 90, 96)
+    other = _chunk(1, "Other document.", 0, 15, content_hash="def")
+
+    merged = merge_adjacent([second, other, first, third])
+    assert [passage['ids'] for passage in merged] == [["abc_0", "abc_1"], ["def_1"], ["abc_5"]]
+    assert merged[0]['text'] == text
+
+
+def test_packing_respects_the_token_budget():
+    passages = [{'text': "a" * 400}, {'text': "b" * 2000}, {'text': "c" * 100}]
+    packed = pack_to_budget(passages, token_budget=150)
+    assert [p['text'][0] for p in packed] == ["a", "c"]
+    assert sum(estimate_tokens(p['text']) for p in packed) <= 150
+    assert estimate_tokens(pack_to_budget(passages[1:], token_budget=100)[0]['text']) <= 100
+
+
+def test_engine_context_has_no_redundant_passages():
+    with tempfile.TemporaryDirectory() as tmp:
+        docs = Path(tmp) / "medical_docs"
+        docs.mkdir()
+        overview = " ".join(sentences(40))
+        (docs / "overview.md").write_text(overview)
+        (docs / "overview.txt").write_text(overview + " Updated.")  # a near copy
+        rag = RAGEngine("test_collection", str(Path(tmp) / "db"), "test-key", "gemini-2.5-flash",
+                        vector_backend="local", context_token_budget=400,
+                        near_duplicate_threshold=None)  # embed the near copy itself, not reuse its vectors
+        rag.embedding_generator.embedding_model = LocalEmbeddingClient(dimension=16, request_latency=0,
+                                                                       per_text_latency=0)
+        rag.index_directory(str(docs), DocumentProcessor(chunk_size=300, chunk_overlap=60))
+
+        query = " ".join(overview.split()[:12])
+        raw = rag.search(query, n_results=5)
+        passages = rag.retrieve(query, n_results=5)
+
+        texts = [passage['text'] for passage in passages]
+        assert len(set(texts)) == len(texts)
+        assert sum(estimate_tokens(text) for text in texts) <= 400
+        assert len({text for text in (chunk['text'] for chunk in raw)}) < len(raw)  # raw top-5 repeats itself
+
+
+if __name__ == "__main__":
+    test_mmr_skips_near_duplicates_and_diversifies()
+    test_text_overlap_detects_repeated_passages()
+    test_adjacent_chunks_merge_without_repeating_the_overlap()
+    test_packing_respects_the_token_budget()
+    test_engine_context_has_no_redundant_passages()
+    print("✅ Context selection tests passed")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for parallel document extraction (runs offline)
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import utils.document_processor as document_processor
+from utils.document_processor import DocumentProcessor
+from benchmarks.fixtures import sentences, write_guideline_pdf
+
+
+def test_streamed_chunks_match_whole_text():
+    text = "\n\n\n".join(" ".join(sentences(30, seed=page)) for page in range(5)) + "\n\n\n\n  "
+    processor = DocumentProcessor(chunk_size=300, chunk_overlap=40)
+    expected = processor.chunk_text(text, "guide")
+
+    # Page boundaries anywhere, including inside runs of newlines and sentences
+    for step in (1, 7, 299, 1000):
+        pieces = [text[i:i + step] for i in range(0, len(text), step)]
+        assert list(processor.iter_chunks(pieces, "guide")) == expected
+
+
+def test_chunks_pack_whole_sentences_and_cover_the_text():
+    text = "\n\n".join(" ".join(sentences(25, seed=page)) for page in range(4))
+    processor = DocumentProcessor(chunk_size=300, chunk_overlap=60)
+    chunks = processor.chunk_text(text, "guide")
+
+    covered = 0
+    for previous, chunk in zip([None] + chunks, chunks):
+        assert text[chunk['start_char']:chunk['end_char']].strip() == chunk['text']
+        assert len(chunk['text']) <= 300 and chunk['chunk_index'] == chunks.index(chunk)
+        assert chunk['text'].endswith(".")  # ends on a sentence boundary
+        assert chunk['start_char'] <= covered  # nothing skipped
+        if previous:
+            assert 0 <= previous['end_char'] - chunk['start_char'] <= 60
+        covered = chunk['end_char']
+    assert covered == len(text)
+
+
+def test_text_without_boundaries_splits_at_words_or_hard():
+    processor = DocumentProcessor(chunk_size=50, chunk_overlap=10)
+    words = processor.chunk_text("word " * 100)
+    assert all(len(chunk['text']) <= 50 and not chunk['text'].endswith("wor") for chunk in words)
+    assert len(processor.chunk_text("x" * 1000)) == 25  # hard splits, 40 new chars each
+
+
+def test_pdf_pages_stream_like_loaded_text():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "guideline.pdf"
+        write_guideline_pdf(path, page_count=3)
+        processor = DocumentProcessor(chunk_size=300, chunk_overlap=30)
+        pages = list(processor.iter_text(str(path)))
+        assert len(pages) == 3 and "".join(pages) == processor.load_pdf(str(path))
+        assert list(processor.iter_document_chunks(str(path))) == processor.process_document(str(path))
+
+
+def test_parallel_extraction_matches_serial():
+    original = (document_processor.PARALLEL_MIN_BYTES, document_processor.PDF_PAGES_PER_TASK)
+    document_processor.PARALLEL_MIN_BYTES = 0
+    document_processor.PDF_PAGES_PER_TASK = 2  # split the 6-page PDF into page ranges
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            docs = Path(tmp)
+            write_guideline_pdf(docs / "guideline.pdf", page_count=6)
+            (docs / "notes.txt").write_text(" ".join(sentences(40, seed=1)))
+            (docs / "summary.md").write_text(" ".join(sentences(20, seed=2)))
+            (docs / "broken.pdf").write_bytes(b"not a pdf")
+
+            serial = DocumentProcessor(chunk_size=300, chunk_overlap=30, workers=1)
+            parallel = DocumentProcessor(chunk_size=300, chunk_overlap=30, workers=2)
+            assert len(parallel._plan_units(parallel.find_documents(tmp))) == 6
+
+            expected = serial.process_directory(tmp)
+            chunks = parallel.process_directory(tmp)
+
+            assert [(c['id'], c['text']) for c in chunks] == [(c['id'], c['text']) for c in expected]
+            assert {c['metadata']['source'] for c in chunks} == {"guideline", "notes", "summary"}
+            assert [Path(e['file']).name for e in parallel.last_errors] == ["broken.pdf"]
+            assert serial.last_errors == parallel.last_errors
+    finally:
+        document_processor.PARALLEL_MIN_BYTES, document_processor.PDF_PAGES_PER_TASK = original
+
+
+if __name__ == "__main__":
+    test_streamed_chunks_match_whole_text()
+    test_chunks_pack_whole_sentences_and_cover_the_text()
+    test_text_without_boundaries_splits_at_words_or_hard()
+    test_pdf_pages_stream_like_loaded_text()
+    test_parallel_extraction_matches_serial()
+    print("✅ Document processor tests passed")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for the persistent embedding cache (runs offline)
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.embedding_cache import EmbeddingCache
+from utils.embeddings import EmbeddingGenerator
+from benchmarks.providers import LocalEmbeddingClient
+
+MODEL = "models/gemini-embedding-001"
+
+
+def test_roundtrip_and_counters():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = EmbeddingCache(Path(tmp) / "cache.db")
+        assert cache.get(MODEL, "retrieval_document", "stroke") is None
+
+        cache.put(MODEL, "retrieval_document", "stroke", [0.5, -1.0, 0.25])
+        assert cache.get(MODEL, "retrieval_document", "stroke") == [0.5, -1.0, 0.25]
+        # Task type is part of the key
+        assert cache.get(MODEL, "retrieval_query", "stroke") is None
+
+        stats = cache.stats()
+        assert stats['hits'] == 1 and stats['misses'] == 2
+        assert stats['vector_bytes'] == 3 * 4  # float32 blobs
+        cache.close()
+
+
+def test_lru_eviction():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = EmbeddingCache(Path(tmp) / "cache.db", max_entries=2)
+        cache.put(MODEL, "retrieval_document", "a", [1.0])
+        cache.put(MODEL, "retrieval_document", "b", [2.0])
+        cache.get(MODEL, "retrieval_document", "a")  # "b" is now least recently used
+        cache.put(MODEL, "retrieval_document", "c", [3.0])
+
+        assert cache.get(MODEL, "retrieval_document", "b") is None
+        assert cache.get(MODEL, "retrieval_document", "a") == [1.0]
+        assert cache.stats()['evictions'] == 1
+        cache.close()
+
+
+def test_reindexing_unchanged_text_makes_no_api_calls():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = EmbeddingCache(Path(tmp) / "cache.db")
+        client = LocalEmbeddingClient(dimension=8, request_latency=0, per_text_latency=0)
+        generator = EmbeddingGenerator(api_key=None, client=client, cache=cache)
+        texts = [f"chunk {i}" for i in range(10)]
+
+        first = generator.generate_batch(texts)
+        requests_after_first = client.requests
+        second = generator.generate_batch(texts)
+
+        assert client.requests == requests_after_first
+        assert generator.last_batch_stats['cache_hits'] == len(texts)
+        assert [[round(v, 5) for v in vec] for vec in first] == \
+               [[round(v, 5) for v in vec] for vec in second]
+        cache.close()
+
+
+if __name__ == "__main__":
+    test_roundtrip_and_counters()
+    test_lru_eviction()
+    test_reindexing_unchanged_text_makes_no_api_calls()
+    print("✅ Embedding cache tests passed")
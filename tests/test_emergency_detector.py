@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for the Aho-Corasick matcher and the stroke-emergency detector (runs offline)
+"""
+
+import random
+import re
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.aho_corasick import AhoCorasick
+from modules.emergency_detector import EmergencyDetector, emergency_response
+
+
+def test_automaton_finds_every_occurrence():
+    rng = random.Random(0)
+    for _ in range(200):
+        patterns = {"".join(rng.choice("ab") for _ in range(rng.randint(1, 4))): i for i in range(6)}
+        text = "".join(rng.choice("abc") for _ in range(40))
+        found = sorted((end, pattern) for end, pattern, _ in AhoCorasick(patterns).finditer(text))
+        expected = sorted((match.start() + len(pattern) - 1, pattern)
+                          for pattern in patterns for match in re.finditer(f"(?={pattern})", text))
+        assert found == expected
+
+
+def test_active_emergencies_are_detected():
+    detector = EmergencyDetector()
+    for message in ("My face is drooping and my speech is slurred", "I can't move my arm!",
+                    "slurred speech right now", "Dad's face drooped suddenly", "I think mom is having a stroke"):
+        assert detector.detect(message) is not None, message
+    for message in ("What does face drooping mean?", "What are the warning signs of a stroke?",
+                    "Can stroke cause slurred speech?", "hi", "How can I prevent a stroke?"):
+        assert detector.detect(message) is None, message
+    # Whole words only
+    assert detector.detect("Is a gmail account needed to book?") is None
+
+    stats = detector.stats()
+    assert stats['checks'] == 11 and stats['hits'] == 5
+    assert stats['top_phrases']['slurred speech'] == 1
+    assert "911" in emergency_response() and "1122" in emergency_response("1122")
+
+
+def test_history_and_education_questions_are_not_emergencies():
+    detector = EmergencyDetector()
+    for message in ("Can you help me understand what slurred speech means?",
+                    "My father is paralyzed after a stroke last year, what rehabilitation helps?",
+                    "I have had arm weakness since my stroke in 2019, will it improve?",
+                    "I can't move my arm since the stroke, is therapy worth it?",
+                    "Please explain why my mom has a crooked smile years after her stroke"):
+        assert detector.detect(message) is None, message
+    # An onset cue still wins over a question
+    for message in ("What does it mean that my arm went numb just now?",
+                    "My dad had a stroke last year and his face is drooping again right now",
+                    "I can't move my leg, it started just a minute ago"):
+        assert detector.detect(message) is not None, message
+
+
+if __name__ == "__main__":
+    test_automaton_finds_every_occurrence()
+    test_active_emergencies_are_detected()
+    test_history_and_education_questions_are_not_emergencies()
+    print("✅ Emergency detector tests passed")
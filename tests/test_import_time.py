@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Import-time budget for the API server: heavy subsystems must be imported
+lazily, so worker start and reload stay fast and work offline
+"""
+
+import re
+import subprocess
+import sys
+import warnings
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# Cumulative import time of api.main (FastAPI and pydantic make up most of it);
+# about 0.7 s with lazy imports, 3.9 s when everything was imported eagerly.
+# Wall-clock time depends on the machine, so exceeding it only warns: the
+# LAZY_PACKAGES check below is what keeps the import lean
+API_IMPORT_BUDGET_MS = 1500
+
+# Imported on first use (RAG engine, calendar integration, CLI output), never by api.main itself
+LAZY_PACKAGES = ("chromadb", "google.generativeai", "pipedream", "fastmcp", "rich", "numpy")
+
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+
+def import_profile(module: str) -> dict:
+    """Cumulative import time (µs) of every module ``python -X importtime`` reports for ``import module``."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, timeout=120
+    )
+    assert completed.returncode == 0, completed.stderr[-2000:]
+    profile = {}
+    for line in completed.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            profile[match.group(4)] = int(match.group(2))
+    return profile
+
+
+def test_api_import_skips_heavy_subsystems():
+    profile = import_profile("api.main")
+    loaded = sorted({
+        package for package in LAZY_PACKAGES
+        for name in profile if name == package or name.startswith(package + ".")
+    })
+    assert not loaded, f"api.main imports {loaded} at import time"
+
+
+def test_api_import_time_report():
+    profile = import_profile("api.main")
+    elapsed_ms = profile["api.main"] / 1000
+    slowest = sorted(profile.items(), key=lambda item: item[1], reverse=True)[:10]
+    print(f"api.main imported in {elapsed_ms:.0f}ms; slowest: "
+          + ", ".join(f"{name} {us / 1000:.0f}ms" for name, us in slowest))
+    if elapsed_ms > API_IMPORT_BUDGET_MS:
+        warnings.warn(f"api.main took {elapsed_ms:.0f}ms to import (budget {API_IMPORT_BUDGET_MS}ms)")
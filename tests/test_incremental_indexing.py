@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Tests for deterministic chunk ids and incremental re-indexing (runs offline)
+"""
+
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.document_processor import DocumentProcessor
+
+OVERVIEW = (
+    "A stroke occurs when blood flow to part of the brain is interrupted. "
+    "Ischemic strokes are caused by a blocked artery. "
+    "Hemorrhagic strokes are caused by bleeding in the brain. "
+) * 4
+PREVENTION = "Control blood pressure, stop smoking and stay active to lower stroke risk. " * 5
+
+
+class GatedEmbeddingClient:
+    """Wraps an embedding client, holding request number ``block_at`` until ``release`` is set."""
+
+    def __init__(self, client):
+        self.client = client
+        self.block_at = None
+        self.blocked = threading.Event()
+        self.release = threading.Event()
+
+    @property
+    def requests(self):
+        return self.client.requests
+
+    def embed_content(self, *args, **kwargs):
+        if self.client.requests + 1 == self.block_at:
+            self.blocked.set()
+            self.release.wait(10)
+        return self.client.embed_content(*args, **kwargs)
+
+
+def test_chunk_ids_are_stable():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "overview.txt"
+        path.write_text(OVERVIEW)
+        processor = DocumentProcessor(chunk_size=200, chunk_overlap=20)
+        first = [chunk['id'] for chunk in processor.process_document(str(path))]
+        second = [chunk['id'] for chunk in processor.process_document(str(path))]
+        assert first == second and len(set(first)) == len(first)
+
+
+def test_reindex_skips_unchanged_and_replaces_changed(rag_engine):
+    for backend in ("local", "chroma"):
+        with tempfile.TemporaryDirectory() as tmp:
+            docs = Path(tmp) / "medical_docs"
+            docs.mkdir()
+            (docs / "overview.txt").write_text(OVERVIEW)
+            (docs / "prevention.txt").write_text(PREVENTION)
+            processor = DocumentProcessor(chunk_size=200, chunk_overlap=20)
+            rag = rag_engine(Path(tmp) / "db", vector_backend=backend)
+            client = rag.embedding_generator.embedding_model
+
+            assert rag.index_directory(str(docs), processor)['indexed'] == 2
+            total = rag.collection.count()
+
+            # Unchanged documents: no embedding calls, nothing written
+            client.texts = 0
+            summary = rag.index_directory(str(docs), processor)
+            assert summary == {'indexed': 0, 'unchanged': 2, 'removed': 0, 'failed': 0}
+            assert client.texts == 0 and rag.collection.count() == total
+
+            # A changed document replaces its chunks instead of piling up
+            (docs / "prevention.txt").write_text("Atrial fibrillation raises stroke risk.")
+            assert rag.index_directory(str(docs), processor)['indexed'] == 1
+            sources = [m['source'] for m in rag.collection.get()['metadatas']]
+            assert sources.count('prevention') == 1
+            assert rag.lexical_index.count() == rag.collection.count()
+            assert rag.search("atrial fibrillation", n_results=1, mode="lexical")[0]['metadata']['source'] == 'prevention'
+
+            # A removed file drops its chunks
+            (docs / "prevention.txt").unlink()
+            assert rag.index_directory(str(docs), processor)['removed'] == 1
+            assert 'prevention' not in [m['source'] for m in rag.collection.get()['metadatas']]
+            assert rag.search("atrial fibrillation", n_results=3, mode="lexical") == []
+
+
+def test_large_document_is_embedded_in_batches(rag_engine, sentences):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "guide.txt"
+        path.write_text(" ".join(sentences(60)))
+        processor = DocumentProcessor(chunk_size=200, chunk_overlap=20)
+        rag = rag_engine(Path(tmp) / "db")
+        client = rag.embedding_generator.embedding_model
+        rag.embedding_generator.batch_size = 4
+        rag.embedding_generator.max_concurrency = 1
+
+        # The stores are written to disk once for the document, not once per batch
+        saves = []
+        stores = [rag.collection, rag.lexical_index] + ([rag.near_duplicates] if rag.near_duplicates else [])
+        for store in stores:
+            name = '_save_sidecar' if store is rag.collection else 'save'
+            write = getattr(store, name)
+            setattr(store, name, lambda write=write, store=store: (saves.append(store), write())[1])
+
+        updates = []
+        result = rag.index_document("doc-1", str(path), processor,
+                                    progress=lambda stage, done, total: updates.append((stage, done, total)))
+
+        chunks = processor.process_document(str(path))
+        assert result['chunks'] == result['written'] == len(chunks) == rag.collection.count()
+        assert client.requests == (len(chunks) + 3) // 4 > 1
+        assert all(saves.count(store) == 1 for store in stores)
+        assert updates[-1] == ('embedding', len(chunks), len(chunks))
+        assert all(done <= total for _, done, total in updates)
+
+
+def test_remove_document_and_compact(rag_engine):
+    for backend in ("local", "chroma"):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "upload.txt"
+            path.write_text(PREVENTION)
+            processor = DocumentProcessor(chunk_size=200, chunk_overlap=20)
+            rag = rag_engine(Path(tmp) / "db", vector_backend=backend)
+
+            rag.index_document("doc-1", str(path), processor)
+            chunk_ids = rag.collection.ids_where('doc_id', 'doc-1')
+            assert chunk_ids and len(chunk_ids) == rag.collection.count()
+
+            assert rag.remove_document("doc-1") == len(chunk_ids)
+            assert rag.collection.count() == 0
+            assert rag.search("blood pressure", n_results=3, mode="lexical") == []
+
+            # Orphans (tagged with a doc_id the manifest no longer knows) are removed
+            rag.index_document("doc-2", str(path), processor)
+            rag.manifest.remove("doc-2")
+            result = rag.compact()
+            assert result['orphans_removed'] == len(chunk_ids)
+            assert rag.collection.count() == rag.lexical_index.count() == 0
+            if backend == "local":
+                assert result['bytes_reclaimed'] > 0
+                assert rag.collection.stats()['deleted_rows'] == 0
+
+
+def test_embedding_runs_outside_the_write_lock(rag_engine, embedding_client, sentences):
+    with tempfile.TemporaryDirectory() as tmp:
+        (Path(tmp) / "overview.txt").write_text(OVERVIEW)
+        (Path(tmp) / "guide.txt").write_text(" ".join(sentences(40)))
+        processor = DocumentProcessor(chunk_size=200, chunk_overlap=20)
+        client = GatedEmbeddingClient(embedding_client())
+        rag = rag_engine(Path(tmp) / "db", client=client)
+        rag.embedding_generator.batch_size = 4
+        rag.embedding_generator.max_concurrency = 1
+        rag.index_document("doc-0", str(Path(tmp) / "overview.txt"), processor)
+
+        # The guide's second batch waits on the provider after its first batch was stored
+        client.block_at = client.requests + 2
+        results = []
+        worker = threading.Thread(target=lambda: results.append(
+            rag.index_document("doc-1", str(Path(tmp) / "guide.txt"), processor)))
+        worker.start()
+        assert client.blocked.wait(5)
+        written = rag.collection.ids_where('doc_id', 'doc-1')
+        assert written
+
+        # Deletion and compaction go ahead, and leave the chunks being indexed alone
+        assert rag.remove_document("doc-0") > 0
+        assert rag.compact()['orphans_removed'] == 0
+        assert set(written) <= set(rag.collection.ids_where('doc_id', 'doc-1'))
+        assert rag.search("blood pressure", n_results=3, mode="lexical") is not None
+
+        client.release.set()
+        worker.join(10)
+        assert results and results[0]['chunks'] == len(processor.process_document(str(Path(tmp) / "guide.txt")))
+        assert rag.collection.count() == results[0]['chunks'] and rag.is_document_current(
+            "doc-1", rag.manifest.get("doc-1")['content_hash'], processor)
+
+
+def test_document_indexed_during_a_swap_is_indexed_into_the_new_version(rag_engine, embedding_client, sentences):
+    with tempfile.TemporaryDirectory() as tmp:
+        (Path(tmp) / "overview.txt").write_text(OVERVIEW)
+        (Path(tmp) / "guide.txt").write_text(" ".join(sentences(40)))
+        processor = DocumentProcessor(chunk_size=200, chunk_overlap=20)
+        client = GatedEmbeddingClient(embedding_client())
+        rag = rag_engine(Path(tmp) / "db", client=client)
+        rag.embedding_generator.batch_size = 4
+        rag.embedding_generator.max_concurrency = 1
+        rag.index_document("doc-0", str(Path(tmp) / "overview.txt"), processor)
+
+        version = rag.open_version(embedding_model="models/test-v2", embedding_dimensions=8)
+        version.embedding_generator.embedding_model = embedding_client(dimension=8)
+        rag.populate_version(version, processor)
+
+        client.block_at = client.requests + 2
+        results = []
+        worker = threading.Thread(target=lambda: results.append(
+            rag.index_document("doc-1", str(Path(tmp) / "guide.txt"), processor)))
+        worker.start()
+        assert client.blocked.wait(5)
+
+        # The swap does not wait for the document, which then starts over on the new version
+        previous = rag.activate_version(version, processor)
+        assert rag.active is version and "doc-1" not in version.manifest.entries
+        client.release.set()
+        worker.join(10)
+        assert results and results[0]['status'] == 'indexed'
+        assert "doc-1" in version.manifest.entries and "doc-1" not in previous.manifest.entries
+        assert len(version.collection.ids_where('doc_id', 'doc-1')) == results[0]['chunks']
+
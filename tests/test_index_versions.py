@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for blue/green index rebuilds: versions, shadow comparison and the alias swap (runs offline)
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.rag_engine import RAGEngine
+from utils.document_processor import DocumentProcessor
+
+QUESTIONS = ["What is a stroke?", "How is blood pressure controlled?", "What are the warning signs?"]
+
+
+def _docs(tmp, sentences):
+    docs = Path(tmp) / "medical_docs"
+    docs.mkdir()
+    (docs / "overview.txt").write_text(" ".join(sentences(30)))
+    (docs / "prevention.txt").write_text(" ".join(sentences(30, seed=7)))
+    return docs
+
+
+def test_rebuild_serves_old_version_until_swap_and_resumes(rag_engine, embedding_client, sentences):
+    with tempfile.TemporaryDirectory() as tmp:
+        docs = _docs(tmp, sentences)
+        rag = rag_engine(Path(tmp) / "db")
+        rag.index_directory(str(docs), DocumentProcessor(chunk_size=300, chunk_overlap=30))
+        served = rag.active
+        before = [chunk['id'] for chunk in rag.search(QUESTIONS[0], 3)]
+
+        # New model, dimensions and chunking, built next to the serving version
+        processor = DocumentProcessor(chunk_size=200, chunk_overlap=20)
+        version = rag.open_version(embedding_model="models/test-v2", embedding_dimensions=8)
+        client = embedding_client(dimension=8)
+        version.embedding_generator.embedding_model = client
+        summary = rag.populate_version(version, processor, requests_per_minute=6000)
+        assert summary['indexed'] == 2 and summary['failed'] == 0
+        assert version.collection.count() > served.collection.count()
+        assert rag.active is served and [chunk['id'] for chunk in rag.search(QUESTIONS[0], 3)] == before
+
+        # Populating again only checks the files
+        requests = client.requests
+        assert rag.populate_version(version, processor)['unchanged'] == 2 and client.requests == requests
+
+        report = rag.compare_versions(version, QUESTIONS, n_results=3)
+        assert report['queries'] == 3 and 0 <= report['mean_overlap'] <= 1
+
+        # A document ingested during the build is caught up by the swap
+        (docs / "late.txt").write_text(" ".join(sentences(10, seed=3)))
+        rag.index_document("medical_docs/late.txt", str(docs / "late.txt"), processor)
+        previous = rag.activate_version(version, processor)
+        assert previous is served and rag.active is version
+        assert "medical_docs/late.txt" in version.manifest.entries
+        assert len(rag.search(QUESTIONS[1], 3)) == 3
+        assert rag.open_version(embedding_model="models/test-v2", embedding_dimensions=8).name != version.name
+
+        # The alias survives a restart, with the settings the version was built with
+        reopened = RAGEngine("test_collection", str(Path(tmp) / "db"), "test-key", "gemini-2.5-flash",
+                             vector_backend="local")
+        assert reopened.active.name == version.name
+        assert reopened.embedding_generator.model_name == "models/test-v2"
+        assert reopened.collection.count() == version.collection.count()
+
+        previous.drop()
+        assert not any(path.exists() for path in previous.files())
+
+
+def test_shadow_compares_live_queries_without_serving_them(rag_engine, embedding_client, sentences):
+    with tempfile.TemporaryDirectory() as tmp:
+        docs = _docs(tmp, sentences)
+        processor = DocumentProcessor(chunk_size=300, chunk_overlap=30)
+        rag = rag_engine(Path(tmp) / "db")
+        rag.index_directory(str(docs), processor)
+
+        version = rag.open_version(vector_precision="float16")
+        version.embedding_generator.embedding_model = embedding_client()
+        rag.populate_version(version, processor)
+        rag.start_shadow(version)
+        passages = rag.retrieve(QUESTIONS[0], n_results=3)
+        assert passages
+
+        deadline = time.time() + 5
+        while rag.shadow_report['queries'] < 1 and time.time() < deadline:
+            time.sleep(0.01)
+        # Same model and chunking: float16 storage barely moves the ranking
+        assert rag.shadow_report['queries'] == 1 and rag.shadow_report['mean_overlap'] >= 2 / 3
+        assert rag.active is not version
+
+        rag.activate_version(version, processor)
+        assert rag.shadow is None and rag.get_stats()['index_version'] == version.name
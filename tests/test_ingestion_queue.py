@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Tests for the persistent ingestion job queue (runs offline)
+"""
+
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.ingestion_queue import IngestionQueue
+
+
+def _wait_for(queue, job_id, states=('indexed', 'error'), timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job['status'] in states:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} stuck in {queue.get(job_id)['status']}")
+
+
+def test_jobs_report_progress_and_errors():
+    release = threading.Event()
+
+    def handler(job, progress):
+        if job['payload']['name'] == 'broken':
+            raise ValueError("No chunks created")
+        progress('extracting', 0, 0)
+        progress('embedding', 2, 4)
+        release.wait(5)
+        progress('embedding', 4, 4)
+        return {'chunks': 4}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = IngestionQueue(str(Path(tmp) / "jobs.db"), handler, workers=2)
+        queue.start()
+        try:
+            ok = queue.enqueue("doc-1", {'name': 'guide'})
+            broken = queue.enqueue("doc-2", {'name': 'broken'})
+
+            running = _wait_for(queue, ok, states=('embedding',))
+            assert (running['chunks_done'], running['chunks_total'], running['progress']) == (2, 4, 0.5)
+
+            release.set()
+            done = _wait_for(queue, ok)
+            assert done['status'] == 'indexed' and done['result'] == {'chunks': 4}
+            failed = _wait_for(queue, broken)
+            assert failed['status'] == 'error' and failed['error'] == "No chunks created"
+            assert queue.get("missing") is None
+        finally:
+            queue.stop()
+
+
+def test_interrupted_jobs_resume_after_restart():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "jobs.db")
+        first = IngestionQueue(db_path, lambda job, progress: None)
+        job_id = first.enqueue("doc-1", {'name': 'guide'})
+        first._claim()  # a worker picked it up, then the process died
+        assert first.get(job_id)['status'] == 'extracting'
+
+        seen = []
+        second = IngestionQueue(db_path, lambda job, progress: seen.append(job['doc_id']) or {}, workers=1)
+        assert second.get(job_id)['status'] == 'queued'
+        second.start()
+        try:
+            job = _wait_for(second, job_id)
+            assert job['status'] == 'indexed' and job['attempts'] == 2 and seen == ["doc-1"]
+        finally:
+            second.stop()
+
+
+if __name__ == "__main__":
+    test_jobs_report_progress_and_errors()
+    test_interrupted_jobs_resume_after_restart()
+    print("✅ Ingestion queue tests passed")
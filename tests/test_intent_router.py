@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests for the chat intent router and its fast-path replies (runs offline)
+"""
+
+import shutil
+import sys
+import tempfile
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import DATABASE_PATH
+from modules.intent_router import IntentRouter, booking_reply, parse_date, small_talk_reply
+from modules.scheduler import AppointmentScheduler
+
+
+def test_rules_route_small_talk_and_booking_around_rag():
+    router = IntentRouter()
+    expected = {
+        "hi": 'greeting',
+        "Hello doctor, how are you?": 'greeting',
+        "Assalam o Alaikum": 'greeting',
+        "Thanks a lot!": 'thanks',
+        "thank you so much for your help": 'thanks',
+        "ok bye": 'goodbye',
+        "book me with Dr. Ayesha tomorrow": 'booking',
+        "Is Dr. Usman available on 2026-10-20?": 'booking',
+        "schedule a check-up with a cardiologist": 'booking',
+        "hi, I have chest pain": 'medical',
+        "I need an appointment, my arm is numb": 'medical',
+        "What are the warning signs of a stroke?": 'medical',
+    }
+    for message, intent in expected.items():
+        assert router.route(message)['intent'] == intent, message
+
+
+def test_medical_questions_about_visits_are_not_bookings():
+    router = IntentRouter()
+    for message in ("Do I need a follow-up appointment after tPA treatment?",
+                    "Do I need to visit a doctor after a mini stroke?",
+                    "How often do stroke survivors need a neurology visit?",
+                    "Does my father need a check-up after his TIA?",
+                    "How soon should I get a check-up after starting blood thinners?",
+                    "I want a rehabilitation session plan for my arm"):
+        decision = router.route(message)
+        assert decision['intent'] == 'medical', message
+        assert decision['rule'] in ('booking_with_symptoms', 'booking_question'), message
+    for message in ("I need an appointment with Dr. Ayesha on Monday", "Can I get a check-up tomorrow?",
+                    "I want to book a visit with the cardiologist"):
+        assert router.route(message)['intent'] == 'booking', message
+
+
+def test_local_model_is_only_trusted_when_confident():
+    router = IntentRouter(classifier=lambda message: ('thanks', 0.9 if 'cheers' in message else 0.5))
+    assert router.route("cheers mate")['source'] == 'model'
+    assert router.route("appreciate it mate")['intent'] == 'medical'
+
+
+def test_booking_reply_lists_free_slots():
+    today = date(2026, 10, 17)  # a Saturday
+    assert parse_date("see you next monday", today) == date(2026, 10, 19)
+    assert parse_date("tomorrow please", today) == date(2026, 10, 18)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "healthcare.db"
+        shutil.copy(DATABASE_PATH, db_path)
+        scheduler = AppointmentScheduler(db_path=str(db_path))
+
+        reply = booking_reply("Is Dr. Usman available on 2026-10-20?", scheduler, today)
+        booking = reply['booking']
+        assert booking['doctor'] == "Dr. Usman Ahmed" and booking['date'] == "2026-10-20"
+        assert booking['slots'] and booking['slots'][0]['start_time'] in reply['answer']
+
+        reply = booking_reply("I want to book an appointment", scheduler, today)
+        assert reply['booking']['doctor_id'] is None and "Dr. Ayesha Malik" in reply['answer']
+
+
+def test_fast_path_latency_is_recorded():
+    router = IntentRouter()
+    router.record(router.route("what causes a stroke"), 1500.0)
+    router.record(router.route("hello"), 40.0)
+    stats = router.stats()
+    assert stats['routes']['medical']['count'] == stats['routes']['greeting']['count'] == 1
+    assert stats['fast_path_messages'] == 1 and stats['latency_saved_ms'] == 1460.0
+    assert "Welcome back!" in small_talk_reply('greeting', "Welcome back!")
+
+
+if __name__ == "__main__":
+    test_rules_route_small_talk_and_booking_around_rag()
+    test_medical_questions_about_visits_are_not_bookings()
+    test_local_model_is_only_trusted_when_confident()
+    test_booking_reply_lists_free_slots()
+    test_fast_path_latency_is_recorded()
+    print("✅ Intent router tests passed")
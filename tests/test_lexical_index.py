@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Tests for BM25 lexical search and hybrid retrieval (runs offline)
+"""
+
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.lexical_index import BM25Index, tokenize
+from modules.rag_engine import RAGEngine
+from benchmarks.providers import LocalEmbeddingClient
+
+CHUNKS = [
+    {'text': "Alteplase (tPA) dissolves clots when given within 4.5 hours.", 'metadata': {'source': 'treatment'}},
+    {'text': "Use the F.A.S.T. test: Face, Arms, Speech, Time.", 'metadata': {'source': 'warning_signs'}},
+    {'text': "A TIA is a temporary blockage, often called a mini-stroke.", 'metadata': {'source': 'tia'}},
+    {'text': "Regular exercise and a healthy diet lower stroke risk.", 'metadata': {'source': 'prevention'}},
+]
+
+
+def test_tokenize_keeps_medical_terms():
+    assert tokenize("What is tPA and the F.A.S.T. test?") == ["tpa", "fast", "test"]
+
+
+def test_bm25_ranks_exact_terms_and_persists():
+    with tempfile.TemporaryDirectory() as tmp:
+        index = BM25Index(Path(tmp) / "bm25.json")
+        ids = [f"chunk_{i}" for i in range(len(CHUNKS))]
+        index.add(ids, [c['text'] for c in CHUNKS], [c['metadata'] for c in CHUNKS])
+        assert index.add(ids[:1], ["duplicate"], [{}]) == 0
+
+        reopened = BM25Index(Path(tmp) / "bm25.json")
+        position, _ = reopened.search("when is tPA given?", 1)[0]
+        assert reopened.ids[position] == "chunk_0"
+        assert reopened.search("unrelated words", 3) == []
+
+
+def test_search_during_writes_and_compaction():
+    with tempfile.TemporaryDirectory() as tmp:
+        index = BM25Index(Path(tmp) / "bm25.json")
+        ids = [f"chunk_{i}" for i in range(len(CHUNKS))]
+        index.add(ids, [c['text'] for c in CHUNKS], [c['metadata'] for c in CHUNKS])
+        expected = index.search_chunks("when is tPA given?", 2)
+
+        done = threading.Event()
+
+        def churn():
+            for i in range(200):
+                index.upsert([f"extra_{i % 5}"], [f"Stroke note {i} about rehabilitation."], [{}], save=False)
+                index.remove([f"extra_{(i + 2) % 5}"], save=False)
+                index.compact()
+            done.set()
+
+        writer = threading.Thread(target=churn)
+        writer.start()
+        while not done.is_set():
+            found = index.search_chunks("when is tPA given?", 2)
+            assert [c['id'] for c in found] == [c['id'] for c in expected]
+        writer.join()
+
+        # Compaction renumbers positions without changing any score
+        index.remove([f"extra_{i}" for i in range(5)])
+        index.compact()
+        rebuilt = BM25Index(Path(tmp) / "rebuilt.json")
+        rebuilt.add(ids, [c['text'] for c in CHUNKS], [c['metadata'] for c in CHUNKS])
+        for query in ("stroke risk", "F.A.S.T. test", "clots"):
+            assert index.search_chunks(query, 4) == rebuilt.search_chunks(query, 4)
+
+
+def _engine(tmp, client):
+    rag = RAGEngine("test_collection", tmp, "test-key", "gemini-2.5-flash", vector_backend="local")
+    rag.embedding_generator.embedding_model = client
+    return rag
+
+
+def test_hybrid_search_and_lexical_fallback():
+    with tempfile.TemporaryDirectory() as tmp:
+        client = LocalEmbeddingClient(dimension=16, request_latency=0, per_text_latency=0)
+        rag = _engine(tmp, client)
+        rag.add_documents(CHUNKS)
+        assert rag.get_stats()['lexical_chunks'] == len(CHUNKS)
+
+        hybrid = rag.search("What is a TIA?", n_results=2)
+        assert hybrid[0]['metadata']['source'] == 'tia'
+        assert all('rrf_score' in chunk for chunk in hybrid)
+
+        # Embedding API down (no query embedding): search answers from the lexical index
+        fallback = rag.search("F.A.S.T. warning signs", n_results=1, query_embedding=[])
+        assert fallback[0]['metadata']['source'] == 'warning_signs'
+
+
+def test_lexical_index_rebuilt_from_existing_collection():
+    with tempfile.TemporaryDirectory() as tmp:
+        client = LocalEmbeddingClient(dimension=16, request_latency=0, per_text_latency=0)
+        _engine(tmp, client).add_documents(CHUNKS)
+        next(Path(tmp).glob("*_bm25.json")).unlink()
+
+        assert _engine(tmp, client).lexical_index.count() == len(CHUNKS)
+
+
+def test_search_many_matches_search_with_one_embedding_request():
+    queries = ["What is a TIA?", "", "When is tPA given?", "How do I lower stroke risk?"]
+    with tempfile.TemporaryDirectory() as tmp:
+        client = LocalEmbeddingClient(dimension=16, request_latency=0, per_text_latency=0)
+        rag = _engine(tmp, client)
+        rag.add_documents(CHUNKS)
+        rag.embedding_generator.cache = None
+
+        for mode in RAGEngine.SEARCH_MODES:
+            requests = client.requests
+            batched = rag.search_many(queries, n_results=2, mode=mode)
+            assert client.requests - requests == (0 if mode == "lexical" else 1)
+            assert batched[1] == []
+            for query, results in zip(queries, batched):
+                if query:
+                    assert [c['id'] for c in results] == [c['id'] for c in rag.search(query, 2, mode=mode)]
+
+
+if __name__ == "__main__":
+    test_tokenize_keeps_medical_terms()
+    test_bm25_ranks_exact_terms_and_persists()
+    test_hybrid_search_and_lexical_fallback()
+    test_lexical_index_rebuilt_from_existing_collection()
+    test_search_many_matches_search_with_one_embedding_request()
+    print("✅ Lexical index tests passed")
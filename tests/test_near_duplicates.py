@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests for MinHash/LSH near-duplicate detection at ingestion (runs offline)
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.near_duplicates import NearDuplicateIndex
+from utils.document_processor import DocumentProcessor
+
+GUIDELINE = ("Give alteplase within 4.5 hours of symptom onset to eligible patients with acute ischemic stroke. "
+             "Check blood glucose before treatment and keep blood pressure below 185/110 mmHg.")
+
+
+def test_index_finds_near_copies_in_other_groups_and_persists(sentences):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "minhash.json"
+        index = NearDuplicateIndex(str(path))
+        index.add(["a", "b"], [GUIDELINE, " ".join(sentences(5))], ["guide.md", "other.md"])
+
+        # Markup, case and a changed word barely move the estimate
+        revised = "## " + GUIDELINE.upper().replace("Check", "Measure")
+        chunk_id, similarity = index.find(revised, group="guide.txt")
+        assert chunk_id == "a" and similarity >= 0.85
+        assert index.find(revised, group="guide.md") is None  # same document
+        assert index.find("Atrial fibrillation raises stroke risk.", group="x") is None
+
+        reloaded = NearDuplicateIndex(str(path))
+        assert reloaded.count() == 2 and reloaded.find(revised, group="guide.txt")[0] == "a"
+        reloaded.remove(["a"])
+        assert reloaded.find(revised, group="guide.txt") is None
+
+
+def test_revised_copy_reuses_embedding_but_keeps_its_own_text(rag_engine, sentences):
+    with tempfile.TemporaryDirectory() as tmp:
+        docs = Path(tmp) / "medical_docs"
+        docs.mkdir()
+        background = " ".join(sentences(6))
+        (docs / "old.txt").write_text(background + " Give aspirin 325 mg within 48 hours of an ischemic stroke.")
+        (docs / "new.txt").write_text(background + " Give aspirin 160 mg within 48 hours of an ischemic stroke.")
+        processor = DocumentProcessor(chunk_size=2000, chunk_overlap=0)
+
+        rag = rag_engine(Path(tmp) / "db")
+        client = rag.embedding_generator.embedding_model
+
+        old = rag.index_document("old", str(docs / "old.txt"), processor)
+        texts = client.texts
+        revised = rag.index_document("new", str(docs / "new.txt"), processor)
+
+        # The revised chunk is stored under its own id with the old chunk's embedding
+        assert old['chunks'] == revised['chunks'] == 1
+        assert revised['deduplicated'] == 1 and revised['written'] == 1 and client.texts == texts
+        assert rag.collection.count() == 2
+        assert rag.index_document("new", str(docs / "new.txt"), processor)['status'] == 'unchanged'
+
+        # Manifests that point at another document's chunk (older links) are indexed again
+        entry = rag.manifest.get("new")
+        rag.manifest.set("new", entry['path'], entry['content_hash'], entry['settings'],
+                         rag.manifest.get("old")['chunk_ids'])
+        assert not rag.is_document_current("new", entry['content_hash'], processor)
+        rag.manifest.set("new", entry['path'], entry['content_hash'], entry['settings'], entry['chunk_ids'])
+
+        # Removing the original leaves only the revised text, under the revised document
+        assert rag.remove_document("old") == 1
+        stored = rag.collection.get()
+        assert [metadata['doc_id'] for metadata in stored['metadatas']] == ["new"]
+        for results in (rag.search("aspirin dose after stroke", 3, mode="vector"),
+                        rag.search("aspirin 325 mg", 3, mode="lexical")):
+            assert len(results) == 1
+            assert "160 mg" in results[0]['text'] and "325 mg" not in results[0]['text']
+        assert rag.compact()['orphans_removed'] == 0
+        assert rag.lexical_index.count() == rag.collection.count() == 1
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Tests for the offline RAG benchmark and its embedding/generation stand-ins (runs offline)
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from benchmarks.providers import EchoModel, HashEmbeddingClient
+from benchmarks.rag.bench_rag import RECALL_AT, STAGES, run_benchmark
+
+
+def test_hash_embeddings_follow_shared_terms():
+    client = HashEmbeddingClient(dimension=256)
+    vectors = np.array(client.embed_content(model="models/hash", content=[
+        "Stroke warning signs include face drooping",
+        "What are the warning signs of a stroke?",
+        "Limit sodium to 2,300 mg per day",
+    ])['embedding'])
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+    assert vectors[0] @ vectors[1] > vectors[0] @ vectors[2]
+    assert client.embed_content(model="models/hash", content="stroke")['embedding'] == client.vector("stroke")
+
+
+def test_echo_model_streams_the_same_text():
+    model = EchoModel(echo_chars=50)
+    text = model.generate_content("Question: what is a stroke?").text
+
+    async def streamed():
+        response = await model.generate_content_async("Question: what is a stroke?", stream=True)
+        return "".join([chunk.text async for chunk in response])
+
+    assert asyncio.run(streamed()) == text and model.calls == 2
+
+
+def test_benchmark_reports_metrics_and_stage_latency():
+    report = run_benchmark(repeat=2)
+    corpus = report['corpus']
+    assert corpus['documents'] == 3 and corpus['chunks'] > 0 and not corpus['unjudged_questions']
+
+    recalls = [report['retrieval'][f"recall@{n}"] for n in RECALL_AT]
+    assert recalls == sorted(recalls) and 0 < recalls[-1] <= 1
+    assert 0 < report['retrieval']['mrr'] <= 1
+    for stage in STAGES + ('total',):
+        summary = report['latency_ms'][stage]
+        assert 0 <= summary['p50'] <= summary['p95'] <= summary['p99']
+
+    # Query embeddings bypass the cache, so every pass asks the provider again
+    assert report['embedding_requests'] >= 2 * corpus['questions']
+
+    # Deterministic stand-ins: retrieval quality is identical run to run
+    assert run_benchmark(repeat=1)['retrieval'] == report['retrieval']
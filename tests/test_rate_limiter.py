@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests for the adaptive Gemini rate limiter (runs offline)
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.rate_limiter import AdaptiveRateLimiter, is_throttle_error
+from utils.embeddings import EmbeddingGenerator
+from benchmarks.providers import LocalEmbeddingClient
+
+
+class Throttled(Exception):
+    code = 429
+
+
+def test_bucket_paces_requests_after_the_burst():
+    limiter = AdaptiveRateLimiter(requests_per_minute=600, burst=2)  # 10 requests/s
+    waits = [limiter._reserve(1) for _ in range(5)]
+    assert waits[:2] == [0.0, 0.0]
+    assert [round(wait, 2) for wait in waits[2:]] == [0.1, 0.2, 0.3]
+    stats = limiter.stats()
+    assert stats['requests'] == 5 and round(stats['max_queue_wait_ms']) == 300
+
+
+def test_throttles_decrease_the_rate_once_and_successes_restore_it():
+    limiter = AdaptiveRateLimiter(requests_per_minute=600, min_requests_per_minute=200,
+                                  increase_per_success=50, decrease_factor=0.5)
+    limiter.record_throttle()
+    assert limiter.stats()['requests_per_minute'] == 300
+    limiter.record_throttle(sent_at=0.0)  # sent before the decrease: already paced at the old rate
+    assert limiter.stats()['requests_per_minute'] == 300
+    limiter.record_throttle()
+    assert limiter.stats()['requests_per_minute'] == 200  # floor
+    for _ in range(10):
+        limiter.record_success()
+    stats = limiter.stats()
+    assert stats['requests_per_minute'] == 600 and stats['throttle_events'] == 3 and stats['rate_decreases'] == 2
+
+
+def test_calls_retry_throttles_with_backoff():
+    limiter = AdaptiveRateLimiter(requests_per_minute=6000, backoff_base=0.001)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise Throttled("Too Many Requests")
+        return "ok"
+
+    assert limiter.call(flaky) == "ok" and len(attempts) == 3
+    assert limiter.stats()['retries'] == 2 and limiter.stats()['throttle_events'] == 2
+
+    async def invalid():
+        raise ValueError("400 invalid argument")
+
+    try:
+        asyncio.run(limiter.acall(invalid, retryable=is_throttle_error))
+        raise AssertionError("expected ValueError")
+    except ValueError:
+        pass
+    assert limiter.stats()['retries'] == 2
+
+    assert is_throttle_error(RuntimeError("503 The model is overloaded"))
+    assert is_throttle_error(Throttled()) and not is_throttle_error(ValueError("bad input"))
+
+
+def test_embedding_requests_go_through_the_limiter():
+    limiter = AdaptiveRateLimiter(requests_per_minute=60000, backoff_base=0.001)
+    client = LocalEmbeddingClient(dimension=8, request_latency=0, per_text_latency=0, failure_rate=0.3)
+    generator = EmbeddingGenerator(api_key=None, client=client, rate_limiter=limiter)
+
+    vectors = [generator.generate_embedding(f"text {i}", retry_count=10) for i in range(20)]
+    assert all(vectors)
+    stats = limiter.stats()
+    assert stats['requests'] == client.requests and stats['throttle_events'] == client.requests - 20
+
+
+if __name__ == "__main__":
+    test_bucket_paces_requests_after_the_burst()
+    test_throttles_decrease_the_rate_once_and_successes_restore_it()
+    test_calls_retry_throttles_with_backoff()
+    test_embedding_requests_go_through_the_limiter()
+    print("✅ Rate limiter tests passed")
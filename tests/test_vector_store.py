@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Tests for the pluggable vector store backends (runs offline)
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.rag_engine import LocalVectorStore, VECTOR_STORES
+
+
+def _data(n=50, dim=32):
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = [f"chunk_{i}" for i in range(n)]
+    docs = [f"text {i}" for i in range(n)]
+    metas = [{'source': f"doc_{i % 3}"} for i in range(n)]
+    return vectors, ids, docs, metas
+
+
+def test_local_store_persists_and_ranks():
+    vectors, ids, docs, metas = _data()
+    with tempfile.TemporaryDirectory() as tmp:
+        store = LocalVectorStore(Path(tmp), "test_collection")
+        store.add(ids=ids[:30], embeddings=vectors[:30].tolist(), documents=docs[:30], metadatas=metas[:30])
+        store.add(ids=ids[25:], embeddings=vectors[25:].tolist(), documents=docs[25:], metadatas=metas[25:])
+        assert store.count() == 50  # existing ids are skipped
+
+        reopened = LocalVectorStore(Path(tmp), "test_collection")
+        results = reopened.query([vectors[7].tolist()], 3)
+        assert results['ids'][0][0] == "chunk_7"
+        assert abs(results['distances'][0][0]) < 1e-5
+        assert results['metadatas'][0][0] == {'source': 'doc_1'}
+
+        reopened.clear()
+        assert reopened.count() == 0
+        assert reopened.query([vectors[0].tolist()], 3)['ids'] == [[]]
+
+
+def test_backends_agree_on_top_k():
+    vectors, ids, docs, metas = _data()
+    query = vectors[3] + 0.5 * vectors[4]
+    top = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend, store_class in VECTOR_STORES.items():
+            store = store_class(Path(tmp) / backend, "test_collection")
+            store.add(ids=ids, embeddings=vectors.tolist(), documents=docs, metadatas=metas)
+            top[backend] = store.query([query.tolist()], 5)['ids'][0]
+    expected = [f"chunk_{i}" for i in np.argsort(-(vectors @ query))[:5]]
+    assert top['chroma'] == top['local'] == expected
+
+
+def test_compact_precisions_with_rescore():
+    vectors, ids, docs, metas = _data(n=200, dim=64)
+    query = vectors[11] + 0.3 * vectors[12]
+    expected = [f"chunk_{i}" for i in np.argsort(-(vectors @ query))[:5]]
+    with tempfile.TemporaryDirectory() as tmp:
+        for precision in ("float16", "int8"):
+            store = LocalVectorStore(Path(tmp) / precision, "test_collection", precision=precision,
+                                     dimensions=32, rescore=True)
+            store.add(ids=ids, embeddings=vectors.tolist(), documents=docs, metadatas=metas)
+            results = store.query([query.tolist()], 5)
+            # Truncated candidates re-ranked at full precision recover the exact order
+            assert results['ids'][0][0] == "chunk_11"
+            assert results['ids'][0][:3] == expected[:3]
+            assert store.stats()['dimensions'] == 32
+
+            # Reopening with a different layout must not silently mix formats
+            try:
+                LocalVectorStore(Path(tmp) / precision, "test_collection")
+                assert False, "expected a layout mismatch"
+            except ValueError:
+                pass
+
+        int8 = LocalVectorStore(Path(tmp) / "int8", "test_collection", precision="int8",
+                                dimensions=32, rescore=True).stats()
+        assert int8['search_bytes'] == 200 * 32 + 200 * 4
+        assert int8['rescore_bytes'] == 200 * 64 * 4
+
+
+def test_multi_vector_query_matches_single_queries():
+    vectors, ids, docs, metas = _data(n=200, dim=64)
+    queries = (vectors[:6] + 0.3 * vectors[6:12]).tolist()
+    with tempfile.TemporaryDirectory() as tmp:
+        stores = {backend: store_class(Path(tmp) / backend, "test_collection")
+                  for backend, store_class in VECTOR_STORES.items()}
+        stores['int8'] = LocalVectorStore(Path(tmp) / "int8", "test_collection", precision="int8", rescore=True)
+        for store in stores.values():
+            store.add(ids=ids, embeddings=vectors.tolist(), documents=docs, metadatas=metas)
+            store.delete(["chunk_1"])
+
+            batched = store.query(queries, 4)
+            assert len(batched['ids']) == len(queries)
+            for i, query in enumerate(queries):
+                single = store.query([query], 4)
+                assert batched['ids'][i] == single['ids'][0] and "chunk_1" not in batched['ids'][i]
+                assert np.allclose(batched['distances'][i], single['distances'][0], atol=1e-5)
+
+
+if __name__ == "__main__":
+    test_local_store_persists_and_ranks()
+    test_backends_agree_on_top_k()
+    test_multi_vector_query_matches_single_queries()
+    test_compact_precisions_with_rescore()
+    print("✅ Vector store tests passed")
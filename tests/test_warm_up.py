@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Tests for RAG engine warm-up (runs offline)
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.rate_limiter import AdaptiveRateLimiter
+
+CHUNKS = [
+    {'text': "Use the F.A.S.T. test: Face, Arms, Speech, Time.", 'metadata': {'source': 'warning_signs'}},
+    {'text': "A TIA is a temporary blockage, often called a mini-stroke.", 'metadata': {'source': 'tia'}},
+]
+
+
+def test_warm_up_touches_every_component(rag_engine, embedding_client):
+    client = embedding_client()
+    rag = rag_engine(client=client, rate_limiter=AdaptiveRateLimiter(backoff_base=0.01))
+    rag.add_documents(CHUNKS)
+
+    for _ in range(2):
+        requests = client.requests
+        components = rag.warm_up()
+        assert set(components) == {'vector_store', 'lexical_index', 'embedding', 'vector_search'}
+        assert all(state['status'] == 'warm' and state['ms'] >= 0 for state in components.values())
+        # Never answered from the embedding cache
+        assert client.requests == requests + 1
+
+
+def test_warm_up_reports_failed_components(rag_engine, embedding_client):
+    components = rag_engine(client=embedding_client(fail=True),
+                            rate_limiter=AdaptiveRateLimiter(backoff_base=0.01)).warm_up()
+
+    assert components['vector_store']['status'] == 'warm'
+    assert components['lexical_index']['status'] == 'warm'
+    assert components['embedding']['status'] == 'failed' and "503" in components['embedding']['error']
+    assert components['vector_search'] == {'status': 'failed', 'error': "no query embedding",
+                                           'ms': components['vector_search']['ms']}
@@ -0,0 +1,84 @@
+"""
+Aho-Corasick Automaton - Finds every occurrence of many patterns in one pass
+
+The automaton is built once from the pattern set; matching is linear in the
+text length whatever the number of patterns.
+"""
+
+from collections import deque
+from typing import Dict, Hashable, Iterable, Iterator, List, Tuple
+
+
+class AhoCorasick:
+    """
+    Multi-pattern string matcher.
+
+    Patterns map to a payload (e.g. a category); ``finditer`` yields
+    (end_index, pattern, payload) for every occurrence, overlapping ones
+    included.
+    """
+
+    def __init__(self, patterns: Dict[str, Hashable]):
+        """
+        Build the automaton.
+
+        Args:
+            patterns: Pattern -> payload returned with each of its matches
+        """
+        # Node 0 is the root; each node has its transitions, failure link and outputs
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[str, Hashable]]] = [[]]
+
+        for pattern, payload in patterns.items():
+            if pattern:
+                self._insert(pattern, payload)
+        self._link()
+
+    def __len__(self) -> int:
+        """Number of automaton states."""
+        return len(self._goto)
+
+    def _insert(self, pattern: str, payload: Hashable) -> None:
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        self._output[node].append((pattern, payload))
+
+    def _link(self) -> None:
+        """Compute failure links breadth-first and merge outputs along them."""
+        # Depth-1 states fail to the root (their default), deeper ones to the
+        # longest proper suffix that is also a path in the trie
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def finditer(self, text: Iterable[str]) -> Iterator[Tuple[int, str, Hashable]]:
+        """
+        Yield every match in ``text``.
+
+        Returns:
+            Iterator of (index of the match's last character, pattern, payload)
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for pattern, payload in output[node]:
+                yield index, pattern, payload
@@ -0,0 +1,169 @@
+"""
+Answer Cache - Remembers generated RAG answers for repeated questions
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+def normalize_question(question: str) -> str:
+    """Canonical form of a question: lowercase, no punctuation, single spaces."""
+    text = re.sub(r"[^\w\s]", " ", question.lower())
+    return " ".join(text.split())
+
+
+class AnswerCache:
+    """
+    In-memory LRU cache of RAG answers with a time-to-live.
+
+    Entries are keyed by the normalized question text. If a similarity
+    threshold is set, a miss on the exact key falls back to the cached entry
+    whose query embedding has the highest cosine similarity above it.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600,
+                 similarity_threshold: Optional[float] = 0.95, stale_seconds: float = 86400):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of answers to keep
+            ttl_seconds: Seconds before an answer expires
+            similarity_threshold: Minimum cosine similarity for a semantic hit
+                (None disables semantic matching)
+            stale_seconds: Seconds an expired answer is kept for ``allow_stale``
+                lookups (degraded mode while the LLM is unavailable)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return self.similarity_threshold is not None
+
+    @staticmethod
+    def _unit(embedding: List[float]) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else None
+
+    def _expired(self, entry: Dict, now: float, allow_stale: bool = False) -> bool:
+        return now - entry['created_at'] > self.ttl_seconds + (self.stale_seconds if allow_stale else 0)
+
+    def get(self, question: str, query_embedding: Optional[List[float]] = None,
+            count_miss: bool = True, allow_stale: bool = False) -> Optional[Dict]:
+        """
+        Look up a cached answer.
+
+        Args:
+            question: The user's question
+            query_embedding: Embedding of the question, for semantic matching
+            count_miss: Record a miss if nothing matches (False for a cheap exact
+                probe that will be followed by a semantic lookup)
+            allow_stale: Also return answers up to ``stale_seconds`` past expiry
+
+        Returns:
+            The cached result dictionary, or None on a miss
+        """
+        key = normalize_question(question)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, now, allow_stale):
+                # Kept around for stale lookups until that window passes too
+                if self._expired(entry, now, allow_stale=True):
+                    del self._entries[key]
+                entry = None
+
+            if entry is None and self.semantic_enabled and query_embedding is not None:
+                entry = self._nearest(query_embedding, now, allow_stale)
+                if entry is not None:
+                    self.semantic_hits += 1
+
+            if entry is None:
+                if count_miss:
+                    self.misses += 1
+                return None
+
+            self._entries.move_to_end(entry['key'])
+            self.hits += 1
+            return dict(entry['result'])
+
+    def _nearest(self, query_embedding: List[float], now: float, allow_stale: bool = False) -> Optional[Dict]:
+        """Most similar unexpired entry above the threshold (caller holds the lock)."""
+        query = self._unit(query_embedding)
+        if query is None:
+            return None
+
+        best, best_score = None, self.similarity_threshold
+        for entry in self._entries.values():
+            if entry['embedding'] is None or self._expired(entry, now, allow_stale):
+                continue
+            if entry['embedding'].shape != query.shape:
+                continue
+            score = float(entry['embedding'] @ query)
+            if score >= best_score:
+                best, best_score = entry, score
+        return best
+
+    def put(self, question: str, result: Dict, query_embedding: Optional[List[float]] = None) -> None:
+        """
+        Store an answer.
+
+        Args:
+            question: The user's question
+            result: Result dictionary returned by ``RAGEngine.query``
+            query_embedding: Embedding of the question (optional)
+        """
+        key = normalize_question(question)
+        if not key:
+            return
+
+        entry = {
+            'key': key,
+            'result': dict(result),
+            'embedding': self._unit(query_embedding) if query_embedding is not None else None,
+            'created_at': time.time()
+        }
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every cached answer (called whenever the collection changes)."""
+        with self._lock:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'semantic_hits': self.semantic_hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+            'invalidations': self.invalidations,
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'similarity_threshold': self.similarity_threshold
+        }
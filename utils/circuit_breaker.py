@@ -0,0 +1,160 @@
+"""
+Circuit Breaker - Per-stage deadlines and failure isolation for the chat pipeline
+
+Each stage of a chat request (history fetch, query embedding, vector search,
+generation) runs through a StageGuard: it gets its own timeout, and after
+repeated timeouts or errors the guard opens and fails fast for a cool-down
+period instead of making every request wait for a provider that is down.
+One trial call is let through after the cool-down (half-open); its outcome
+closes or reopens the circuit.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class StageUnavailable(Exception):
+    """A stage timed out, failed, or was skipped because its circuit is open."""
+
+    def __init__(self, stage: str, reason: str):
+        super().__init__(f"{stage} {reason}")
+        self.stage = stage
+        self.reason = reason
+
+
+class StageGuard:
+    """Timeout plus circuit breaker for one pipeline stage."""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, timeout: Optional[float], failure_threshold: int = 5,
+                 reset_timeout: float = 30.0):
+        """
+        Initialize the guard.
+
+        Args:
+            name: Stage name, used in logs and errors
+            timeout: Seconds a call may take (None for no deadline)
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a trial call
+        """
+        self.name = name
+        self.timeout = timeout
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._consecutive_failures = 0
+        self._trial_running = False
+        self._trial_started = 0.0
+
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.short_circuits = 0
+        self.opened = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def check(self) -> None:
+        """
+        Admit a call, or raise StageUnavailable while the circuit is open.
+
+        In the half-open state only one trial call is admitted at a time (a
+        trial abandoned without an outcome, e.g. cancelled, is replaced after
+        another ``reset_timeout``).
+        """
+        with self._lock:
+            if self._state == self.OPEN:
+                now = time.monotonic()
+                trial_pending = self._trial_running and now - self._trial_started < self.reset_timeout
+                if now - self._opened_at < self.reset_timeout or trial_pending:
+                    self.short_circuits += 1
+                    raise StageUnavailable(self.name, "circuit open")
+                self._trial_running = True
+                self._trial_started = now
+            self.calls += 1
+
+    def success(self, elapsed_ms: float = 0.0) -> None:
+        """Record a successful call; closes a half-open circuit."""
+        with self._lock:
+            self._record_latency(elapsed_ms)
+            self._consecutive_failures = 0
+            self._trial_running = False
+            if self._state == self.OPEN:
+                print(f"✓ {self.name} recovered, circuit closed")
+            self._state = self.CLOSED
+
+    def failure(self, elapsed_ms: float = 0.0, timed_out: bool = False) -> None:
+        """Record a failed or timed-out call; opens the circuit at the threshold."""
+        with self._lock:
+            self._record_latency(elapsed_ms)
+            self.failures += 1
+            self.timeouts += timed_out
+            self._consecutive_failures += 1
+            trial = self._trial_running
+            self._trial_running = False
+            if trial or (self._state == self.CLOSED and self._consecutive_failures >= self.failure_threshold):
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self.opened += 1
+                print(f"⚠️  {self.name} circuit opened after {self._consecutive_failures} failures "
+                      f"(retry in {self.reset_timeout:.0f}s)")
+
+    def _record_latency(self, elapsed_ms: float) -> None:
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    async def run(self, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run one call of the stage under its deadline.
+
+        Args:
+            factory: Zero-argument callable returning the awaitable to run
+                (not created at all when the circuit is open)
+
+        Returns:
+            The awaitable's result
+
+        Raises:
+            StageUnavailable: On timeout, error or open circuit
+        """
+        self.check()
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(factory(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.failure((time.perf_counter() - started) * 1000, timed_out=True)
+            raise StageUnavailable(self.name, f"timed out after {self.timeout}s")
+        except Exception as e:
+            self.failure((time.perf_counter() - started) * 1000)
+            raise StageUnavailable(self.name, f"failed: {e}") from e
+        self.success((time.perf_counter() - started) * 1000)
+        return result
+
+    def stats(self) -> Dict:
+        """State, counters and latency of the stage."""
+        state = self.state
+        with self._lock:
+            return {
+                'state': state,
+                'timeout_seconds': self.timeout,
+                'calls': self.calls,
+                'failures': self.failures,
+                'timeouts': self.timeouts,
+                'short_circuits': self.short_circuits,
+                'times_opened': self.opened,
+                'mean_ms': self.total_ms / self.calls if self.calls else 0.0,
+                'max_ms': self.max_ms
+            }
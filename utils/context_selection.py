@@ -0,0 +1,198 @@
+"""
+Context Selection - Turns retrieved candidates into a compact, non-redundant prompt context
+
+Three post-retrieval steps:
+1. Maximal Marginal Relevance over the candidate set, using the stored chunk
+   embeddings to penalize passages similar to ones already chosen, and
+   dropping passages whose text mostly repeats one already chosen (chunk
+   overlaps, near-copies of a document)
+2. Merging chunks that are neighbours in the same document (they share
+   their overlap, which is then only sent once)
+3. Packing the passages, best first, into a token budget
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Rough characters-per-token for Gemini on English text
+CHARS_PER_TOKEN = 4
+
+# Tokens of "[Source N] name" header and separators per passage
+PASSAGE_OVERHEAD_TOKENS = 8
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a text."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def relevance_scores(candidates: List[Dict]) -> np.ndarray:
+    """
+    Relevance of each candidate in [0, 1], from the scores retrieval produced.
+
+    Fused results use their reciprocal-rank score and lexical results their
+    BM25 score, scaled so the best candidate is 1; vector results use their
+    cosine similarity.
+    """
+    if candidates and all(c.get('rrf_score') is not None for c in candidates):
+        scores = np.array([c['rrf_score'] for c in candidates], dtype=np.float32)
+    elif candidates and all(c.get('distance') is not None for c in candidates):
+        # Squared L2 between unit vectors -> cosine similarity
+        return np.clip(1.0 - np.array([c['distance'] for c in candidates], dtype=np.float32) / 2.0, 0.0, 1.0)
+    elif candidates and all(c.get('lexical_score') is not None for c in candidates):
+        scores = np.array([c['lexical_score'] for c in candidates], dtype=np.float32)
+    else:
+        # Unknown scores: fall back to the candidates' rank
+        scores = 1.0 / (1.0 + np.arange(len(candidates), dtype=np.float32))
+    top = scores.max() if len(scores) else 0.0
+    return scores / top if top > 0 else scores
+
+
+def shingle_containment(texts: List[str], size: int = 3) -> np.ndarray:
+    """
+    Pairwise overlap of word ``size``-grams: entry (i, j) is the share of the
+    shorter text's shingles that also occur in the other text.
+    """
+    shingles = []
+    for text in texts:
+        words = text.lower().split()
+        shingles.append({tuple(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))})
+
+    overlap = np.zeros((len(texts), len(texts)), dtype=np.float32)
+    for i in range(len(texts)):
+        for j in range(i + 1, len(texts)):
+            smaller = min(len(shingles[i]), len(shingles[j])) or 1
+            overlap[i, j] = overlap[j, i] = len(shingles[i] & shingles[j]) / smaller
+    return overlap
+
+
+def mmr_select(relevance: np.ndarray, similarity: np.ndarray, k: int, lambda_: float = 0.85,
+               duplicates: Optional[np.ndarray] = None) -> List[int]:
+    """
+    Pick candidates by Maximal Marginal Relevance until ``k`` are represented.
+
+    Each step takes the candidate maximizing
+    ``lambda_ * relevance - (1 - lambda_) * max similarity to those already
+    picked``. Candidates marked as duplicates of a picked one are never taken;
+    a duplicate among the ``k`` most relevant candidates counts as represented
+    by the passage it repeats, so its slot is not refilled.
+
+    Args:
+        relevance: Relevance of each candidate (higher is better)
+        similarity: Pairwise similarity of the candidates (e.g. embedding cosine)
+        k: Number of candidates to represent
+        lambda_: Trade-off between relevance (1.0) and diversity (0.0)
+        duplicates: Boolean matrix, True where two candidates repeat each other (optional)
+
+    Returns:
+        Indices of the picked candidates, in pick order
+    """
+    count = len(relevance)
+    if count == 0 or k <= 0:
+        return []
+
+    redundancy = np.zeros(count, dtype=np.float32)
+    available = np.ones(count, dtype=bool)
+    picked: List[int] = []
+
+    top_k = np.zeros(count, dtype=bool)
+    top_k[np.argsort(-relevance, kind='stable')[:k]] = True
+
+    represented = 0
+    while represented < k and available.any():
+        scores = lambda_ * relevance - (1.0 - lambda_) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        picked.append(best)
+        available[best] = False
+        represented += 1
+        if duplicates is not None:
+            represented += int((available & duplicates[best] & top_k).sum())
+            available &= ~duplicates[best]
+        redundancy = np.maximum(redundancy, similarity[best])
+
+    return picked
+
+
+def _join_overlapping(first: str, second: str, max_overlap: int) -> str:
+    """Concatenate two neighbouring chunks, keeping their shared overlap once."""
+    for size in range(min(max_overlap, len(first), len(second)), 0, -1):
+        if first.endswith(second[:size]):
+            return first + second[size:]
+    return f"{first} {second}"
+
+
+def merge_adjacent(passages: List[Dict]) -> List[Dict]:
+    """
+    Merge passages that are consecutive chunks of the same document.
+
+    Chunks are neighbours when they share a 'content_hash' and their
+    'chunk_index' values differ by one (chunks stored without these fields
+    are never merged). A merged passage takes the rank and metadata of its
+    best-ranked member, and lists every member id in 'ids'.
+
+    Args:
+        passages: Passages in rank order
+
+    Returns:
+        Passages in rank order, neighbours merged
+    """
+    ranked: List[Tuple[int, Dict]] = []
+    documents: Dict[str, List[Tuple[int, int, Dict]]] = {}
+    for rank, passage in enumerate(passages):
+        metadata = passage.get('metadata') or {}
+        if metadata.get('content_hash') is None or metadata.get('chunk_index') is None:
+            ranked.append((rank, dict(passage, ids=[passage.get('id')])))
+        else:
+            documents.setdefault(metadata['content_hash'], []).append((metadata['chunk_index'], rank, passage))
+
+    for members in documents.values():
+        members.sort(key=lambda member: member[0])
+        run = [members[0]]
+        for member in members[1:] + [None]:
+            if member is not None and member[0] == run[-1][0] + 1:
+                run.append(member)
+                continue
+
+            _, best_rank, best = min(run, key=lambda item: item[1])
+            text = run[0][2]['text']
+            for (_, _, previous), (_, _, passage) in zip(run, run[1:]):
+                overlap = (previous['metadata'].get('end_char') or 0) - (passage['metadata'].get('start_char') or 0)
+                text = _join_overlapping(text, passage['text'], max(overlap, 0))
+            ranked.append((best_rank, dict(best, text=text, ids=[passage.get('id') for _, _, passage in run])))
+            run = [member]
+
+    return [passage for _, passage in sorted(ranked, key=lambda item: item[0])]
+
+
+def pack_to_budget(passages: List[Dict], token_budget: Optional[int]) -> List[Dict]:
+    """
+    Keep passages, best first, while they fit in the token budget.
+
+    A passage that does not fit is skipped so a shorter, lower-ranked one can
+    still be used. The best passage is always kept (cut to the budget if it
+    alone exceeds it).
+
+    Args:
+        passages: Passages in rank order
+        token_budget: Maximum context tokens (None keeps everything)
+
+    Returns:
+        The passages that fit, in rank order
+    """
+    if token_budget is None or not passages:
+        return list(passages)
+
+    packed: List[Dict] = []
+    used = 0
+    for passage in passages:
+        cost = estimate_tokens(passage['text']) + PASSAGE_OVERHEAD_TOKENS
+        if used + cost <= token_budget:
+            packed.append(passage)
+            used += cost
+
+    if not packed:
+        limit = max(token_budget - PASSAGE_OVERHEAD_TOKENS, 1) * CHARS_PER_TOKEN
+        packed.append(dict(passages[0], text=passages[0]['text'][:limit]))
+    return packed
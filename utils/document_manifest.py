@@ -0,0 +1,103 @@
+"""
+Document Manifest - Tracks which version of each document is indexed
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+
+def file_content_hash(filepath: str) -> str:
+    """SHA-256 of a file's bytes, read in blocks."""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def make_chunk_id(content_hash: str, chunk_index: int) -> str:
+    """Stable chunk id: the same document content always yields the same ids."""
+    return f"{content_hash[:16]}_{chunk_index}"
+
+
+class DocumentManifest:
+    """
+    Persistent record of indexed documents.
+
+    Each entry is keyed by a stable document key (an upload id, or a path
+    relative to the docs directory) and stores the document's content hash,
+    the chunking settings it was split with and the ids of its chunks, so a
+    re-ingest can skip unchanged documents and delete stale chunks.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the manifest, loading it from disk if present.
+
+        Args:
+            path: JSON file the manifest is persisted to
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict] = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+
+    def save(self) -> None:
+        """Write the manifest to disk atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def get(self, doc_key: str) -> Optional[Dict]:
+        return self.entries.get(doc_key)
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self.entries)
+
+    def is_current(self, doc_key: str, content_hash: str, settings: Dict) -> bool:
+        """Whether the document is indexed with this content and chunking settings."""
+        entry = self.entries.get(doc_key)
+        return bool(entry) and entry['content_hash'] == content_hash and entry['settings'] == settings
+
+    def set(self, doc_key: str, path: str, content_hash: str, settings: Dict, chunk_ids: List[str]) -> None:
+        """Record the indexed version of a document."""
+        with self._lock:
+            self.entries[doc_key] = {
+                'path': path,
+                'content_hash': content_hash,
+                'settings': settings,
+                'chunk_ids': chunk_ids,
+                'indexed_at': datetime.now().isoformat()
+            }
+            self.save()
+
+    def remove(self, doc_key: str) -> Optional[Dict]:
+        """Forget a document; returns its entry, if any."""
+        with self._lock:
+            entry = self.entries.pop(doc_key, None)
+            if entry is not None:
+                self.save()
+        return entry
+
+    def referenced_ids(self, exclude: Optional[str] = None) -> Set[str]:
+        """Chunk ids owned by any document other than ``exclude`` (identical files share chunks)."""
+        with self._lock:
+            return {chunk_id for key, entry in self.entries.items() if key != exclude
+                    for chunk_id in entry['chunk_ids']}
+
+    def clear(self) -> None:
+        """Forget every document."""
+        with self._lock:
+            self.entries = {}
+            if self.path.exists():
+                self.path.unlink()
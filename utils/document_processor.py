@@ -2,30 +2,218 @@
 Document Processor - Handles PDF and text file processing for RAG system
 """
 
+import bisect
 import os
-from typing import List, Dict
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple, Union
 from pathlib import Path
 import pypdf
 import pdfplumber
 from rich.console import Console
 from rich.progress import Progress
 
+from utils.document_manifest import file_content_hash, make_chunk_id
+
 console = Console()
 
+SUPPORTED_EXTENSIONS = ['.pdf', '.txt', '.md']
+
+# PDFs with at least twice this many pages are split into page ranges of
+# this size so one large file can use several workers
+PDF_PAGES_PER_TASK = 16
+
+# Below this much input, process start-up costs more than it saves
+PARALLEL_MIN_BYTES = 256 * 1024
+
+# Characters read at a time when streaming text files
+TEXT_BLOCK_CHARS = 1024 * 1024
+
+# A chunk boundary follows sentence-ending punctuation (and any closing quote
+# or bracket) plus whitespace, or a blank line; it sits at the next sentence
+# (written so the regex engine can skip ahead to candidate characters)
+BOUNDARY_PATTERN = re.compile(r'[.!?\n](?:(?<=[.!?])[.!?]*["\')\]]*\s+|(?<=\n)\s*\n)')
+BOUNDARY_PUNCTUATION = '.!?"\')]'
+WORD_BREAK_PATTERN = re.compile(r'\s')
+
+# Recorded in the document manifest; bump when chunk boundaries change
+CHUNKER_VERSION = "boundary-1"
+
+
+def _extract_unit(filepath: str, start: Optional[int] = None, end: Optional[int] = None) -> List[str]:
+    """
+    Extract one unit of work (runs in worker processes, so it must not print).
+    
+    Returns:
+        Page texts for PDFs (pages ``start``..``end``), or the file's text as a
+        one-element list for text files
+    """
+    if Path(filepath).suffix.lower() == '.pdf':
+        with pdfplumber.open(filepath) as pdf:
+            return [page.extract_text() or "" for page in pdf.pages[start or 0:end]]
+    
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return [f.read()]
+
+
+def _pool_context():
+    """
+    Start method for worker processes. Forking a multi-threaded server (the
+    API runs ingestion worker threads) can deadlock, so prefer forkserver.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
 
 class DocumentProcessor:
     """Process medical documents for the RAG system."""
     
-    def __init__(self, chunk_size: int = 500, chunk_overlap: int = 50):
+    def __init__(self, chunk_size: int = 500, chunk_overlap: int = 50, workers: int = 1):
         """
         Initialize document processor.
         
         Args:
             chunk_size: Maximum characters per chunk
             chunk_overlap: Number of characters to overlap between chunks
+            workers: Processes used to extract files and pages of large PDFs
+                (1 extracts everything in this process)
         """
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.workers = max(1, workers)
+        self.last_errors: List[Dict] = []
+    
+    def chunking_settings(self) -> Dict:
+        """Settings that determine the chunks (a change means documents must be re-chunked)."""
+        return {'chunk_size': self.chunk_size, 'chunk_overlap': self.chunk_overlap, 'chunker': CHUNKER_VERSION}
+    
+    def _plan_units(self, filepaths: List[Path]) -> List[Tuple[int, str, Optional[int], Optional[int]]]:
+        """Split files into (file position, path, first page, end page) extraction units."""
+        units = []
+        for position, filepath in enumerate(filepaths):
+            filepath = str(filepath)
+            if self.workers > 1 and Path(filepath).suffix.lower() == '.pdf':
+                try:
+                    pages = len(pypdf.PdfReader(filepath).pages)
+                except Exception:
+                    pages = 0
+                if pages >= 2 * PDF_PAGES_PER_TASK:
+                    for start in range(0, pages, PDF_PAGES_PER_TASK):
+                        units.append((position, filepath, start, start + PDF_PAGES_PER_TASK))
+                    continue
+            units.append((position, filepath, None, None))
+        return units
+    
+    def load_documents(self, filepaths: List[Path]) -> List[Union[str, Exception]]:
+        """
+        Extract the text of several documents, in parallel when ``workers`` > 1.
+        
+        Files (and page ranges of large PDFs) are extracted by a process pool;
+        results are reassembled in input order, so output is deterministic.
+        
+        Args:
+            filepaths: Documents to load
+            
+        Returns:
+            Text of each document, or the exception that stopped it, in input order
+        """
+        units = self._plan_units(filepaths)
+        total_bytes = sum(os.path.getsize(path) for path in filepaths if os.path.exists(path))
+        parallel = self.workers > 1 and len(units) > 1 and total_bytes >= PARALLEL_MIN_BYTES
+        
+        outputs: List[Union[List[str], Exception]] = []
+        if parallel:
+            workers = min(self.workers, len(units))
+            console.print(f"⚙️  Extracting {len(filepaths)} documents ({len(units)} tasks) "
+                          f"with {workers} processes", style="cyan")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as executor:
+                futures = [executor.submit(_extract_unit, path, start, end) for _, path, start, end in units]
+                for future in futures:
+                    try:
+                        outputs.append(future.result())
+                    except Exception as e:
+                        outputs.append(e)
+        else:
+            for _, path, start, end in units:
+                try:
+                    outputs.append(_extract_unit(path, start, end))
+                except Exception as e:
+                    outputs.append(e)
+        
+        # Reassemble per file, in unit (= page) order
+        pieces: List[Union[List[str], Exception]] = [[] for _ in filepaths]
+        for (position, _, _, _), output in zip(units, outputs):
+            if isinstance(pieces[position], Exception):
+                continue
+            if isinstance(output, Exception):
+                pieces[position] = output
+            else:
+                pieces[position].extend(output)
+        
+        results: List[Union[str, Exception]] = []
+        for filepath, piece in zip(filepaths, pieces):
+            if isinstance(piece, Exception):
+                results.append(piece)
+            elif Path(filepath).suffix.lower() == '.pdf':
+                text = "".join(page_text + "\n" for page_text in piece if page_text)
+                if not text.strip():
+                    try:
+                        text = self._load_pdf_fallback(str(filepath))
+                    except Exception as e:
+                        results.append(e)
+                        continue
+                results.append(text)
+            else:
+                results.append(piece[0])
+        return results
+    
+    def _load_pdf_fallback(self, filepath: str) -> str:
+        """Extract text with pypdf when pdfplumber finds none."""
+        console.print("  Trying alternative PDF reader...", style="yellow")
+        with open(filepath, 'rb') as file:
+            pdf_reader = pypdf.PdfReader(file)
+            return "".join((page.extract_text() or "") + "\n" for page in pdf_reader.pages)
+    
+    def iter_text(self, filepath: str) -> Iterator[str]:
+        """
+        Stream a document's text one page (PDF) or block (text file) at a time.
+        
+        The pieces concatenate to exactly what ``load_documents`` returns, but
+        only one page is held in memory, so large PDFs can be chunked without
+        materializing the whole document.
+        
+        Args:
+            filepath: Path to the document
+            
+        Yields:
+            Successive pieces of the document's text
+        """
+        file_ext = Path(filepath).suffix.lower()
+        if file_ext in ['.txt', '.md']:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                while True:
+                    block = f.read(TEXT_BLOCK_CHARS)
+                    if not block:
+                        return
+                    yield block
+        elif file_ext != '.pdf':
+            raise ValueError(f"Unsupported file type: {file_ext}")
+        
+        found_text = False
+        with pdfplumber.open(filepath) as pdf:
+            for page in pdf.pages:
+                page_text = page.extract_text() or ""
+                page.close()  # drop the page's parsed layout objects
+                if page_text:
+                    found_text = True
+                    yield page_text + "\n"
+        
+        if not found_text:
+            console.print("  Trying alternative PDF reader...", style="yellow")
+            with open(filepath, 'rb') as file:
+                for page in pypdf.PdfReader(file).pages:
+                    yield (page.extract_text() or "") + "\n"
     
     def load_pdf(self, filepath: str) -> str:
         """
@@ -40,21 +228,11 @@ class DocumentProcessor:
         try:
             console.print(f"📄 Loading PDF: {Path(filepath).name}", style="cyan")
             
-            text = ""
-            # Try with pdfplumber first (better for complex layouts)
-            with pdfplumber.open(filepath) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-            
-            if not text.strip():
-                # Fallback to pypdf
-                console.print("  Trying alternative PDF reader...", style="yellow")
-                with open(filepath, 'rb') as file:
-                    pdf_reader = pypdf.PdfReader(file)
-                    for page in pdf_reader.pages:
-                        text += page.extract_text() + "\n"
+            # pdfplumber first (better for complex layouts), pypdf as fallback;
+            # large PDFs are split across worker processes when workers > 1
+            text = self.load_documents([filepath])[0]
+            if isinstance(text, Exception):
+                raise text
             
             console.print(f"  ✓ Extracted {len(text)} characters", style="green")
             return text
@@ -86,57 +264,141 @@ class DocumentProcessor:
             console.print(f"  ✗ Error loading text file: {e}", style="red")
             raise
     
-    def chunk_text(self, text: str, source_name: str = "") -> List[Dict]:
+    @staticmethod
+    def _clean_stream(pieces: Iterable[str]) -> Iterator[str]:
         """
-        Split text into overlapping chunks.
+        Streaming equivalent of ``text.replace('\\n\\n\\n', '\\n\\n').strip()``.
+        
+        Trailing whitespace of each piece is held back until more text
+        arrives, so runs of newlines are never split between pieces and the
+        end of the document is stripped.
+        """
+        pending = ""
+        leading = True
+        for piece in pieces:
+            text = pending + piece
+            if leading:
+                text = text.lstrip()
+                if not text:
+                    pending = ""
+                    continue
+                leading = False
+            body = text.rstrip()
+            pending = text[len(body):]
+            if body:
+                yield body.replace('\n\n\n', '\n\n')
+    
+    def iter_chunks(self, pieces: Iterable[str], source_name: str = "") -> Iterator[Dict]:
+        """
+        Split streamed text into overlapping chunks.
+        
+        Sentence and paragraph boundaries are found with a single regex pass
+        over the text as it arrives, then whole sentences are packed greedily
+        into chunks of up to ``chunk_size`` characters. The next chunk starts
+        at the first boundary (or, failing that, word break) within the last
+        ``chunk_overlap`` characters. A sentence longer than a chunk is split
+        at its last word break. Runs in O(n), keeps only the unchunked tail of
+        the text in memory, and yields the same chunks however the text is
+        split into pieces.
         
         Args:
-            text: Text to chunk
+            pieces: Successive pieces of the text (e.g. from ``iter_text``)
             source_name: Name of the source document
             
-        Returns:
-            List of dictionaries with chunk text and metadata
+        Yields:
+            Dictionaries with chunk text and metadata
         """
-        chunks = []
+        stream = self._clean_stream(pieces)
+        buffer = ""  # cleaned text from offset `base` onwards
+        base = 0
+        boundaries: List[int] = []  # offsets where a sentence or paragraph starts
+        exhausted = False
         start = 0
         chunk_id = 0
         
-        # Clean the text
-        text = text.replace('\n\n\n', '\n\n')  # Remove excessive newlines
-        text = text.strip()
+        def fill(position: int) -> bool:
+            """Read (and scan) until the buffer covers ``position``; False at end of text."""
+            nonlocal buffer, exhausted
+            while not exhausted and base + len(buffer) <= position:
+                try:
+                    piece = next(stream)
+                except StopIteration:
+                    exhausted = True
+                    break
+                # Pieces never end in whitespace, so only trailing punctuation
+                # can start a boundary that spans pieces: rescan from there
+                scan_from = len(buffer.rstrip(BOUNDARY_PUNCTUATION))
+                buffer += piece
+                boundaries.extend([base + match.end() for match in BOUNDARY_PATTERN.finditer(buffer, scan_from)])
+            return base + len(buffer) > position
         
-        while start < len(text):
-            # Calculate end position
-            end = start + self.chunk_size
-            
-            # If not at the end, try to break at a sentence boundary
-            if end < len(text):
-                # Look for sentence endings
-                for delimiter in ['. ', '.\n', '! ', '?\n', '? ']:
-                    last_delimiter = text.rfind(delimiter, start, end)
-                    if last_delimiter != -1:
-                        end = last_delimiter + 1
-                        break
+        def last_word_break(lo: int, hi: int) -> int:
+            """Offset just after the last whitespace in [lo, hi), or -1."""
+            found = max(buffer.rfind(' ', lo - base, hi - base), buffer.rfind('\n', lo - base, hi - base))
+            return base + found + 1 if found != -1 else -1
+        
+        while fill(start):
+            limit = start + self.chunk_size
+            last_chunk = not fill(limit)
             
-            chunk_text = text[start:end].strip()
+            if not last_chunk:
+                # End at the last sentence boundary in the window, else a word break
+                i = bisect.bisect_right(boundaries, limit) - 1
+                if i >= 0 and boundaries[i] > start:
+                    end = boundaries[i]
+                else:
+                    end = last_word_break(start + 1, limit)
+                    if end == -1:
+                        end = limit
+            else:
+                end = base + len(buffer)
             
-            if chunk_text:  # Only add non-empty chunks
-                chunks.append({
+            chunk_text = buffer[start - base:end - base].strip()
+            if chunk_text:
+                yield {
                     'id': f"{source_name}_chunk_{chunk_id}",
                     'text': chunk_text,
                     'start_char': start,
                     'end_char': end,
                     'chunk_index': chunk_id
-                })
+                }
                 chunk_id += 1
             
-            # Move start position with overlap
-            # Ensure we always move forward to avoid infinite loop
-            new_start = end - self.chunk_overlap
-            if new_start <= start:  # If we're not moving forward, force progress
-                new_start = start + max(1, self.chunk_size - self.chunk_overlap)
-            start = new_start
+            if last_chunk:
+                break
+            
+            # Overlap: restart at the first boundary (else word break) in the tail
+            floor = end - self.chunk_overlap
+            if floor <= start:
+                start = end
+            else:
+                i = bisect.bisect_left(boundaries, floor)
+                if i < len(boundaries) and boundaries[i] < end:
+                    start = boundaries[i]
+                else:
+                    match = WORD_BREAK_PATTERN.search(buffer, floor - base, end - base - 1)
+                    start = base + match.end() if match else floor
+            
+            # Drop consumed text (amortized, so one huge piece stays linear),
+            # keeping trailing punctuation that the next scan starts from
+            if start - base > len(buffer) // 2:
+                keep = min(start - base, len(buffer.rstrip(BOUNDARY_PUNCTUATION)))
+                buffer = buffer[keep:]
+                base += keep
+                del boundaries[:bisect.bisect_right(boundaries, start)]
+    
+    def chunk_text(self, text: str, source_name: str = "") -> List[Dict]:
+        """
+        Split text into overlapping chunks.
         
+        Args:
+            text: Text to chunk
+            source_name: Name of the source document
+            
+        Returns:
+            List of dictionaries with chunk text and metadata
+        """
+        chunks = list(self.iter_chunks([text], source_name))
         console.print(f"  ✓ Created {len(chunks)} chunks", style="green")
         return chunks
     
@@ -166,80 +428,158 @@ class DocumentProcessor:
         
         return chunks
     
-    def process_document(self, filepath: str, doc_type: str = "PDF",
-                        author: str = "", url: str = "") -> List[Dict]:
+    def iter_document_chunks(self, filepath: str, doc_type: str = "PDF",
+                             author: str = "", url: str = "",
+                             content_hash: Optional[str] = None,
+                             text: Optional[str] = None) -> Iterator[Dict]:
         """
-        Complete pipeline: Load, chunk, and add metadata to a document.
+        Streaming pipeline: pages -> chunks with ids and metadata.
+        
+        Memory stays bounded by a page plus one chunk window, however long
+        the document is. Chunk ids are derived from the file's content hash
+        and the chunk index, so re-processing an unchanged file yields the
+        same ids.
         
         Args:
             filepath: Path to the document
             doc_type: Type of document
             author: Author name
             url: Source URL
+            content_hash: Precomputed ``file_content_hash(filepath)`` (optional)
+            text: Already-extracted text, e.g. from ``load_documents`` (optional)
             
-        Returns:
-            List of processed chunks with metadata
+        Yields:
+            Processed chunks with metadata
         """
-        # Determine file type and load
         file_ext = Path(filepath).suffix.lower()
         source_name = Path(filepath).stem
+        if file_ext not in SUPPORTED_EXTENSIONS:
+            raise ValueError(f"Unsupported file type: {file_ext}")
         
-        if file_ext == '.pdf':
-            text = self.load_pdf(filepath)
-        elif file_ext in ['.txt', '.md']:
-            text = self.load_text_file(filepath)
+        if text is not None:
+            pieces = [text]
         else:
-            raise ValueError(f"Unsupported file type: {file_ext}")
+            icon = "📄" if file_ext == '.pdf' else "📝"
+            console.print(f"{icon} Streaming {Path(filepath).name}", style="cyan")
+            pieces = self.iter_text(filepath)
         
-        # Chunk the text
-        chunks = self.chunk_text(text, source_name)
+        content_hash = content_hash or file_content_hash(filepath)
+        for chunk in self.iter_chunks(pieces, source_name):
+            # Stable ids from (content hash, chunk index)
+            chunk['id'] = make_chunk_id(content_hash, chunk['chunk_index'])
+            self.add_metadata([chunk], source_name, doc_type, author, url)
+            chunk['metadata'].update(content_hash=content_hash, chunk_index=chunk['chunk_index'],
+                                     start_char=chunk['start_char'], end_char=chunk['end_char'])
+            yield chunk
+    
+    def process_document(self, filepath: str, doc_type: str = "PDF",
+                        author: str = "", url: str = "",
+                        content_hash: Optional[str] = None,
+                        text: Optional[str] = None) -> List[Dict]:
+        """
+        Complete pipeline: Load, chunk, and add metadata to a document.
         
-        # Add metadata
-        chunks = self.add_metadata(chunks, source_name, doc_type, author, url)
+        Collects ``iter_document_chunks``; use that directly to avoid holding
+        every chunk of a large document at once.
         
+        Args:
+            filepath: Path to the document
+            doc_type: Type of document
+            author: Author name
+            url: Source URL
+            content_hash: Precomputed ``file_content_hash(filepath)`` (optional)
+            text: Already-extracted text, e.g. from ``load_documents`` (optional)
+            
+        Returns:
+            List of processed chunks with metadata
+        """
+        chunks = list(self.iter_document_chunks(filepath, doc_type, author, url,
+                                                content_hash=content_hash, text=text))
+        console.print(f"  ✓ Created {len(chunks)} chunks", style="green")
         return chunks
     
-    def process_directory(self, directory: str) -> List[Dict]:
+    def find_documents(self, directory: str) -> List[Path]:
         """
-        Process all supported documents in a directory.
+        Supported documents under a directory, in a stable order.
         
         Args:
-            directory: Path to directory containing documents
+            directory: Path to search recursively
             
         Returns:
-            List of all processed chunks from all documents
+            Sorted list of file paths
+        """
+        dir_path = Path(directory)
+        files = []
+        for ext in SUPPORTED_EXTENSIONS:
+            files.extend(dir_path.glob(f'**/*{ext}'))
+        return sorted(files)
+    
+    def iter_directory(self, directory: str) -> Iterator[Dict]:
+        """
+        Stream the chunks of all supported documents in a directory.
+        
+        With one worker, each file is streamed page by page. With ``workers``
+        > 1, files are extracted ``workers`` at a time in a process pool (over
+        files and page ranges of large PDFs), so at most that many documents'
+        text is held at once. Chunks come in file order; files that fail are
+        listed in ``self.last_errors`` (a file that fails part-way through
+        streaming may already have yielded some chunks).
+        
+        Args:
+            directory: Path to directory containing documents
+            
+        Yields:
+            Processed chunks from all documents
         """
-        all_chunks = []
+        self.last_errors = []
         dir_path = Path(directory)
         
         if not dir_path.exists():
             console.print(f"✗ Directory not found: {directory}", style="red")
-            return all_chunks
+            return
         
         # Find all supported files
-        supported_extensions = ['.pdf', '.txt', '.md']
-        files = []
-        for ext in supported_extensions:
-            files.extend(dir_path.glob(f'**/*{ext}'))
+        files = self.find_documents(directory)
         
         console.print(f"\n📚 Processing {len(files)} documents from {directory}\n", style="bold cyan")
         
         with Progress() as progress:
             task = progress.add_task("[cyan]Processing documents...", total=len(files))
             
-            for filepath in files:
-                try:
-                    chunks = self.process_document(str(filepath))
-                    all_chunks.extend(chunks)
-                    progress.update(task, advance=1)
-                except Exception as e:
-                    console.print(f"✗ Failed to process {filepath.name}: {e}", style="red")
+            for group_start in range(0, len(files), self.workers):
+                group = files[group_start:group_start + self.workers]
+                texts = self.load_documents(group) if self.workers > 1 else [None] * len(group)
+                
+                for filepath, text in zip(group, texts):
+                    try:
+                        if isinstance(text, Exception):
+                            raise text
+                        yield from self.iter_document_chunks(str(filepath), text=text)
+                    except Exception as e:
+                        console.print(f"✗ Failed to process {filepath.name}: {e}", style="red")
+                        self.last_errors.append({'file': str(filepath), 'error': str(e)})
                     progress.update(task, advance=1)
         
+        if self.last_errors:
+            console.print(f"⚠️  {len(self.last_errors)} document(s) failed", style="yellow")
+    
+    def process_directory(self, directory: str) -> List[Dict]:
+        """
+        Process all supported documents in a directory.
+        
+        Collects ``iter_directory``; per-file failures are listed in
+        ``self.last_errors``.
+        
+        Args:
+            directory: Path to directory containing documents
+            
+        Returns:
+            List of all processed chunks from all documents
+        """
+        all_chunks = list(self.iter_directory(directory))
         console.print(f"\n✓ Total chunks created: {len(all_chunks)}", style="bold green")
         return all_chunks
 
-
 if __name__ == "__main__":
     # Test the document processor
     import sys
@@ -0,0 +1,202 @@
+"""
+Embedding Cache - Content-addressed, disk-backed store for embedding vectors
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache keyed by (model_name, task_type, sha256(text)).
+
+    Vectors are stored as float32 blobs in SQLite. When the number of entries
+    exceeds ``max_entries`` the least recently used ones are evicted.
+    """
+
+    def __init__(self, db_path: str, max_entries: int = 100_000):
+        """
+        Initialize the cache.
+
+        Args:
+            db_path: Path to the SQLite file backing the cache
+            max_entries: Maximum number of vectors to keep before LRU eviction
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = self._get_connection()
+        self._initialize_table()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """Open the shared cache connection."""
+        conn = sqlite3.connect(str(self.db_path), timeout=10, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _initialize_table(self):
+        """Create the cache table if it doesn't exist."""
+        with self._lock:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    model_name TEXT NOT NULL,
+                    task_type TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (model_name, task_type, text_hash)
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)"
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        """Content address for a text."""
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _pack(vector: List[float]) -> bytes:
+        return array('f', vector).tobytes()
+
+    @staticmethod
+    def _unpack(blob: bytes) -> List[float]:
+        values = array('f')
+        values.frombytes(blob)
+        return values.tolist()
+
+    def get(self, model_name: str, task_type: str, text: str) -> Optional[List[float]]:
+        """
+        Look up a single embedding.
+
+        Returns:
+            The cached vector, or None on a miss
+        """
+        return self.get_many(model_name, task_type, [text]).get(0)
+
+    def get_many(self, model_name: str, task_type: str, texts: List[str]) -> Dict[int, List[float]]:
+        """
+        Look up embeddings for several texts at once.
+
+        Args:
+            model_name: Embedding model name
+            task_type: Gemini task type the vectors were produced for
+            texts: Texts to look up
+
+        Returns:
+            Mapping of position in ``texts`` to cached vector (hits only)
+        """
+        if not texts:
+            return {}
+
+        hashes = [self.text_hash(text) for text in texts]
+        found: Dict[str, bytes] = {}
+        unique = list(set(hashes))
+
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(unique), 500):
+                part = unique[i:i + 500]
+                placeholders = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model_name = ? AND task_type = ? AND text_hash IN ({placeholders})",
+                    [model_name, task_type, *part]
+                ).fetchall()
+                found.update(rows)
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? "
+                    "WHERE model_name = ? AND task_type = ? AND text_hash = ?",
+                    [(now, model_name, task_type, h) for h in found]
+                )
+                self._conn.commit()
+
+            results = {i: self._unpack(found[h]) for i, h in enumerate(hashes) if h in found}
+            self.hits += len(results)
+            self.misses += len(texts) - len(results)
+
+        return results
+
+    def put(self, model_name: str, task_type: str, text: str, vector: List[float]) -> None:
+        """Store a single embedding."""
+        self.put_many(model_name, task_type, [(text, vector)])
+
+    def put_many(self, model_name: str, task_type: str, items: List[Tuple[str, List[float]]]) -> None:
+        """
+        Store several embeddings and evict the least recently used overflow.
+
+        Args:
+            model_name: Embedding model name
+            task_type: Gemini task type the vectors were produced for
+            items: (text, vector) pairs to store
+        """
+        if not items:
+            return
+
+        now = time.time()
+        rows = [(model_name, task_type, self.text_hash(text), self._pack(vector), now)
+                for text, vector in items]
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings "
+                "(model_name, task_type, text_hash, vector, last_used) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+
+            count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE rowid IN "
+                    "(SELECT rowid FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                    (overflow,)
+                )
+                self.evictions += overflow
+
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """Remove every cached embedding."""
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            ).fetchone()
+
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'vector_bytes': size,
+            'path': str(self.db_path)
+        }
+
+    def close(self) -> None:
+        """Close the underlying connection."""
+        with self._lock:
+            self._conn.close()
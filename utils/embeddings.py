@@ -2,28 +2,65 @@
 Embedding Generator - Handles text to vector conversion using Google Gemini API
 """
 
-import google.generativeai as genai
-from typing import List, Optional
+from typing import Any, Callable, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import time
 from rich.console import Console
 
+from utils.embedding_cache import EmbeddingCache
+from utils.rate_limiter import AdaptiveRateLimiter, gemini_rate_limiter
+
 console = Console()
 
 
 class EmbeddingGenerator:
     """Generate embeddings using Google Gemini API."""
     
-    def __init__(self, api_key: str, model_name: str = "models/gemini-embedding-001"):
+    def __init__(self, api_key: str, model_name: str = "models/gemini-embedding-001",
+                 batch_size: int = 100, max_concurrency: int = 4, client: Any = None,
+                 cache: Optional[EmbeddingCache] = None, dimension: int = 3072,
+                 rate_limiter: Optional[AdaptiveRateLimiter] = None):
         """
         Initialize the embedding generator.
         
         Args:
             api_key: Google API key for Gemini
             model_name: Name of the embedding model to use
+            batch_size: Maximum texts per embedding request (Gemini allows 100)
+            max_concurrency: Maximum embedding requests in flight at once
+            client: Object exposing ``embed_content`` (defaults to ``google.generativeai``)
+            cache: Persistent embedding cache consulted before any API call (optional)
+            dimension: Output size of the embedding model, used for the zero
+                vectors that stand in for texts that could not be embedded
+            rate_limiter: Limiter every request goes through (defaults to the
+                process-wide Gemini limiter, or an unlimited one for a custom client)
         """
-        genai.configure(api_key=api_key)
+        if rate_limiter is None:
+            rate_limiter = gemini_rate_limiter() if client is None else AdaptiveRateLimiter()
+        if client is None:
+            import google.generativeai as genai
+            genai.configure(api_key=api_key)
+            client = genai
         self.model_name = model_name
-        self.embedding_model = genai
+        self.embedding_model = client
+        self.batch_size = batch_size
+        self.max_concurrency = max(1, max_concurrency)
+        self.cache = cache
+        self.dimension = dimension
+        self.last_batch_stats: Dict[str, Any] = {}
+        self.rate_limiter = rate_limiter
+    
+    def _cache_get(self, task_type: str, text: str) -> Optional[List[float]]:
+        """Return a cached embedding, if caching is enabled."""
+        if self.cache is None:
+            return None
+        return self.cache.get(self.model_name, task_type, text)
+    
+    def _cache_put(self, task_type: str, text: str, vector: List[float]) -> None:
+        """Store an embedding, if caching is enabled."""
+        if self.cache is not None and vector:
+            self.cache.put(self.model_name, task_type, text, vector)
         
     def generate_embedding(self, text: str, retry_count: int = 3) -> Optional[List[float]]:
         """
@@ -40,87 +77,252 @@ class EmbeddingGenerator:
             console.print("⚠️  Empty text provided for embedding", style="yellow")
             return None
         
-        for attempt in range(retry_count):
-            try:
-                result = genai.embed_content(
-                    model=self.model_name,
-                    content=text,
-                    task_type="retrieval_document"
+        cached = self._cache_get("retrieval_document", text)
+        if cached is not None:
+            return cached
+        
+        try:
+            result = self.rate_limiter.call(
+                self.embedding_model.embed_content,
+                model=self.model_name,
+                content=text,
+                task_type="retrieval_document",
+                retries=retry_count - 1
+            )
+        except Exception as e:
+            console.print(f"❌ Failed to generate embedding: {e}", style="red")
+            return None
+        
+        self._cache_put("retrieval_document", text, result['embedding'])
+        return result['embedding']
+    
+    async def agenerate_embedding(self, text: str, task_type: str = "retrieval_document",
+                                  retry_count: int = 3) -> Optional[List[float]]:
+        """
+        Generate embedding for a single text without blocking the event loop.
+        
+        Uses the client's ``embed_content_async`` when available and falls back
+        to running the blocking call in a worker thread.
+        
+        Args:
+            text: Text to embed
+            task_type: Gemini task type for the request
+            retry_count: Number of retries on failure
+            
+        Returns:
+            Embedding vector as list of floats, or None on failure
+        """
+        if not text or not text.strip():
+            console.print("⚠️  Empty text provided for embedding", style="yellow")
+            return None
+        
+        cached = self._cache_get(task_type, text)
+        if cached is not None:
+            return cached
+        
+        embed_async = getattr(self.embedding_model, 'embed_content_async', None)
+        
+        try:
+            if embed_async is not None:
+                result = await self.rate_limiter.acall(
+                    embed_async, model=self.model_name, content=text, task_type=task_type,
+                    retries=retry_count - 1
                 )
-                return result['embedding']
-                
+            else:
+                result = await self.rate_limiter.acall(
+                    asyncio.to_thread, self.embedding_model.embed_content,
+                    model=self.model_name, content=text, task_type=task_type,
+                    retries=retry_count - 1
+                )
+        except Exception as e:
+            console.print(f"❌ Failed to generate embedding: {e}", style="red")
+            return None
+        
+        self._cache_put(task_type, text, result['embedding'])
+        return result['embedding']
+    
+    def _embed_request(self, texts: List[str], task_type: str) -> List[Optional[List[float]]]:
+        """
+        Send one multi-text embedding request.
+        
+        Args:
+            texts: Texts to embed in a single request
+            task_type: Gemini task type for the request
+            
+        Returns:
+            One embedding per text (None where the provider returned nothing)
+        """
+        # No retries here: generate_batch retries only the texts that failed
+        result = self.rate_limiter.call(
+            self.embedding_model.embed_content,
+            model=self.model_name,
+            content=texts,
+            task_type=task_type,
+            retries=0
+        )
+        vectors = result['embedding']
+        
+        if len(vectors) != len(texts):
+            raise ValueError(f"Expected {len(texts)} embeddings, got {len(vectors)}")
+        
+        return [vector if vector else None for vector in vectors]
+    
+    def _embed_indices(self, texts: List[str], indices: List[int], batch_size: int,
+                       task_type: str, on_batch: Optional[Callable[[int], None]] = None) -> Dict[int, List[float]]:
+        """
+        Embed the texts at the given indices using concurrent batch requests.
+        
+        Args:
+            texts: Full list of input texts
+            indices: Positions in ``texts`` that still need an embedding
+            batch_size: Number of texts per request
+            task_type: Gemini task type for the requests
+            on_batch: Called with the number of texts embedded after each batch (optional)
+            
+        Returns:
+            Mapping of input position to embedding for every item that succeeded
+        """
+        batches = [indices[i:i + batch_size] for i in range(0, len(indices), batch_size)]
+        embedded: Dict[int, List[float]] = {}
+        
+        def run(batch: List[int]):
+            try:
+                return batch, self._embed_request([texts[k] for k in batch], task_type), None
             except Exception as e:
-                if attempt < retry_count - 1:
-                    wait_time = (attempt + 1) * 2  # Exponential backoff
+                return batch, None, e
+        
+        workers = min(self.max_concurrency, len(batches))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for batch_num, (batch, vectors, error) in enumerate(executor.map(run, batches), 1):
+                if error is not None:
                     console.print(
-                        f"⚠️  Embedding attempt {attempt + 1} failed, retrying in {wait_time}s...",
+                        f"⚠️  Batch {batch_num}/{len(batches)} failed ({len(batch)} texts): {error}",
                         style="yellow"
                     )
-                    time.sleep(wait_time)
-                else:
-                    console.print(f"❌ Failed to generate embedding: {e}", style="red")
-                    return None
+                    continue
+                
+                succeeded = 0
+                for k, vector in zip(batch, vectors):
+                    if vector:
+                        embedded[k] = vector
+                        succeeded += 1
+                if on_batch is not None:
+                    on_batch(succeeded)
         
-        return None
+        return embedded
     
-    def generate_batch(self, texts: List[str], batch_size: int = 100) -> List[List[float]]:
+    def generate_batch(self, texts: List[str], batch_size: Optional[int] = None,
+                       retry_count: int = 3, task_type: str = "retrieval_document",
+                       progress: Optional[Callable[[int, int], None]] = None) -> List[List[float]]:
         """
         Generate embeddings for multiple texts with batching.
         
+        Texts are sent as multi-text requests of up to ``batch_size`` items, with
+        at most ``max_concurrency`` requests in flight. Only the items that failed
+        are retried; results are always returned in input order. Texts already
+        in the embedding cache are never sent to the API.
+        
         Args:
             texts: List of texts to embed
-            batch_size: Number of texts to process at once
+            batch_size: Number of texts per request (defaults to ``self.batch_size``)
+            retry_count: Number of attempts per item before giving up
+            task_type: Gemini task type for the requests
+            progress: Called with (texts done, total texts) as batches complete (optional)
             
         Returns:
-            List of embedding vectors
+            List of embedding vectors aligned with ``texts``
         """
         if not texts:
             console.print("⚠️  No texts provided for embedding", style="yellow")
             return []
         
-        embeddings = []
+        batch_size = batch_size or self.batch_size
         total_texts = len(texts)
+        start_time = time.perf_counter()
         
-        # Process in batches
-        for i in range(0, total_texts, batch_size):
-            batch = texts[i:i + batch_size]
-            batch_num = (i // batch_size) + 1
-            total_batches = (total_texts + batch_size - 1) // batch_size
-            
-            console.print(
-                f"🔄 Processing batch {batch_num}/{total_batches} ({len(batch)} texts)...",
-                style="cyan"
-            )
+        results: List[Optional[List[float]]] = [None] * total_texts
+        pending = [i for i, text in enumerate(texts) if text and text.strip()]
+        requests_sent = 0
+        cache_hits = 0
+        
+        if self.cache is not None and pending:
+            cached = self.cache.get_many(self.model_name, task_type, [texts[k] for k in pending])
+            for position, vector in cached.items():
+                results[pending[position]] = vector
+            cache_hits = len(cached)
+            pending = [k for k in pending if results[k] is None]
+            if cache_hits:
+                console.print(f"💾 {cache_hits} embeddings served from cache", style="cyan")
+        
+        done = total_texts - len(pending)
+        
+        def on_batch(count: int) -> None:
+            nonlocal done
+            done += count
+            progress(done, total_texts)
+        
+        if progress is not None:
+            progress(done, total_texts)
+        
+        total_batches = (len(pending) + batch_size - 1) // batch_size
+        console.print(
+            f"🔄 Embedding {len(pending)} texts in {total_batches} batch(es) "
+            f"(up to {self.max_concurrency} concurrent)...",
+            style="cyan"
+        )
+        
+        for attempt in range(retry_count):
+            if not pending:
+                break
             
-            # Generate embeddings for this batch
-            for j, text in enumerate(batch):
-                embedding = self.generate_embedding(text)
-                
-                if embedding:
-                    embeddings.append(embedding)
-                else:
-                    # Add a zero vector as fallback to maintain alignment
-                    console.print(
-                        f"⚠️  Using zero vector for text {i+j+1} due to embedding failure",
-                        style="yellow"
-                    )
-                    # Use a default dimension size (768 for Gemini)
-                    embeddings.append([0.0] * 3072)
-                
-                # Rate limiting: small delay between requests
-                if j < len(batch) - 1:  # Don't sleep after last item
-                    time.sleep(0.1)
+            if attempt > 0:
+                wait_time = self.rate_limiter.backoff(attempt - 1)
+                console.print(
+                    f"⚠️  Retrying {len(pending)} failed texts in {wait_time:.1f}s...",
+                    style="yellow"
+                )
+                time.sleep(wait_time)
             
-            # Delay between batches
-            if i + batch_size < total_texts:
-                time.sleep(1)
+            requests_sent += (len(pending) + batch_size - 1) // batch_size
+            embedded = self._embed_indices(texts, pending, batch_size, task_type,
+                                           on_batch if progress is not None else None)
+            for k, vector in embedded.items():
+                results[k] = vector
+            if self.cache is not None:
+                self.cache.put_many(self.model_name, task_type,
+                                    [(texts[k], vector) for k, vector in embedded.items()])
+            pending = [k for k in pending if results[k] is None]
+        
+        # Add a zero vector as fallback to maintain alignment
+        dimension = next((len(vector) for vector in results if vector), self.dimension)
+        failed = 0
+        for i, vector in enumerate(results):
+            if vector is None:
+                console.print(
+                    f"⚠️  Using zero vector for text {i+1} due to embedding failure",
+                    style="yellow"
+                )
+                results[i] = [0.0] * dimension
+                failed += 1
+        
+        elapsed = time.perf_counter() - start_time
+        throughput = total_texts / elapsed if elapsed > 0 else float('inf')
+        self.last_batch_stats = {
+            'texts': total_texts,
+            'failed': failed,
+            'cache_hits': cache_hits,
+            'requests': requests_sent,
+            'seconds': elapsed,
+            'texts_per_second': throughput,
+        }
         
         console.print(
-            f"✅ Generated {len(embeddings)}/{total_texts} embeddings",
+            f"✅ Generated {total_texts - failed}/{total_texts} embeddings "
+            f"in {elapsed:.2f}s ({throughput:.1f} texts/s)",
             style="green"
         )
         
-        return embeddings
+        return results
     
     def generate_query_embedding(self, query: str) -> Optional[List[float]]:
         """
@@ -136,17 +338,65 @@ class EmbeddingGenerator:
             console.print("⚠️  Empty query provided", style="yellow")
             return None
         
+        cached = self._cache_get("retrieval_query", query)
+        if cached is not None:
+            return cached
+        
         try:
-            result = genai.embed_content(
+            # One retry at most: the query embedding is on the request path
+            result = self.rate_limiter.call(
+                self.embedding_model.embed_content,
                 model=self.model_name,
                 content=query,
-                task_type="retrieval_query"  # Different task type for queries
+                task_type="retrieval_query",  # Different task type for queries
+                retries=1
             )
+            self._cache_put("retrieval_query", query, result['embedding'])
             return result['embedding']
             
         except Exception as e:
             console.print(f"❌ Failed to generate query embedding: {e}", style="red")
             return None
+    
+    def warm_up(self, query: str) -> List[float]:
+        """
+        Send one query embedding request past the cache.
+        
+        Used at startup so the client's connection is open before the first
+        real query. Errors propagate.
+        
+        Args:
+            query: Query text to embed
+            
+        Returns:
+            Embedding vector
+        """
+        result = self.rate_limiter.call(
+            self.embedding_model.embed_content,
+            model=self.model_name,
+            content=query,
+            task_type="retrieval_query",
+            retries=1
+        )
+        return result['embedding']
+
+
+class ThrottledEmbeddingClient:
+    """
+    Embedding client wrapper that takes a token from its own limiter before
+    each request.
+    
+    Lets a background job (e.g. an index rebuild) use only part of the
+    quota; requests still go through the generator's shared limiter too.
+    """
+    
+    def __init__(self, client: Any, rate_limiter: AdaptiveRateLimiter):
+        self.client = client
+        self.rate_limiter = rate_limiter
+    
+    def embed_content(self, **kwargs) -> Dict[str, Any]:
+        self.rate_limiter.acquire()
+        return self.client.embed_content(**kwargs)
 
 
 # Convenience function for quick embedding generation
@@ -0,0 +1,232 @@
+"""
+Lexical Index - BM25 inverted index over document chunks
+"""
+
+import heapq
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Common English words that carry no retrieval signal
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from",
+    "how", "i", "if", "in", "is", "it", "me", "my", "of", "on", "or", "should", "so",
+    "that", "the", "their", "there", "these", "this", "to", "was", "what", "when",
+    "where", "which", "who", "why", "will", "with", "you", "your"
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+
+# Dotted acronyms such as "F.A.S.T." or "t.P.A."
+ACRONYM_PATTERN = re.compile(r"\b[a-z](?:\.[a-z])+\.?")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords (keeps terms like "tpa", "fast", "tia")."""
+    text = ACRONYM_PATTERN.sub(lambda match: match.group().replace(".", ""), text.lower())
+    return [token for token in TOKEN_PATTERN.findall(text) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Persistent BM25 index.
+
+    Holds postings (term -> [[doc_position, term_frequency], ...]) together with
+    the chunk ids, texts and metadata, so lexical search works on its own when
+    the embedding API is unavailable. Removed chunks are tombstoned (their
+    positions listed under 'deleted') rather than unlinked from the postings.
+    All reads and writes hold one lock, so a search never sees a chunk half
+    added or an index half compacted.
+    """
+
+    def __init__(self, path: str, k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize the index, loading it from disk if present.
+
+        Args:
+            path: JSON file the index is persisted to
+            k1: BM25 term-frequency saturation
+            b: BM25 length normalization
+        """
+        self.path = Path(path)
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._load()
+
+    def _load(self) -> None:
+        data = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+        self.ids: List[str] = data.get('ids', [])
+        self.documents: List[str] = data.get('documents', [])
+        self.metadatas: List[Dict] = data.get('metadatas', [])
+        self.doc_lengths: List[int] = data.get('doc_lengths', [])
+        self.postings: Dict[str, List[List[int]]] = data.get('postings', {})
+        self.deleted = set(data.get('deleted', []))
+        self.positions = {chunk_id: i for i, chunk_id in enumerate(self.ids) if i not in self.deleted}
+        self.live_length = sum(self.doc_lengths[i] for i in self.positions.values())
+
+    def save(self) -> None:
+        """Write the index to disk atomically."""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'ids': self.ids,
+                    'documents': self.documents,
+                    'metadatas': self.metadatas,
+                    'doc_lengths': self.doc_lengths,
+                    'postings': self.postings,
+                    'deleted': sorted(self.deleted)
+                }, f)
+            os.replace(tmp_path, self.path)
+
+    def count(self) -> int:
+        return len(self.positions)
+
+    def add(self, ids: List[str], documents: List[str], metadatas: List[Dict], save: bool = True) -> int:
+        """
+        Index new chunks; ids already present are skipped.
+
+        Returns:
+            Number of chunks added
+        """
+        added = 0
+        with self._lock:
+            for chunk_id, text, metadata in zip(ids, documents, metadatas):
+                if chunk_id in self.positions:
+                    continue
+
+                position = len(self.ids)
+                tokens = tokenize(text)
+                for term, tf in Counter(tokens).items():
+                    self.postings.setdefault(term, []).append([position, tf])
+
+                self.positions[chunk_id] = position
+                self.ids.append(chunk_id)
+                self.documents.append(text)
+                self.metadatas.append(metadata)
+                self.doc_lengths.append(len(tokens))
+                self.live_length += len(tokens)
+                added += 1
+
+            if added and save:
+                self.save()
+        return added
+
+    def remove(self, ids: List[str], save: bool = True) -> int:
+        """
+        Tombstone chunks by id; unknown ids are ignored.
+
+        Returns:
+            Number of chunks removed
+        """
+        with self._lock:
+            removed = 0
+            for chunk_id in ids:
+                position = self.positions.pop(chunk_id, None)
+                if position is not None:
+                    self.deleted.add(position)
+                    self.live_length -= self.doc_lengths[position]
+                    removed += 1
+            if removed and save:
+                self.save()
+        return removed
+
+    def upsert(self, ids: List[str], documents: List[str], metadatas: List[Dict], save: bool = True) -> int:
+        """Index chunks, replacing any already indexed under the same id."""
+        with self._lock:
+            self.remove(ids, save=False)
+            added = self.add(ids, documents, metadatas, save=False)
+            if save:
+                self.save()
+        return added
+
+    def compact(self) -> None:
+        """Rebuild the postings without tombstoned chunks."""
+        with self._lock:
+            if not self.deleted:
+                return
+            live = sorted(self.positions.values())
+            renumbered = {old: new for new, old in enumerate(live)}
+            postings = {}
+            for term, entries in self.postings.items():
+                kept = [[renumbered[position], tf] for position, tf in entries if position in renumbered]
+                if kept:
+                    postings[term] = kept
+
+            self.ids = [self.ids[i] for i in live]
+            self.documents = [self.documents[i] for i in live]
+            self.metadatas = [self.metadatas[i] for i in live]
+            self.doc_lengths = [self.doc_lengths[i] for i in live]
+            self.postings = postings
+            self.deleted = set()
+            self.positions = {chunk_id: i for i, chunk_id in enumerate(self.ids)}
+            self.save()
+
+    def disk_bytes(self) -> int:
+        return self.path.stat().st_size if self.path.exists() else 0
+
+    def clear(self) -> None:
+        """Remove every chunk from the index."""
+        with self._lock:
+            if self.path.exists():
+                self.path.unlink()
+            self._load()
+
+    def search(self, query: str, n_results: int = 5) -> List[Tuple[int, float]]:
+        """
+        Score chunks against the query with BM25.
+
+        Returns:
+            (position, score) pairs for the best matches, highest score first
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            total = len(self.positions)
+            if not terms or total == 0:
+                return []
+
+            average_length = (self.live_length / total) or 1.0
+            scores: Dict[int, float] = {}
+
+            for term in terms:
+                postings = self.postings.get(term)
+                if postings and self.deleted:
+                    postings = [posting for posting in postings if posting[0] not in self.deleted]
+                if not postings:
+                    continue
+                idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+                for position, tf in postings:
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[position] / average_length)
+                    scores[position] = scores.get(position, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+            return heapq.nlargest(n_results, scores.items(), key=lambda item: item[1])
+
+    def search_chunks(self, query: str, n_results: int = 5) -> List[Dict]:
+        """
+        Like ``search``, but returns the chunks themselves, read under the same
+        lock (positions from ``search`` change when the index is compacted).
+        """
+        with self._lock:
+            return [self.chunk(position, score) for position, score in self.search(query, n_results)]
+
+    def chunk(self, position: int, score: Optional[float] = None) -> Dict:
+        """Search-result dictionary for an indexed chunk."""
+        with self._lock:
+            return {
+                'text': self.documents[position],
+                'metadata': self.metadatas[position],
+                'distance': None,
+                'id': self.ids[position],
+                'lexical_score': score
+            }
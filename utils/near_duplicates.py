@@ -0,0 +1,212 @@
+"""
+Near-Duplicate Index - MinHash signatures with LSH banding over document chunks
+
+Finds stored chunks whose text is nearly the same as a new chunk (the same
+guideline saved as .md and .txt, a revised upload of a document), so the
+copy can point at the stored chunk instead of being embedded and stored again.
+"""
+
+import json
+import os
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.lexical_index import tokenize
+
+# Universal hashing modulo a Mersenne prime; 32-bit shingle hashes times
+# coefficients below it stay within 64 bits
+MERSENNE_PRIME = (1 << 31) - 1
+
+
+def shingles(text: str, size: int = 3) -> set:
+    """Word ``size``-grams of the text's normalized tokens (case, punctuation and markup ignored)."""
+    tokens = tokenize(text)
+    if len(tokens) < size:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+class NearDuplicateIndex:
+    """
+    Persistent MinHash/LSH index.
+
+    Each chunk is summarized by a ``num_perm``-value MinHash signature; the
+    share of equal values between two signatures estimates the Jaccard
+    similarity of their shingle sets. Signatures are split into ``bands``
+    bands and chunks sharing a band are candidates, so a lookup only compares
+    against a handful of chunks. Candidates are confirmed against
+    ``threshold``. Each chunk also has a group (its document): chunks are
+    never reported as duplicates of chunks in their own group.
+    """
+
+    def __init__(self, path: Optional[str] = None, threshold: float = 0.85,
+                 num_perm: int = 128, bands: int = 16, seed: int = 1):
+        """
+        Initialize the index, loading it from disk if present.
+
+        Args:
+            path: JSON file the signatures are persisted to (None keeps them in memory)
+            threshold: Estimated Jaccard similarity at which chunks count as duplicates
+            num_perm: Number of hash functions per signature
+            bands: LSH bands (``num_perm`` must be a multiple of it)
+            seed: Seed of the hash functions
+        """
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.path = Path(path) if path else None
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.seed = seed
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._lock = threading.RLock()
+        self._load()
+
+    def _load(self) -> None:
+        data = {}
+        if self.path is not None and self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        if (data.get('num_perm'), data.get('seed')) != (self.num_perm, self.seed):
+            data = {}  # Signatures from other hash functions can't be compared
+
+        self.signatures: Dict[str, np.ndarray] = {
+            chunk_id: np.array(signature, dtype=np.uint64) for chunk_id, signature in data.get('signatures', {}).items()
+        }
+        self.groups: Dict[str, str] = data.get('groups', {})
+        self.buckets: Dict[Tuple[int, bytes], set] = {}
+        for chunk_id, signature in self.signatures.items():
+            self._bucket(chunk_id, signature)
+
+    def save(self) -> None:
+        """Write the index to disk atomically (no-op for an in-memory index)."""
+        if self.path is None:
+            return
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'num_perm': self.num_perm,
+                    'seed': self.seed,
+                    'signatures': {chunk_id: signature.tolist() for chunk_id, signature in self.signatures.items()},
+                    'groups': self.groups
+                }, f)
+            os.replace(tmp_path, self.path)
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def _bucket(self, chunk_id: str, signature: np.ndarray) -> None:
+        for key in self._band_keys(signature):
+            self.buckets.setdefault(key, set()).add(chunk_id)
+
+    def _unbucket(self, chunk_id: str, signature: np.ndarray) -> None:
+        for key in self._band_keys(signature):
+            bucket = self.buckets.get(key)
+            if bucket is not None:
+                bucket.discard(chunk_id)
+                if not bucket:
+                    del self.buckets[key]
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature of a text (None if it has no words)."""
+        words = shingles(text)
+        if not words:
+            return None
+        hashes = np.array([zlib.crc32(shingle.encode('utf-8')) for shingle in words], dtype=np.uint64)
+        permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % np.uint64(MERSENNE_PRIME)
+        return permuted.min(axis=1)
+
+    def count(self) -> int:
+        return len(self.signatures)
+
+    def add(self, ids: List[str], texts: List[str], groups: List[str], save: bool = True) -> int:
+        """
+        Index chunks, replacing any already indexed under the same id.
+
+        Returns:
+            Number of chunks indexed (chunks without words are skipped)
+        """
+        signatures = [self.signature(text) for text in texts]
+        added = 0
+        with self._lock:
+            for chunk_id, signature, group in zip(ids, signatures, groups):
+                previous = self.signatures.pop(chunk_id, None)
+                if previous is not None:
+                    self._unbucket(chunk_id, previous)
+                self.groups.pop(chunk_id, None)
+                if signature is None:
+                    continue
+                self.signatures[chunk_id] = signature
+                self.groups[chunk_id] = group
+                self._bucket(chunk_id, signature)
+                added += 1
+            if save:
+                self.save()
+        return added
+
+    def remove(self, ids: List[str], save: bool = True) -> int:
+        """
+        Forget chunks by id; unknown ids are ignored.
+
+        Returns:
+            Number of chunks removed
+        """
+        with self._lock:
+            removed = 0
+            for chunk_id in ids:
+                signature = self.signatures.pop(chunk_id, None)
+                self.groups.pop(chunk_id, None)
+                if signature is not None:
+                    self._unbucket(chunk_id, signature)
+                    removed += 1
+            if removed and save:
+                self.save()
+        return removed
+
+    def find(self, text: str, group: str = "", exclude: Optional[str] = None) -> Optional[Tuple[str, float]]:
+        """
+        Most similar indexed chunk from another group at or above the threshold.
+
+        Args:
+            text: Text of the new chunk
+            group: The new chunk's group; chunks of the same group are ignored
+            exclude: Chunk id to ignore (the new chunk's own id)
+
+        Returns:
+            (chunk id, estimated Jaccard similarity), or None
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return None
+
+        best = None
+        with self._lock:
+            candidates = set()
+            for key in self._band_keys(signature):
+                candidates |= self.buckets.get(key, set())
+            for chunk_id in sorted(candidates):
+                if chunk_id == exclude or self.groups.get(chunk_id) == group:
+                    continue
+                similarity = float(np.mean(self.signatures[chunk_id] == signature))
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (chunk_id, similarity)
+        return best
+
+    def disk_bytes(self) -> int:
+        return self.path.stat().st_size if self.path is not None and self.path.exists() else 0
+
+    def clear(self) -> None:
+        """Remove every chunk from the index."""
+        with self._lock:
+            if self.path is not None and self.path.exists():
+                self.path.unlink()
+            self._load()
@@ -0,0 +1,240 @@
+"""
+Rate Limiter - Process-wide token bucket with AIMD adaptation for Gemini calls
+
+Every Gemini request takes a token from one shared bucket refilled at the
+configured quota. A 429/503 response cuts the refill rate by 20% (multiplicative
+decrease) and each success raises it again by a fixed step (additive
+increase), so the process settles just under the quota the API actually
+grants. Retries wait a jittered exponential backoff.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# Fragments of error messages / class names meaning "slow down"
+THROTTLE_MARKERS = ('429', '503', 'resource exhausted', 'resourceexhausted', 'rate limit', 'quota',
+                    'too many requests', 'overloaded', 'unavailable', 'serviceunavailable')
+
+
+def is_throttle_error(error: BaseException) -> bool:
+    """Whether an exception is the API asking us to back off (429 / 503)."""
+    for attribute in ('code', 'status_code'):
+        code = getattr(error, attribute, None)
+        code = code() if callable(code) else code
+        if code in (429, 503):
+            return True
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in THROTTLE_MARKERS)
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket whose refill rate adapts to throttling (AIMD).
+
+    Callers either wrap a request with ``call`` / ``acall`` (acquire, send,
+    retry with jittered backoff, adapt) or take a token with ``acquire`` /
+    ``aacquire`` and report the outcome with ``record_success`` /
+    ``record_throttle``. A rate of None disables the bucket; retries and
+    metrics still apply.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None, burst: int = 10,
+                 min_requests_per_minute: float = 30, increase_per_success: float = 10,
+                 decrease_factor: float = 0.8, max_retries: int = 4,
+                 backoff_base: float = 1.0, backoff_max: float = 30.0):
+        """
+        Initialize the limiter.
+
+        Args:
+            requests_per_minute: Quota ceiling (None for no limit)
+            burst: Bucket capacity, i.e. requests allowed back to back
+            min_requests_per_minute: Floor the rate never drops below
+            increase_per_success: Requests/minute added after each success
+            decrease_factor: Rate multiplier applied on a throttle response
+            max_retries: Retries per call after the first attempt
+            backoff_base: First retry waits up to this many seconds (doubling after)
+            backoff_max: Upper bound of a single backoff wait
+        """
+        self.max_rate = requests_per_minute / 60.0 if requests_per_minute else None
+        self.min_rate = min(min_requests_per_minute / 60.0, self.max_rate) if self.max_rate else None
+        self.rate = self.max_rate
+        self.burst = max(1, burst)
+        self.increase = increase_per_success / 60.0
+        self.decrease_factor = decrease_factor
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._last_decrease = 0.0
+
+        self.requests = 0
+        self.throttle_events = 0
+        self.rate_decreases = 0
+        self.retries = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    # ==================== BUCKET ====================
+
+    def _reserve(self, cost: float) -> float:
+        """Take ``cost`` tokens (going into debt if needed) and return the wait before using them."""
+        with self._lock:
+            self.requests += 1
+            if self.rate is None:
+                return 0.0
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= cost
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            return wait
+
+    def acquire(self, cost: float = 1.0) -> float:
+        """Block until a request may be sent; returns the seconds waited."""
+        wait = self._reserve(cost)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self, cost: float = 1.0) -> float:
+        """Async ``acquire`` that never blocks the event loop."""
+        wait = self._reserve(cost)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    # ==================== ADAPTATION ====================
+
+    def record_success(self) -> None:
+        """Additive increase, up to the configured quota."""
+        with self._lock:
+            if self.rate is not None:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def record_throttle(self, sent_at: Optional[float] = None) -> None:
+        """
+        Multiplicative decrease.
+
+        Args:
+            sent_at: When the throttled request was sent (``time.monotonic``).
+                Requests sent before the last decrease were paced at the old
+                rate, so their throttles don't lower the rate again.
+        """
+        with self._lock:
+            self.throttle_events += 1
+            if self.rate is None:
+                return
+            now = time.monotonic()
+            if sent_at is None or sent_at > self._last_decrease:
+                self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+                self._last_decrease = now
+                self.rate_decreases += 1
+                print(f"⚠️  Gemini throttled, rate lowered to {self.rate * 60:.0f} requests/min")
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for retry number ``attempt`` (0-based)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _failed(self, error: Exception, sent_at: float) -> None:
+        if is_throttle_error(error):
+            self.record_throttle(sent_at)
+
+    # ==================== WRAPPED CALLS ====================
+
+    def call(self, fn: Callable[..., Any], *args, retries: Optional[int] = None,
+             retryable: Optional[Callable[[Exception], bool]] = None, **kwargs) -> Any:
+        """
+        Send a request through the limiter, retrying failures.
+
+        Args:
+            fn: The API call
+            retries: Retries after the first attempt (defaults to ``max_retries``)
+            retryable: Which errors to retry (default: all of them)
+
+        Returns:
+            What ``fn`` returns; the last error is raised once retries run out
+        """
+        retries = self.max_retries if retries is None else retries
+        for attempt in range(retries + 1):
+            self.acquire()
+            sent_at = time.monotonic()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                self._failed(e, sent_at)
+                if attempt >= retries or (retryable is not None and not retryable(e)):
+                    raise
+                with self._lock:
+                    self.retries += 1
+                time.sleep(self.backoff(attempt))
+                continue
+            self.record_success()
+            return result
+
+    async def acall(self, fn: Callable[..., Awaitable[Any]], *args, retries: Optional[int] = None,
+                    retryable: Optional[Callable[[Exception], bool]] = None, **kwargs) -> Any:
+        """Async ``call`` for coroutine functions."""
+        retries = self.max_retries if retries is None else retries
+        for attempt in range(retries + 1):
+            await self.aacquire()
+            sent_at = time.monotonic()
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                self._failed(e, sent_at)
+                if attempt >= retries or (retryable is not None and not retryable(e)):
+                    raise
+                with self._lock:
+                    self.retries += 1
+                await asyncio.sleep(self.backoff(attempt))
+                continue
+            self.record_success()
+            return result
+
+    def stats(self) -> Dict:
+        """Current rate, throttle counters and queue wait time."""
+        with self._lock:
+            return {
+                'requests_per_minute': self.rate * 60 if self.rate is not None else None,
+                'max_requests_per_minute': self.max_rate * 60 if self.max_rate is not None else None,
+                'requests': self.requests,
+                'throttle_events': self.throttle_events,
+                'rate_decreases': self.rate_decreases,
+                'retries': self.retries,
+                'total_queue_wait_seconds': self.total_wait,
+                'mean_queue_wait_ms': self.total_wait / self.requests * 1000 if self.requests else 0.0,
+                'max_queue_wait_ms': self.max_wait * 1000
+            }
+
+
+_gemini_limiter: Optional[AdaptiveRateLimiter] = None
+_gemini_limiter_lock = threading.Lock()
+
+
+def gemini_rate_limiter() -> AdaptiveRateLimiter:
+    """The process-wide limiter shared by every Gemini call, configured from config.py."""
+    global _gemini_limiter
+    if _gemini_limiter is None:
+        with _gemini_limiter_lock:
+            if _gemini_limiter is None:
+                from config import (
+                    GEMINI_REQUESTS_PER_MINUTE, GEMINI_BURST, GEMINI_MIN_REQUESTS_PER_MINUTE,
+                    GEMINI_RATE_INCREASE_PER_SUCCESS, GEMINI_RATE_DECREASE_FACTOR, GEMINI_MAX_RETRIES
+                )
+                _gemini_limiter = AdaptiveRateLimiter(
+                    requests_per_minute=GEMINI_REQUESTS_PER_MINUTE,
+                    burst=GEMINI_BURST,
+                    min_requests_per_minute=GEMINI_MIN_REQUESTS_PER_MINUTE,
+                    increase_per_success=GEMINI_RATE_INCREASE_PER_SUCCESS,
+                    decrease_factor=GEMINI_RATE_DECREASE_FACTOR,
+                    max_retries=GEMINI_MAX_RETRIES
+                )
+    return _gemini_limiter